@@ -0,0 +1,241 @@
+import os
+import re
+import sys
+import time
+import random
+import asyncio
+from collections import defaultdict
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from daily_scraper import (
+    DailyKrokScraper, RoundStopper, USERNAME, PASSWORD, LOGIN_URL, COURSE_URL,
+    form_fields, parse_quiz_list, parse_review_page,
+)
+
+# --- CONFIG ---
+# Quizzes attempted at the same time on the event loop
+QUIZ_CONCURRENCY = int(os.environ.get("KROK_ASYNC_QUIZZES", "8"))
+# Requests in flight per host (shared by every quiz)
+HOST_LIMIT = int(os.environ.get("KROK_HOST_LIMIT", "4"))
+REQUEST_RETRIES = 4
+MAX_RETRIES = 3
+
+def backoff(attempt, base=0.5, cap=30):
+    """Exponential backoff with jitter: 0.5s, 1s, 2s, ... capped at 30s"""
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class AsyncKrokScraper(DailyKrokScraper):
+    """Browserless scraper running many quiz attempts concurrently on one event loop"""
+    def __init__(self, quiz_concurrency=QUIZ_CONCURRENCY, host_limit=HOST_LIMIT):
+        super().__init__(workers=1, engine="http")
+        self.quiz_concurrency = max(1, quiz_concurrency)
+        self.host_limit = max(1, host_limit)
+        self.http = None
+        self.host_slots = None
+        self.timings = []
+
+    def log(self, tag, msg):
+        print(f"[{tag}] {msg}" if tag else msg, flush=True)
+
+    # --- HTTP ---
+    async def fetch(self, url, data=None, method="get"):
+        """GET/POST with a per-host slot. Retries connection errors and 5xx with exponential backoff."""
+        host = urlparse(url).netloc
+        for attempt in range(REQUEST_RETRIES):
+            try:
+                async with self.host_slots[host]:
+                    if method == "post":
+                        resp = await self.http.post(url, data=data)
+                    else:
+                        resp = await self.http.get(url, params=data)
+                    async with resp:
+                        if resp.status >= 500:
+                            raise aiohttp.ClientResponseError(resp.request_info, resp.history, status=resp.status)
+                        resp.raise_for_status()
+                        text = await resp.text()
+                        final_url = str(resp.url)
+                return final_url, text, BeautifulSoup(text, 'html.parser')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = getattr(e, "status", 500)
+                if attempt == REQUEST_RETRIES - 1 or status < 500:
+                    raise
+                await asyncio.sleep(backoff(attempt))
+
+    async def submit_form(self, form, page_url, extra=None):
+        data = form_fields(form)
+        if extra: data.update(extra)
+        action = urljoin(page_url, form.get("action") or page_url)
+        return await self.fetch(action, data, method=(form.get("method") or "get").lower())
+
+    async def login(self):
+        try:
+            print("🔑 Logging in...", flush=True)
+            url, _, soup = await self.fetch(LOGIN_URL)
+            if "login" not in url:
+                return True
+
+            token = soup.find("input", attrs={"name": "logintoken"})
+            form = token.find_parent("form") if token else soup.find("form", id="login")
+            url, _, soup = await self.submit_form(form, url, {"username": USERNAME, "password": PASSWORD})
+            if "login/index.php" in url or soup.find(id="loginerrormessage"):
+                raise RuntimeError("still on the login page")
+            print("✅ Login successful.", flush=True)
+            return True
+        except Exception as e:
+            print(f"❌ Login Failed: {e}", flush=True)
+            return False
+
+    async def get_all_tests(self):
+        print("🔎 Scanning for available tests...", flush=True)
+        try:
+            url, _, soup = await self.fetch(COURSE_URL)
+            quizzes = parse_quiz_list(soup, url)
+            print(f"📋 Found {len(quizzes)} tests to scrape.", flush=True)
+            return quizzes
+        except Exception as e:
+            print(f"❌ Failed to get test list: {e}", flush=True)
+            return []
+
+    # --- SCRAPING ---
+    async def play_round(self, tag, quiz_link, questions_map, round_num, known):
+        """Same cycle as HttpSession.play_round, without blocking the loop"""
+        url, text, soup = await self.fetch(quiz_link)
+
+        # 1. Start/Continue
+        start_form = soup.select_one(".quizstartbuttondiv form")
+        if start_form:
+            url, text, soup = await self.submit_form(start_form, url)
+
+        # 2. Handle Popup
+        popup_btn = soup.find(id="id_submitbutton")
+        popup_form = popup_btn.find_parent("form") if popup_btn else None
+        if popup_form and "startattempt.php" in (popup_form.get("action") or ""):
+            url, text, soup = await self.submit_form(popup_form, url)
+
+        # 3. Finish Attempt
+        finish_link = soup.select_one(".endtestlink")
+        if finish_link and finish_link.get("href"):
+            url, text, soup = await self.fetch(urljoin(url, finish_link["href"]))
+        elif round_num == 1:
+            self.log(tag, "   ⚠️ Could not find 'Finish attempt' link.")
+            return None
+
+        # 4. Submit
+        finish_form = soup.select_one(".btn-finishattempt form")
+        if finish_form:
+            url, text, soup = await self.submit_form(finish_form, url)
+
+        # 5. Expand
+        show_all = soup.find("a", href=re.compile(r"showall=1"))
+        if show_all:
+            url, text, soup = await self.fetch(urljoin(url, show_all["href"]))
+
+        # 6. Parse (off the loop, big review pages take a while)
+        if not soup.find("div", class_="que"):
+            self.log(tag, "   ⚠️ Parsing error: no questions on the review page")
+            return None
+        return await asyncio.to_thread(parse_review_page, text, questions_map, known)
+
+    async def scrape_test_logic(self, tag, quiz_link, known):
+        questions_map = {}
+        stopper = RoundStopper(len(known))
+        round_num = 1
+
+        while not stopper.should_stop():
+            try:
+                counts = await self.play_round(tag, quiz_link, questions_map, round_num, known)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.log(tag, f"   ⚠️ Request failed: {e}")
+                counts = None
+
+            if counts is None:
+                # Back off instead of a fixed pause when the host misbehaves
+                await asyncio.sleep(backoff(stopper.failed_streak))
+                stopper.fail()
+                continue
+
+            stopper.observe(*counts)
+            self.log(tag, f"   Questions collected: {len(questions_map)} (+{counts[0]}) · {stopper.describe()}")
+            round_num += 1
+
+        self.log(tag, f"   🛑 Stopped after {stopper.rounds} rounds · {stopper.describe()}")
+        return questions_map, stopper.rounds
+
+    async def process_quiz(self, quiz, i, total, quiz_slots):
+        tag = f"{i+1}/{total}"
+        async with quiz_slots:
+            self.log(tag, f"Processing: {quiz['name']}")
+            started = time.perf_counter()
+            known = await asyncio.to_thread(self.known_fingerprints, quiz['name'])
+            if known:
+                self.log(tag, f"📚 {len(known)} questions already in the master database.")
+
+            for attempt in range(MAX_RETRIES):
+                try:
+                    questions, rounds = await self.scrape_test_logic(tag, quiz['link'], known)
+                    if rounds:
+                        if questions:
+                            await asyncio.to_thread(self.save_results, quiz['name'], questions)
+                        elapsed = time.perf_counter() - started
+                        self.timings.append((quiz['name'], elapsed, rounds, len(questions)))
+                        self.log(tag, f"⏱️ {quiz['name']}: {len(questions)} new questions, {rounds} rounds, {elapsed:.1f}s ({len(questions) / elapsed:.2f} q/s)")
+                        return True
+                    self.log(tag, f"⚠️ Warning: No questions found (Attempt {attempt+1}/{MAX_RETRIES})")
+                except Exception as e:
+                    self.log(tag, f"❌ Error on attempt {attempt+1}: {e}")
+                if attempt < MAX_RETRIES - 1:
+                    await asyncio.sleep(backoff(attempt + 2))
+                    await self.login()
+
+            self.log(tag, f"💀 Failed to scrape '{quiz['name']}' after {MAX_RETRIES} attempts. Skipping.")
+            self.failed.append(quiz['name'])
+            return False
+
+    async def main(self):
+        self.host_slots = defaultdict(lambda: asyncio.Semaphore(self.host_limit))
+        connector = aiohttp.TCPConnector(limit=self.quiz_concurrency * self.host_limit, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=60)
+        # unsafe=True keeps cookies for IP hosts (local stand-in Moodle)
+        jar = aiohttp.CookieJar(unsafe=True)
+        started = time.perf_counter()
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, cookie_jar=jar) as http:
+            self.http = http
+            if not await self.login():
+                sys.exit(1)
+
+            quizzes = await self.get_all_tests()
+            if not quizzes:
+                print("No quizzes found. Exiting.")
+                sys.exit(1)
+
+            print(f"⚡ Running up to {self.quiz_concurrency} quizzes at once, {self.host_limit} requests per host.", flush=True)
+            quiz_slots = asyncio.Semaphore(self.quiz_concurrency)
+            await asyncio.gather(*(self.process_quiz(q, i, len(quizzes), quiz_slots) for i, q in enumerate(quizzes)))
+
+        await asyncio.to_thread(self.render_pdfs)
+        self.report(time.perf_counter() - started)
+
+    def report(self, wall):
+        total_q = sum(t[3] for t in self.timings)
+        serial = sum(t[1] for t in self.timings)
+        print("\n📊 Per-quiz timings:")
+        for name, elapsed, rounds, count in sorted(self.timings, key=lambda t: -t[1]):
+            print(f"   {elapsed:7.1f}s  {rounds:3d} rounds  {count:5d} q  {count / elapsed:6.2f} q/s  {name}")
+        print(f"\n📈 {total_q} questions from {len(self.timings)} tests in {wall:.1f}s ({total_q / wall if wall else 0:.2f} q/s).")
+        if wall:
+            print(f"   Sum of per-quiz times {serial:.1f}s → {serial / wall:.1f}x over running them one by one.")
+        if self.failed:
+            print(f"\n💀 {len(self.failed)} test(s) not scraped: {', '.join(sorted(self.failed))}")
+        print("\n🎉 All operations completed.")
+
+    def run(self):
+        asyncio.run(self.main())
+
+if __name__ == "__main__":
+    AsyncKrokScraper().run()
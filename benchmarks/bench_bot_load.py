@@ -0,0 +1,129 @@
+"""multi_bot under a burst of callbacks: handler work inline on the event loop vs. on the thread pool.
+
+A fake update source fires N callbacks at once, the way PTB hands them over with
+concurrent_updates: mostly menu clicks, plus every tenth a file page whose PDFs are
+not in pdf_index.json (as right after new uploads), so their question counts have to
+be parsed with PyPDF2. Every Bot API call the handlers make waits API_LATENCY, like a
+round trip to Telegram. Reported per burst size: latency from arrival to the handler
+finishing (p50/p99, menu clicks and pages apart) and the longest event-loop stall.
+
+"inline" runs the blocking work on the loop itself, as the handlers used to.
+
+    python benchmarks/bench_bot_load.py [burst ...]
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+from concurrent.futures import Executor, Future
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.chdir(BASE_DIR)
+logging.disable(logging.INFO)
+
+import multi_bot as mb
+from bot_metrics import percentile
+
+API_LATENCY = 0.02
+HEAVY_EVERY = 10
+BURSTS = [1, 10, 50]
+
+class FakeQuery:
+    """Stands in for telegram.CallbackQuery (and its message): every call is a slow no-op"""
+    def __init__(self, data):
+        self.data = data
+        self.message = self
+    async def answer(self, *args, **kwargs): await asyncio.sleep(API_LATENCY)
+    async def edit_message_text(self, *args, **kwargs): await asyncio.sleep(API_LATENCY)
+    async def reply_text(self, *args, **kwargs): await asyncio.sleep(API_LATENCY)
+    async def reply_document(self, *args, **kwargs): await asyncio.sleep(API_LATENCY)
+
+class FakeUser:
+    id = mb.MY_ID
+
+class FakeUpdate:
+    def __init__(self, data):
+        self.callback_query = FakeQuery(data)
+        self.message = None
+        self.effective_user = FakeUser
+
+class FakeContext:
+    def __init__(self):
+        self.user_data = {}
+
+class InlineExecutor(Executor):
+    """Runs submitted work right away on the calling thread, i.e. on the event loop"""
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+def fake_updates(catalog, n):
+    """n callback_data strings: menu clicks with a page of unindexed PDFs every HEAVY_EVERY"""
+    pages = [(node_id, page) for node, node_id in catalog.node_ids.items() if len(node) == 3
+             for page in range(-(-len(catalog.files(*node)) // mb.PAGE_SIZE))]
+    menus = ["root"] + [f"C|{catalog.node_id(cat)}" for cat in catalog.cats] \
+        + [f"M|{node_id}" for node, node_id in catalog.node_ids.items() if len(node) == 2]
+    out = []
+    for i in range(n):
+        if i % HEAVY_EVERY == HEAVY_EVERY - 1:
+            node_id, page = pages[(i // HEAVY_EVERY) % len(pages)]
+            out.append(f"V|{node_id}|{page}")
+        else:
+            out.append(menus[i % len(menus)])
+    return out
+
+async def loop_lag(stop, lags):
+    """Longest gap between wakeups of a task that asks to run every millisecond"""
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        lags.append(now - last - 0.001)
+        last = now
+
+async def burst(datas):
+    latencies = []
+    async def one(data):
+        arrived = time.perf_counter()
+        await mb.handle_callback(FakeUpdate(data), FakeContext())
+        latencies.append((data.startswith("V|"), time.perf_counter() - arrived))
+
+    stop = asyncio.Event(); lags = []
+    ticker = asyncio.ensure_future(loop_lag(stop, lags))
+    await asyncio.sleep(0.005)
+    await asyncio.gather(*(one(d) for d in datas))
+    stop.set(); await ticker
+    return latencies, max(lags, default=0.0)
+
+def summary(values):
+    values = sorted(values)
+    if not values:
+        return f"{'-':>7} {'-':>7}"
+    return f"{percentile(values, 50) * 1000:6.0f}ms {percentile(values, 99) * 1000:6.0f}ms"
+
+def main():
+    bursts = [int(a) for a in sys.argv[1:]] or BURSTS
+    catalog = mb.get_catalog()
+    # Nothing indexed: page views have to parse every PDF on the page
+    catalog.pdf_index = {}
+    pool = mb._blocking_pool
+
+    print(f"{'mode':<8} {'burst':>5}  {'menus p50':>9} {'p99':>7}  {'pages p50':>9} {'p99':>7}  {'loop stall':>10}")
+    for mode in ("inline", "pool"):
+        mb._blocking_pool = InlineExecutor() if mode == "inline" else pool
+        for n in bursts:
+            mb._question_count_cache.clear()
+            mb.bot_metrics.STATS.reset()
+            latencies, stall = asyncio.run(burst(fake_updates(catalog, n)))
+            menus = [t for heavy, t in latencies if not heavy]
+            pages = [t for heavy, t in latencies if heavy]
+            print(f"{mode:<8} {n:>5}  {summary(menus)}  {summary(pages)}  {stall * 1000:8.0f}ms")
+    print("\nPer-handler metrics from the last run (bot_metrics.STATS, also served on /metrics):")
+    for name, m in mb.bot_metrics.STATS.snapshot().items():
+        print(f"   {name:<14} n={m['count']:<3} p50={m['p50_ms']:.0f}ms p99={m['p99_ms']:.0f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Review-page parser benchmark.
+
+Runs every installed question_extractor backend over saved review pages and checks
+they all return the same records as BeautifulSoup.
+
+    python benchmarks/bench_extractor.py [page.html | folder ...]
+
+Save real pages with KROK_SAVE_REVIEW_DIR=<folder> during a scrape. Without any
+fixtures, 200-question pages are synthesized from the largest Merged/TXT master.
+"""
+import os
+import re
+import sys
+import glob
+import html
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from question_extractor import available_backends, extract_questions
+
+MERGED_TXT_DIR = os.path.join(BASE_DIR, "Merged", "TXT")
+QUESTIONS_PER_PAGE = 200
+SYNTHETIC_PAGES = 5
+REPEAT = 3
+
+def load_fixtures(args):
+    paths = []
+    for arg in args:
+        if os.path.isdir(arg):
+            paths += sorted(glob.glob(os.path.join(arg, "*.html")))
+        else:
+            paths.append(arg)
+    pages = []
+    for p in paths:
+        with open(p, "r", encoding="utf-8", errors="replace") as f:
+            pages.append(f.read())
+    return pages
+
+def que_html(n, block):
+    """One question the way Moodle's review page renders it"""
+    lines = [l.strip() for l in block.split("\n") if l.strip()]
+    q_text = re.sub(r'^\d+\.\s*', '', lines[0])
+    answers = []
+    correct = ""
+    for i, line in enumerate(lines[1:]):
+        m = re.match(r'^(\*?)([a-eA-E])\.\s*(.*)$', line)
+        if not m: continue
+        if m.group(1): correct = m.group(3)
+        answers.append(
+            f'<div class="r{i % 2}"><input type="radio" name="q{n}:1_answer" value="{i}" disabled="disabled">'
+            f'<div class="d-flex w-auto" id="q{n}:1_answer{i}_label" data-region="answer-label">'
+            f'<span class="answernumber">{m.group(2)}. </span>'
+            f'<div class="flex-fill ml-1">{html.escape(m.group(3))}</div></div> </div>'
+        )
+    return (
+        f'<div id="question-1-{n}" class="que multichoice deferredfeedback notanswered">'
+        f'<div class="info"><h3 class="no">Question <span class="qno">{n}</span></h3><div class="state">Not answered</div></div>'
+        f'<div class="content"><div class="formulation clearfix"><h4 class="accesshide">Question text</h4>'
+        f'<div class="qtext"><p>{html.escape(q_text)}</p></div>'
+        f'<div class="ablock no-overflow visual-scroll-x"><div class="prompt">Select one:</div>'
+        f'<div class="answer">{"".join(answers)}</div></div></div>'
+        f'<div class="outcome clearfix"><h4 class="accesshide">Feedback</h4><div class="feedback">'
+        f'<div class="rightanswer">The correct answer is: {html.escape(correct)}</div></div></div></div></div>'
+    )
+
+def synthesize_pages():
+    masters = sorted(glob.glob(os.path.join(MERGED_TXT_DIR, "*.txt")), key=os.path.getsize)
+    if not masters:
+        sys.exit("No fixtures given and no Merged/TXT masters to build pages from.")
+    with open(masters[-1], "r", encoding="utf-8", errors="replace") as f:
+        blocks = [b for b in re.split(r'\n(?=\d+\.)', f.read().replace('\r\n', '\n')) if b.strip()]
+    print(f"Synthesizing {SYNTHETIC_PAGES} pages × {QUESTIONS_PER_PAGE} questions from {os.path.basename(masters[-1])}")
+    pages = []
+    for p in range(SYNTHETIC_PAGES):
+        chunk = blocks[p * QUESTIONS_PER_PAGE:(p + 1) * QUESTIONS_PER_PAGE]
+        body = "".join(que_html(i + 1, b) for i, b in enumerate(chunk))
+        pages.append(
+            '<!DOCTYPE html><html dir="ltr" lang="uk"><head><title>Review</title>'
+            '<script>var M = {}; M.cfg = {"wwwroot": "https://example"};</script></head>'
+            f'<body id="page-mod-quiz-review"><div id="page"><form>{body}</form></div>'
+            '<footer id="page-footer"></footer></body></html>'
+        )
+    return pages
+
+def main():
+    pages = load_fixtures(sys.argv[1:]) or synthesize_pages()
+    total_q = None
+    reference = None
+    results = {}
+
+    for backend in reversed(available_backends()):  # bs4 first: it is the reference
+        records = [extract_questions(page, backend=backend) for page in pages]
+        if reference is None:
+            reference = records
+            total_q = sum(len(r) for r in records)
+        elif records != reference:
+            mismatches = sum(a != b for r1, r2 in zip(records, reference) for a, b in zip(r1, r2))
+            print(f"❌ {backend}: {mismatches} records differ from bs4")
+
+        best = None
+        for _ in range(REPEAT):
+            started = time.perf_counter()
+            for page in pages:
+                extract_questions(page, backend=backend)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results[backend] = best
+
+    print(f"\n{len(pages)} pages, {total_q} questions, best of {REPEAT}:")
+    base = results["bs4"]
+    for backend, elapsed in sorted(results.items(), key=lambda r: r[1]):
+        print(f"   {backend:<11} {elapsed * 1000:8.1f} ms  {total_q / elapsed:9.0f} q/s  {base / elapsed:5.1f}x")
+
+if __name__ == "__main__":
+    main()
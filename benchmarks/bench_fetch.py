@@ -0,0 +1,144 @@
+"""Website "send me this PDF" requests: blocking requests.get vs. the streamed aiohttp fetch.
+
+A local aiohttp server on its own thread plays the website. It serves Merged/PDF at
+4 MB/s with ETags, both under /Merged/PDF/ (this repo's own URLs, which the bot now
+reads from disk) and under /mirror/ (any other site). benchmarks/fake_bot_api.py plays
+Telegram, with the send rate limiter opened wide so only the fetch differs. Five
+requests arrive together while a ticker measures how long the bot's event loop stalls.
+
+    python benchmarks/bench_fetch.py [count]
+"""
+import io
+import os
+import sys
+import glob
+import time
+import asyncio
+import logging
+import tempfile
+import threading
+import urllib.parse
+from hashlib import blake2b
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+logging.disable(logging.INFO)
+
+import aiohttp
+import requests
+from aiohttp import web
+from telegram import Bot
+
+import telegram_bot
+from fake_bot_api import FakeBotApi
+from file_id_cache import FileIdCache
+from sent_files import SentFileCache
+from send_queue import RateLimiter
+
+MERGED_PDF_DIR = os.path.join(BASE_DIR, "Merged", "PDF")
+SITE_BPS = 4_000_000
+CHUNK = 64 * 1024
+
+class FakeSite:
+    """Serves Merged/PDF slowly, with ETags so repeat requests can be answered with 304"""
+    def __init__(self):
+        self.served = 0
+
+    async def serve(self, request):
+        path = os.path.join(MERGED_PDF_DIR, os.path.basename(request.match_info["name"]))
+        with open(path, "rb") as f:
+            data = f.read()
+        etag = '"' + blake2b(data, digest_size=8).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        response = web.StreamResponse(headers={"ETag": etag, "Content-Type": "application/pdf"})
+        response.content_length = len(data)
+        await response.prepare(request)
+        for i in range(0, len(data), CHUNK):
+            await response.write(data[i:i + CHUNK])
+            await asyncio.sleep(CHUNK / SITE_BPS)
+        self.served += len(data)
+        return response
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/Merged/PDF/{name}", self.serve)
+        app.router.add_get("/mirror/{name}", self.serve)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    def start_in_thread(self):
+        """Runs on its own loop, so a blocking client on the bot's loop cannot starve it"""
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        def serve():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+        threading.Thread(target=serve, daemon=True).start()
+        ready.wait()
+        return self
+
+async def old_download_and_send(bot, chat_id, url, name):
+    """download_and_send as it was: blocking GET, whole body in memory, always uploaded"""
+    r = requests.get(url, timeout=20)
+    if r.status_code == 200:
+        pdf_file = io.BytesIO(r.content)
+        pdf_file.name = f"{name}.pdf"
+        await bot.send_document(chat_id=chat_id, document=pdf_file, caption=f"📄 {name}.pdf")
+
+async def loop_stall(stop, lags):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        lags.append(now - last - 0.001)
+        last = now
+
+async def run(label, site, sends):
+    served = site.served
+    stop = asyncio.Event(); lags = []
+    ticker = asyncio.ensure_future(loop_stall(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(send() for send in sends))
+    elapsed = time.perf_counter() - started
+    stop.set(); await ticker
+    print(f"   {label:<38} {elapsed:6.2f}s  stall {max(lags) * 1000:6.0f}ms  "
+          f"{(site.served - served) / 1e6:5.1f} MB downloaded")
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    names = [os.path.basename(p) for p in sorted(glob.glob(os.path.join(MERGED_PDF_DIR, "*.pdf")), key=os.path.getsize)[-count:]]
+    site = FakeSite().start_in_thread()
+    api = await FakeBotApi(upload_bps=50_000_000).start()
+    url = lambda folder, name: f"http://127.0.0.1:{site.port}/{folder}/{urllib.parse.quote(name)}"
+    print(f"{count} PDFs, {sum(os.path.getsize(os.path.join(MERGED_PDF_DIR, n)) for n in names) / 1e6:.1f} MB\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        async with Bot("123:fake", base_url=api.base_url, base_file_url=api.base_file_url) as bot:
+            await run("requests.get (before)", site,
+                      [lambda i=i, n=n: old_download_and_send(bot, i, url("mirror", n), n[:-4]) for i, n in enumerate(names, 1)])
+
+            telegram_bot.application = type("App", (), {"bot": bot})
+            telegram_bot.loop = asyncio.get_running_loop()
+            telegram_bot.rate_limiter = RateLimiter(per_chat_burst=1000, global_burst=1000)
+            telegram_bot.sent_files = SentFileCache(os.path.join(tmp, "sent"))
+            telegram_bot.http_session = aiohttp.ClientSession(timeout=telegram_bot.FETCH_TIMEOUT)
+            for folder in ("mirror", "Merged/PDF"):
+                # A fresh file_id cache, so every file is uploaded again and only the fetch differs
+                telegram_bot.file_ids = FileIdCache(os.path.join(tmp, f"{folder.replace('/', '_')}.db"))
+                sends = [lambda i=i, n=n: telegram_bot.download_and_send(i, url(folder, n), n[:-4])
+                         for i, n in enumerate(names, 1)]
+                await run(f"aiohttp, /{folder}/ URLs", site, sends)
+                await run(f"aiohttp, /{folder}/ URLs again", site, sends)
+            await telegram_bot.http_session.close()
+    await api.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
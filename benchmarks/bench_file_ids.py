@@ -0,0 +1,86 @@
+"""Sending the same master PDFs again: upload every time vs. the file_id cache.
+
+Uses python-telegram-bot's real Bot against benchmarks/fake_bot_api.py, which reads
+uploads at 2 MB/s like a modest uplink. The largest masters in Merged/PDF are sent
+ROUNDS times each, the way GPDF sends them, with a scratch file_id database; then
+one of them changes on disk and the fake API forgets every file_id (as after a
+token change), both of which have to fall back to an upload.
+
+    python benchmarks/bench_file_ids.py [count]
+"""
+import os
+import sys
+import time
+import glob
+import shutil
+import asyncio
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from telegram import Bot
+from fake_bot_api import FakeBotApi
+from file_id_cache import FileIdCache, send_cached
+
+MERGED_PDF_DIR = os.path.join(BASE_DIR, "Merged", "PDF")
+ROUNDS = 3
+CHAT_ID = 42
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+async def send_plain(bot, path):
+    await bot.send_document(CHAT_ID, document=read_bytes(path), filename=os.path.basename(path))
+
+async def send_with_cache(bot, cache, path):
+    filename = os.path.basename(path)
+    async def load():
+        return read_bytes(path)
+    await send_cached(cache, bot.id, cache.path_digest(path),
+                      lambda document: bot.send_document(CHAT_ID, document=document, filename=filename),
+                      load, filename)
+
+async def timed_round(api, label, sends):
+    before = api.stats["uploaded_bytes"]
+    started = time.perf_counter()
+    for send in sends:
+        await send()
+    print(f"   {label:<34} {time.perf_counter() - started:6.2f}s  {(api.stats['uploaded_bytes'] - before) / 1e6:6.1f} MB uploaded")
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    masters = sorted(glob.glob(os.path.join(MERGED_PDF_DIR, "*.pdf")), key=os.path.getsize)[-count:]
+    api = await FakeBotApi().start()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Scratch copies, so one can be changed without touching the repo
+        paths = []
+        for path in masters:
+            paths.append(os.path.join(tmp, os.path.basename(path)))
+            shutil.copyfile(path, paths[-1])
+        print(f"{len(paths)} masters, {sum(map(os.path.getsize, paths)) / 1e6:.1f} MB, sent {ROUNDS} times each\n")
+
+        async with Bot("123:fake", base_url=api.base_url, base_file_url=api.base_file_url) as bot:
+            print("Without cache:")
+            for n in range(ROUNDS):
+                await timed_round(api, f"round {n + 1}", [lambda p=p: send_plain(bot, p) for p in paths])
+
+            print("With file_id cache:")
+            with FileIdCache(os.path.join(tmp, "file_ids.db")) as cache:
+                sends = [lambda p=p: send_with_cache(bot, cache, p) for p in paths]
+                for n in range(ROUNDS):
+                    await timed_round(api, f"round {n + 1}", sends)
+
+                with open(paths[0], "ab") as f:
+                    f.write(b"\n% changed\n")
+                await timed_round(api, "after one file changed", sends)
+
+                api.forget_file_ids()
+                await timed_round(api, "after Telegram dropped the ids", sends)
+                await timed_round(api, "and once more", sends)
+    await api.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""Near-duplicate finder benchmark: MinHash/LSH vs. comparing every pair.
+
+Times near_dupes.find_duplicates over every master in Merged/TXT, then checks its
+recall against exact all-pairs Jaccard on the masters small enough for that.
+
+    python benchmarks/bench_near_dupes.py [max questions for all-pairs, default 1500]
+"""
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import near_dupes
+from questions import split_blocks
+
+MERGED_TXT_DIR = os.path.join(BASE_DIR, "Merged", "TXT")
+
+def load_masters():
+    masters = {}
+    for filename in sorted(os.listdir(MERGED_TXT_DIR)):
+        if not filename.endswith(".txt"): continue
+        with open(os.path.join(MERGED_TXT_DIR, filename), "r", encoding="utf-8", errors="replace") as f:
+            masters[filename] = list(enumerate(split_blocks(f.read())))
+    return masters
+
+def all_pairs(questions, threshold=near_dupes.THRESHOLD):
+    sets = [near_dupes.shingles(near_dupes.block_key(body)) for _, body in questions]
+    found = set()
+    for i in range(len(sets)):
+        for j in range(i + 1, len(sets)):
+            if len(sets[i] & sets[j]) / len(sets[i] | sets[j]) >= threshold:
+                found.add((questions[i][0], questions[j][0]))
+    return found
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    masters = load_masters()
+    total = sum(len(q) for q in masters.values())
+
+    started = time.perf_counter()
+    lsh = {name: near_dupes.find_duplicates(questions) for name, questions in masters.items()}
+    elapsed = time.perf_counter() - started
+    pairs = sum(len(p) for p in lsh.values())
+    safe = sum(p.safe for found in lsh.values() for p in found)
+    print(f"LSH: {total} questions in {len(masters)} masters, {elapsed:.1f}s -> {pairs} pairs ({safe} safe to collapse)")
+
+    small = {name: q for name, q in masters.items() if len(q) <= limit}
+    compared = sum(len(q) * (len(q) - 1) // 2 for q in small.values())
+    started = time.perf_counter()
+    exact = hit = 0
+    lsh_time = 0.0
+    for name, questions in small.items():
+        truth = all_pairs(questions)
+        exact += len(truth)
+        hit += len(truth & {(p.keep, p.drop) for p in lsh[name]})
+    brute = time.perf_counter() - started
+    for name, questions in small.items():
+        t = time.perf_counter()
+        near_dupes.find_duplicates(questions)
+        lsh_time += time.perf_counter() - t
+    print(f"All pairs on {len(small)} masters of <= {limit} questions: {compared} comparisons in {brute:.1f}s "
+          f"(LSH {lsh_time:.2f}s, {brute / lsh_time:.0f}x)")
+    print(f"Recall: {hit}/{exact} pairs ({hit / exact * 100 if exact else 100:.1f}%)")
+
+if __name__ == "__main__":
+    main()
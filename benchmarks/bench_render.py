@@ -0,0 +1,131 @@
+"""PDF renderer golden check and benchmark.
+
+Renders masters with the old write-TXT-then-read-it-back renderer and with
+pdf_render.render_pdf fed straight from the question blocks, in reportlab's
+invariant mode, and checks the PDFs are byte-identical (layout, colors and
+wrapping unchanged) for both the master and the daily-scrape look.
+
+    python benchmarks/bench_render.py ["Merged/TXT/<master>.txt" ...]
+"""
+import os
+import re
+import sys
+import glob
+import time
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from reportlab import rl_config
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.lib import colors
+
+import pdf_render
+from questions import split_blocks
+
+MERGED_TXT_DIR = os.path.join(BASE_DIR, "Merged", "TXT")
+SAMPLE_MASTERS = 5
+
+def legacy_render(txt_path, pdf_path, colored_text=False):
+    """The renderer merge_all/super_fixer/daily_scraper each carried a copy of"""
+    c = canvas.Canvas(pdf_path, pagesize=A4)
+    width, height = A4
+    margin = 40
+    max_w = width - 2*margin
+    y = height - 40
+    c.setFont(pdf_render.FONT_NAME, 10)
+    with open(txt_path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                y -= 6
+                continue
+            bg = None
+            text_color = colors.black
+            if re.match(r'^\d+\.', line): bg = colors.lightyellow
+            elif line.startswith('*'):
+                line = line[1:].strip()
+                bg = colors.lightgreen
+                if colored_text: text_color = colors.darkgreen
+            elif colored_text:
+                text_color = colors.darkgrey
+            words = line.split(' ')
+            current_line = []
+            wrapped_lines = []
+            for word in words:
+                test_line = ' '.join(current_line + [word])
+                if pdfmetrics.stringWidth(test_line, pdf_render.FONT_NAME, 10) < max_w:
+                    current_line.append(word)
+                else:
+                    wrapped_lines.append(' '.join(current_line))
+                    current_line = [word]
+            if current_line: wrapped_lines.append(' '.join(current_line))
+            for w_line in wrapped_lines:
+                if y < 40:
+                    c.showPage()
+                    c.setFont(pdf_render.FONT_NAME, 10)
+                    y = height - 40
+                if bg:
+                    c.setFillColor(bg)
+                    c.rect(margin-2, y-4, max_w+4, 14, fill=1, stroke=0)
+                c.setFillColor(text_color)
+                c.drawString(margin, y, w_line)
+                y -= 14
+    c.save()
+
+def pick_masters(args):
+    if args:
+        return args
+    masters = sorted(glob.glob(os.path.join(MERGED_TXT_DIR, "*.txt")), key=os.path.getsize)
+    if not masters:
+        sys.exit("No masters given and Merged/TXT is empty.")
+    # Smallest, largest and a few in between
+    step = max(1, len(masters) // (SAMPLE_MASTERS - 1))
+    return sorted(set(masters[::step] + [masters[-1]]), key=os.path.getsize)
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def main():
+    rl_config.invariant = 1
+    pdf_render.setup_font()
+    failures = 0
+    total_old = total_new = 0.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for master in pick_masters(sys.argv[1:]):
+            with open(master, "r", encoding="utf-8", errors="replace") as f:
+                bodies = split_blocks(f.read())
+            # The TXT the store would export for these blocks
+            txt_path = os.path.join(tmp, "master.txt")
+            with open(txt_path, "w", encoding="utf-8") as f:
+                for count, body in enumerate(bodies, 1):
+                    f.write(f"{count}. {body}\n\n")
+
+            for colored_text in (False, True):
+                old_pdf = os.path.join(tmp, "old.pdf")
+                new_pdf = os.path.join(tmp, "new.pdf")
+                started = time.perf_counter()
+                legacy_render(txt_path, old_pdf, colored_text)
+                old = time.perf_counter() - started
+                started = time.perf_counter()
+                pdf_render.render_pdf(iter(bodies), new_pdf, colored_text)
+                new = time.perf_counter() - started
+                total_old += old
+                total_new += new
+
+                same = read(old_pdf) == read(new_pdf)
+                failures += not same
+                style = "daily " if colored_text else "master"
+                print(f"{'✅' if same else '❌'} {style} {old:6.2f}s -> {new:6.2f}s  {len(bodies):6d} q  {os.path.basename(master)}")
+
+    print(f"\nTotal {total_old:.2f}s -> {total_new:.2f}s ({total_old / total_new:.1f}x)")
+    if failures:
+        sys.exit(f"{failures} PDF(s) differ from the old renderer")
+
+if __name__ == "__main__":
+    main()
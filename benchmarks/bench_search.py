@@ -0,0 +1,80 @@
+"""Question search benchmark: FTS5 index vs. a naive scan.
+
+The naive side keeps every question of Merged/TXT and the legacy trees in memory
+(lower-cased) and checks each query word with `in`, which is what searching the
+TXT files directly amounts to. Builds Merged/search.db first if it is missing.
+
+    python benchmarks/bench_search.py [query ...]
+"""
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from questions import split_blocks
+from question_search import (
+    QuestionSearch, build_index, correct_answer, iter_txt_files, needs_build, APOSTROPHES, WORD, SEARCH_DB,
+)
+
+QUERIES = [
+    "інфаркт міокарда",
+    "Гіпертонічна хвороба",
+    "ДНК полімераза",
+    "дитина 5 років",
+    "об'єктивно",
+    "transcription",
+    "myocardial infarction",
+    "аспірин",
+    "цукровий діабет інсулін",
+    "tuberculosis",
+]
+REPEAT = 3
+
+def load_naive():
+    rows = []
+    for txt_path in iter_txt_files():
+        with open(txt_path, 'r', encoding='utf-8', errors='replace') as f:
+            for body in split_blocks(f.read()):
+                q_text = body.split('\n')[0].strip()
+                rows.append(f"{q_text}\n{correct_answer(body)}".translate(APOSTROPHES).lower())
+    # Same dedupe as the index, so both sides search the same questions
+    return list(dict.fromkeys(rows))
+
+def naive_search(rows, text):
+    words = [w.lower() for w in WORD.findall(text.translate(APOSTROPHES))]
+    return [r for r in rows if all(w in r for w in words)]
+
+def best_of(fn):
+    best = None
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    queries = [" ".join(sys.argv[1:])] if len(sys.argv) > 1 else QUERIES
+    if needs_build():
+        build_index()
+    print(f"Index: {os.path.getsize(SEARCH_DB) / 1e6:.0f} MB")
+
+    started = time.perf_counter()
+    rows = load_naive()
+    print(f"Naive: {len(rows)} questions loaded in {time.perf_counter() - started:.1f}s\n")
+
+    searcher = QuestionSearch()
+    total_naive = total_fts = 0.0
+    print(f"{'query':<28} {'naive':>10} {'fts5':>10} {'matches':>8}")
+    for q in queries:
+        naive_t, naive_hits = best_of(lambda: naive_search(rows, q))
+        fts_t, _ = best_of(lambda: searcher.search(q))
+        total_naive += naive_t
+        total_fts += fts_t
+        print(f"{q:<28} {naive_t * 1000:8.1f}ms {fts_t * 1000:8.2f}ms {len(naive_hits):8d}")
+    print(f"\nTotal {total_naive * 1000:.0f} ms -> {total_fts * 1000:.1f} ms ({total_naive / total_fts:.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""A burst of website /send requests against a flood-controlled fake Bot API.
+
+benchmarks/fake_bot_api.py enforces Telegram's limits (about 1 message a second per
+chat after a burst of 3, 30 a second overall) and answers 429 "retry after" past
+them. The website asks for REQUESTS PDFs at once (repo URLs, served from Merged/PDF)
+plus DUPLICATES repeated clicks:
+
+  before: every request becomes its own task straight away, as /send used to do
+  queue:  the same requests through telegram_bot's /send, i.e. the bounded send queue
+          with its rate limiter, RetryAfter retries and de-duplication
+
+Then the queue's bound and RetryAfter handling are checked on their own.
+
+    python benchmarks/bench_send_queue.py
+"""
+import os
+import sys
+import glob
+import time
+import socket
+import asyncio
+import logging
+import tempfile
+import urllib.parse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+logging.disable(logging.ERROR)
+
+import aiohttp
+from telegram import Bot
+from telegram.error import RetryAfter
+
+import bot_web
+import bot_metrics
+import telegram_bot
+from fake_bot_api import FakeBotApi
+from file_id_cache import FileIdCache
+from sent_files import SentFileCache
+from send_queue import SendQueue, RateLimiter, QueueFull
+
+MERGED_PDF_DIR = os.path.join(BASE_DIR, "Merged", "PDF")
+REQUESTS = 12
+DUPLICATES = 8
+CHAT_ID = telegram_bot.ALLOWED_USER_ID
+
+def site_url(name):
+    return "https://example.github.io/krok/Merged/PDF/" + urllib.parse.quote(name)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def setup(bot, tmp, label):
+    telegram_bot.application = type("App", (), {"bot": bot})
+    telegram_bot.loop = asyncio.get_running_loop()
+    telegram_bot.file_ids = FileIdCache(os.path.join(tmp, f"{label}.db"))
+    telegram_bot.sent_files = SentFileCache(os.path.join(tmp, "sent"))
+
+def report(label, api, started, delivered, failed, extra=""):
+    print(f"   {label:<8} {time.perf_counter() - started:5.1f}s  delivered {delivered:>3}  "
+          f"failed {failed:>3}  429s {api.stats['429']:>3}  uploads {api.stats['uploads']:>3}{extra}")
+
+async def before(bot, api, names, tmp):
+    setup(bot, tmp, "before")
+    # No limiter at all: every send goes out the moment its task runs
+    telegram_bot.rate_limiter = RateLimiter(per_chat_burst=10 ** 6, global_burst=10 ** 6)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(telegram_bot.download_and_send(CHAT_ID, site_url(n), n[:-4]) for n in names),
+                                   return_exceptions=True)
+    failed = sum(isinstance(r, RetryAfter) for r in results)
+    report("before", api, started, len(api.sent), failed)
+
+async def through_queue(bot, api, names, tmp):
+    setup(bot, tmp, "queue")
+    telegram_bot.rate_limiter = RateLimiter()
+    telegram_bot.send_queue = SendQueue(limiter=telegram_bot.rate_limiter)
+    telegram_bot.send_queue.start()
+    port = free_port()
+    runner = await bot_web.start_server(telegram_bot.WEB_ROUTES, port=port)
+    bot_metrics.STATS.reset()
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as http:
+        async def click(name):
+            query = urllib.parse.urlencode({"user_id": CHAT_ID, "url": site_url(name), "name": name[:-4]})
+            async with http.get(f"http://127.0.0.1:{port}/send?{query}") as r:
+                return r.status
+        statuses = await asyncio.gather(*(click(n) for n in names))
+        await telegram_bot.send_queue.join()
+        async with http.get(f"http://127.0.0.1:{port}/metrics") as r:
+            metrics = await r.json()
+    q = metrics["queue"]
+    wait = metrics["handlers"]["send_wait"]
+    report("queue", api, started, len(api.sent), q["failed"],
+           f"  retried {q['retried']}  deduped {q['deduped']}  wait p99 {wait['p99_ms'] / 1000:.1f}s")
+    print(f"            /send answered {statuses.count(200)}x 200; the per-chat limit alone "
+          f"needs {REQUESTS - 3}s for {REQUESTS} sends")
+    await runner.cleanup()
+    await telegram_bot.send_queue.stop()
+
+async def checks(bot, api):
+    print("\nQueue on its own:")
+    limiter = RateLimiter()
+
+    queue = SendQueue(maxsize=20, limiter=limiter)
+    accepted = rejected = 0
+    for i in range(30):
+        try:
+            queue.submit(i, lambda: asyncio.sleep(0))
+            accepted += 1
+        except QueueFull:
+            rejected += 1
+    print(f"   bound 20: {accepted} accepted, {rejected} refused with QueueFull (/send answers 503)")
+
+    queue = SendQueue(limiter=limiter)
+    queue.start()
+    api.flood_next(3, retry_after=1)
+    before_sent = len(api.sent)
+    started = time.perf_counter()
+    for i in range(3):
+        queue.submit(("flood", i), lambda i=i: send_text(bot, limiter, 1000 + i))
+    await queue.join()
+    m = queue.metrics()
+    print(f"   3 forced 429s (retry after 1s): {len(api.sent) - before_sent} of 3 delivered, "
+          f"{m['retried']} retried, {m['failed']} failed, {time.perf_counter() - started:.1f}s")
+    await queue.stop()
+
+async def send_text(bot, limiter, chat_id):
+    await limiter.acquire(chat_id)
+    await bot.send_message(chat_id, "ping")
+
+async def main():
+    masters = sorted(glob.glob(os.path.join(MERGED_PDF_DIR, "*.pdf")), key=os.path.getsize)[:REQUESTS]
+    names = [os.path.basename(p) for p in masters]
+    clicks = names + names[:DUPLICATES]
+    print(f"{len(clicks)} requests from one chat ({REQUESTS} PDFs + {DUPLICATES} repeated clicks):\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in ("before", "queue"):
+            api = await FakeBotApi(upload_bps=50_000_000, chat_interval=1.0, chat_burst=3,
+                                   global_rate=30, global_burst=5).start()
+            async with Bot("123:fake", base_url=api.base_url, base_file_url=api.base_file_url) as bot:
+                if label == "before":
+                    await before(bot, api, clicks, tmp)
+                else:
+                    await through_queue(bot, api, clicks, tmp)
+                    await checks(bot, api)
+            await api.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
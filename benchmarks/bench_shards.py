@@ -0,0 +1,92 @@
+"""Website load benchmark: whole TXT + parseTXT vs. index.json + one shard.
+
+Runs the viewer's own parseTXT (cut out of index.html) under node on every master,
+checks the shards in Merged/JSON hold exactly the same questions, and compares what
+opening the first part costs: bytes over the wire (gzip) and parse time.
+
+    python benchmarks/bench_shards.py      (needs node on PATH; run web_shards.py first)
+"""
+import os
+import sys
+import json
+import gzip
+import shutil
+import tempfile
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from web_shards import MERGED_TXT_DIR, SHARDS_DIR, shard_dir
+
+RUNNER = """
+const fs = require('fs');
+const [txtDir, shardsDir] = process.argv.slice(2);
+const out = {};
+for (const f of fs.readdirSync(txtDir).filter(f => f.endsWith('.txt')).sort()) {
+    let t = process.hrtime.bigint();
+    const qs = parseTXT(fs.readFileSync(txtDir + '/' + f, 'utf8'));
+    const txtMs = Number(process.hrtime.bigint() - t) / 1e6;
+
+    const dir = shardsDir + '/' + f.replace(/\\.txt$/, '');
+    t = process.hrtime.bigint();
+    const idx = JSON.parse(fs.readFileSync(dir + '/index.json', 'utf8'));
+    const s = idx.shards ? JSON.parse(fs.readFileSync(dir + '/0.json', 'utf8')) : {q: [], o: [], c: []};
+    const first = s.q.map((q, i) => ({q, opts: s.o[i], correct: s.c[i]}));
+    const shardMs = Number(process.hrtime.bigint() - t) / 1e6;
+
+    const all = [];
+    for (let n = 0; n < idx.shards; n++) {
+        const s = JSON.parse(fs.readFileSync(dir + '/' + n + '.json', 'utf8'));
+        s.q.forEach((q, i) => all.push({q, opts: s.o[i], correct: s.c[i]}));
+    }
+    out[f] = {txtMs, shardMs, total: idx.total, same: JSON.stringify(all) === JSON.stringify(qs) && all.length === qs.length,
+              firstSame: JSON.stringify(first) === JSON.stringify(qs.slice(0, idx.shard_size))};
+}
+console.log(JSON.stringify(out));
+"""
+
+def gz_size(path):
+    with open(path, "rb") as f:
+        return len(gzip.compress(f.read()))
+
+def main():
+    if not shutil.which("node"):
+        sys.exit("node is not installed.")
+    with open(os.path.join(BASE_DIR, "index.html"), "r", encoding="utf-8") as f:
+        html = f.read()
+    parse_txt = html[html.index("function parseTXT(txt)"):html.index("function showScreen")]
+
+    with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False, encoding="utf-8") as f:
+        f.write(parse_txt + RUNNER)
+        script = f.name
+    try:
+        result = json.loads(subprocess.check_output(["node", script, MERGED_TXT_DIR, SHARDS_DIR]))
+    finally:
+        os.remove(script)
+
+    failures = 0
+    txt_bytes = shard_bytes = 0
+    txt_ms = shard_ms = 0.0
+    print(f"{'':2} {'TXT gz':>9} {'shard gz':>9} {'parseTXT':>9} {'shard':>8}  master")
+    for name, r in result.items():
+        ok = r["same"] and r["firstSame"]
+        failures += not ok
+        out_dir = shard_dir(name)
+        t_gz = gz_size(os.path.join(MERGED_TXT_DIR, name))
+        s_gz = gz_size(os.path.join(out_dir, "index.json"))
+        if r["total"]:
+            s_gz += gz_size(os.path.join(out_dir, "0.json"))
+        txt_bytes += t_gz
+        shard_bytes += s_gz
+        txt_ms += r["txtMs"]
+        shard_ms += r["shardMs"]
+        print(f"{'✅' if ok else '❌'} {t_gz / 1024:8.0f}K {s_gz / 1024:8.1f}K {r['txtMs']:7.1f}ms {r['shardMs']:6.2f}ms  {name}")
+
+    print(f"\nOpening the first part of every master: {txt_bytes / 1e6:.1f} MB -> {shard_bytes / 1e6:.2f} MB gzipped, "
+          f"parse {txt_ms:.0f} ms -> {shard_ms:.0f} ms")
+    if failures:
+        sys.exit(f"{failures} master(s) differ from parseTXT")
+
+if __name__ == "__main__":
+    main()
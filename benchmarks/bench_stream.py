@@ -0,0 +1,99 @@
+"""Peak memory of reading masters: whole-file parse_to_dict vs. streamed iter_blocks.
+
+Every case runs in a fresh interpreter and reports its peak RSS above an interpreter
+that only imported the same modules. "parse" walks every block once and fingerprints
+it; "merge" upserts the file into a scratch question store, as merge_all does.
+Besides the largest masters, all of Merged/TXT concatenated stands in for a huge one.
+
+    python benchmarks/bench_stream.py [txt ...]      (Linux/macOS: uses resource.getrusage)
+"""
+import os
+import re
+import sys
+import glob
+import time
+import resource
+import tempfile
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from questions import fingerprint, iter_blocks
+from question_store import QuestionStore
+
+MERGED_TXT_DIR = os.path.join(BASE_DIR, "Merged", "TXT")
+LARGEST = 3
+
+def parse_to_dict(filepath):
+    """The reader merge_all and super_fixer each carried a copy of"""
+    questions = {}
+    with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+        content = f.read().replace('\r\n', '\n')
+    blocks = re.split(r'\n(?=\d+\.)', content)
+    for block in blocks:
+        block = block.strip()
+        if not block: continue
+        clean_block = re.sub(r'^\d+\.\s*', '', block)
+        q_text = clean_block.split('\n')[0].strip()
+        if q_text: questions[q_text] = clean_block
+    return questions
+
+def peak_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def child(mode, path, db):
+    started = time.perf_counter()
+    if mode == "old-parse":
+        count = len({fingerprint(body.split('\n')[0]) for body in parse_to_dict(path).values()})
+    elif mode == "new-parse":
+        count = len({fingerprint(body.split('\n')[0]) for body in iter_blocks(path)})
+    elif mode in ("old-merge", "new-merge"):
+        with QuestionStore(db) as store:
+            bodies = parse_to_dict(path).values() if mode == "old-merge" else iter_blocks(path)
+            store.upsert_blocks("bench.txt", bodies)
+            count = store.question_count("bench.txt")
+    else:
+        count = 0
+    print(peak_kb(), count, time.perf_counter() - started)
+
+def run(mode, path, tmp):
+    db = os.path.join(tmp, f"{mode}.db")
+    out = subprocess.check_output([sys.executable, __file__, "--child", mode, path, db], text=True).split()
+    if os.path.exists(db):
+        os.remove(db)
+    return int(out[0]), int(out[1]), float(out[2])
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        targets = sys.argv[1:]
+        if not targets:
+            masters = sorted(glob.glob(os.path.join(MERGED_TXT_DIR, "*.txt")), key=os.path.getsize)
+            huge = os.path.join(tmp, "all masters.txt")
+            with open(huge, "wb") as out:
+                for master in masters:
+                    with open(master, "rb") as f:
+                        out.write(f.read())
+                    out.write(b"\n")
+            targets = masters[-LARGEST:] + [huge]
+
+        base = run("baseline", targets[0], tmp)[0]
+        print(f"Interpreter baseline: {base / 1024:.1f} MB\n")
+        print(f"{'size':>8} {'parse old':>10} {'new':>8} {'merge old':>10} {'new':>8}  file")
+        for path in targets:
+            cells = []
+            for kind in ("parse", "merge"):
+                old_kb, old_n, _ = run(f"old-{kind}", path, tmp)
+                new_kb, new_n, _ = run(f"new-{kind}", path, tmp)
+                if old_n != new_n:
+                    sys.exit(f"{path}: {old_n} questions with parse_to_dict, {new_n} streamed")
+                cells += [(old_kb - base) / 1024, (new_kb - base) / 1024]
+            size = os.path.getsize(path) / 1e6
+            print(f"{size:6.1f}MB {cells[0]:8.1f}MB {cells[1]:6.1f}MB {cells[2]:8.1f}MB {cells[3]:6.1f}MB  {os.path.basename(path)}")
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:5])
+    else:
+        main()
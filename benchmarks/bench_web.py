@@ -0,0 +1,88 @@
+"""Health checks while one client is slow: the old HTTPServer vs. bot_web on the bot's loop.
+
+One client connects and trickles its request line in over SLOW_SECONDS, as a slow
+phone on /send would. Meanwhile a keep-alive client sends health checks ten at a time.
+HTTPServer serves one connection at a time, so every check waits out the slow client;
+the aiohttp server answers them right away.
+
+    python benchmarks/bench_web.py
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import aiohttp
+from aiohttp import web
+
+import bot_web
+from bot_metrics import percentile
+
+SLOW_SECONDS = 3.0
+CHECKS = 100
+PARALLEL = 10
+
+class OldHealthCheckHandler(BaseHTTPRequestHandler):
+    """The bots' health handler before bot_web"""
+    def do_GET(self):
+        self.send_response(200); self.end_headers()
+        self.wfile.write(b"Krok Master Bot is Alive")
+    def log_message(self, *args):
+        pass
+
+def slow_client(port, started):
+    """Sends one request a byte at a time, taking SLOW_SECONDS in all"""
+    request = b"GET /send?user_id=1&url=x&name=y HTTP/1.1\r\nHost: localhost\r\n\r\n"
+    with socket.create_connection(("127.0.0.1", port)) as s:
+        started.set()
+        for byte in request:
+            s.sendall(bytes([byte]))
+            time.sleep(SLOW_SECONDS / len(request))
+        s.recv(1024)
+
+async def health_checks(port):
+    latencies = []
+    connector = aiohttp.TCPConnector(limit=PARALLEL)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        async def check():
+            started = time.perf_counter()
+            async with http.get(f"http://127.0.0.1:{port}/") as r:
+                await r.read()
+            latencies.append(time.perf_counter() - started)
+        await asyncio.gather(*(check() for _ in range(CHECKS)))
+    return sorted(latencies)
+
+async def run(label, port):
+    started = threading.Event()
+    slow = threading.Thread(target=slow_client, args=(port, started), daemon=True)
+    slow.start(); started.wait()
+    await asyncio.sleep(0.05)
+    t = time.perf_counter()
+    latencies = await health_checks(port)
+    print(f"   {label:<22} {CHECKS} checks in {time.perf_counter() - t:5.2f}s  "
+          f"p50 {percentile(latencies, 50) * 1000:7.1f}ms  p99 {percentile(latencies, 99) * 1000:7.1f}ms")
+    await asyncio.get_running_loop().run_in_executor(None, slow.join)
+
+async def main():
+    print(f"One client taking {SLOW_SECONDS:.0f}s over its request, {CHECKS} health checks, {PARALLEL} at a time:\n")
+    old = HTTPServer(("127.0.0.1", 0), OldHealthCheckHandler)
+    threading.Thread(target=old.serve_forever, daemon=True).start()
+    await run("HTTPServer (before)", old.server_address[1])
+    old.shutdown()
+
+    async def health(request):
+        return web.Response(text="Krok Master Bot is Alive")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0)); port = s.getsockname()[1]
+    runner = await bot_web.start_server([web.get("/", health), web.get("/send", health)], port=port)
+    await run("bot_web (aiohttp)", port)
+    await runner.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(main())
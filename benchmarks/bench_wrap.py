@@ -0,0 +1,77 @@
+"""PDF word-wrap benchmark.
+
+Renders a master with the old wrap loop (re-measuring ' '.join(current_line + [word])
+for every word) and with text_wrap.wrap_line, after checking both split every line
+the same way.
+
+    python benchmarks/bench_wrap.py ["Merged/TXT/<master>.txt"]
+"""
+import os
+import sys
+import time
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+
+import pdf_render
+from questions import iter_blocks
+from text_wrap import wrap_line, word_width
+
+DEFAULT_MASTER = os.path.join(BASE_DIR, "Merged", "TXT", "Крок 3 Стоматологія (UA).txt")
+MAX_W = A4[0] - 2 * 40
+FONT_SIZE = 10
+
+def legacy_wrap_line(line, max_width, font_name, font_size):
+    """The loop the PDF writers used before text_wrap"""
+    words = line.split(' ')
+    current_line = []
+    wrapped_lines = []
+    for word in words:
+        test_line = ' '.join(current_line + [word])
+        if pdfmetrics.stringWidth(test_line, font_name, font_size) < max_width:
+            current_line.append(word)
+        else:
+            wrapped_lines.append(' '.join(current_line))
+            current_line = [word]
+    if current_line: wrapped_lines.append(' '.join(current_line))
+    return wrapped_lines
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+def main():
+    txt_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MASTER
+    pdf_render.setup_font()
+    font = pdf_render.FONT_NAME
+    with open(txt_path, "r", encoding="utf-8", errors="replace") as f:
+        lines = [l.strip().lstrip('*').strip() for l in f if l.strip()]
+    print(f"{os.path.basename(txt_path)}: {len(lines)} lines, {os.path.getsize(txt_path) / 1e6:.1f} MB")
+
+    diff = sum(legacy_wrap_line(l, MAX_W, font, FONT_SIZE) != wrap_line(l, MAX_W, font, FONT_SIZE) for l in lines)
+    if diff:
+        print(f"❌ {diff} lines wrap differently")
+    word_width.cache_clear()
+
+    wrap_old = timed(lambda: [legacy_wrap_line(l, MAX_W, font, FONT_SIZE) for l in lines])
+    wrap_new = timed(lambda: [wrap_line(l, MAX_W, font, FONT_SIZE) for l in lines])
+    print(f"\nWrapping only:  before {wrap_old:6.2f}s   after {wrap_new:6.2f}s   {wrap_old / wrap_new:5.1f}x")
+    info = word_width.cache_info()
+    print(f"   word widths cached: {info.currsize}, hit rate {info.hits / max(1, info.hits + info.misses):.1%}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "out.pdf")
+        pdf_render.wrap_line = legacy_wrap_line
+        render_old = timed(lambda: pdf_render.render_pdf(iter_blocks(txt_path), pdf_path))
+        pdf_render.wrap_line = wrap_line
+        word_width.cache_clear()
+        render_new = timed(lambda: pdf_render.render_pdf(iter_blocks(txt_path), pdf_path))
+    print(f"Full render:    before {render_old:6.2f}s   after {render_new:6.2f}s   {render_old / render_new:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""A local stand-in for api.telegram.org, enough for the bots' send paths.
+
+Answers getMe, sendDocument and sendMessage like the Bot API does, for any token.
+Uploads are read at upload_bps to stand in for a real uplink; documents sent by
+file_id only need the id to be one this server handed out. Everything it received
+is counted in `stats`, so a benchmark can tell uploads from file_id sends.
+
+With flood control on (chat_interval / global_rate), sends that come faster than
+that, beyond a small burst, get 429 "retry after" the way Telegram answers them;
+flood_next(n) forces the next n sends to get one regardless.
+
+    api = FakeBotApi(); await api.start()
+    bot = telegram.Bot(token, base_url=api.base_url, base_file_url=api.base_file_url)
+"""
+import math
+import time
+import asyncio
+import itertools
+from collections import Counter
+from hashlib import blake2b
+
+from aiohttp import web
+
+class FakeBotApi:
+    def __init__(self, upload_bps=2_000_000, latency=0.01, host="127.0.0.1", port=0,
+                 chat_interval=None, chat_burst=3, global_rate=None, global_burst=5):
+        self.upload_bps = upload_bps
+        self.latency = latency
+        self.chat_interval = chat_interval
+        self.chat_burst = chat_burst
+        self.global_interval = 1.0 / global_rate if global_rate else None
+        self.global_burst = global_burst
+        self.due = {}
+        self.forced_floods = []
+        self.host = host
+        self.port = port
+        self.file_ids = {}
+        self.stats = Counter()
+        self.sent = []
+        self.message_ids = itertools.count(1)
+        self.runner = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/bot"
+
+    @property
+    def base_file_url(self):
+        return f"http://{self.host}:{self.port}/file/bot"
+
+    async def start(self):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self.dispatch)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    def flood_next(self, n, retry_after=1):
+        self.forced_floods += [retry_after] * n
+
+    def flooded(self, chat_id):
+        """Seconds to wait if this send breaks a limit (and then it does not count), else None"""
+        if self.forced_floods:
+            return self.forced_floods.pop(0)
+        now = time.monotonic()
+        checks = []
+        if self.chat_interval:
+            checks.append((chat_id, self.chat_interval, self.chat_burst))
+        if self.global_interval:
+            checks.append((None, self.global_interval, self.global_burst))
+        for key, interval, burst in checks:
+            # GCRA again: over the limit once the next due time runs a burst ahead of now
+            wait = self.due.get(key, 0.0) - (burst - 1) * interval - now
+            if wait > 0:
+                return max(1, math.ceil(wait))
+        for key, interval, burst in checks:
+            self.due[key] = max(self.due.get(key, 0.0), now) + interval
+        return None
+
+    def forget_file_ids(self):
+        """Like a bot token change: every file_id handed out so far stops working"""
+        self.file_ids.clear()
+
+    # --- BOT API ---
+    async def dispatch(self, request):
+        method = request.match_info["method"]
+        handler = getattr(self, "api_" + method.lower(), None)
+        if handler is None:
+            return self.error(404, "Not Found")
+        params = dict(await request.post())
+        await asyncio.sleep(self.latency)
+        self.stats[method] += 1
+        if method.startswith("send"):
+            retry_after = self.flooded(params.get("chat_id"))
+            if retry_after:
+                self.stats["429"] += 1
+                return self.error(429, f"Too Many Requests: retry after {retry_after}",
+                                  parameters={"retry_after": retry_after})
+        return await handler(params)
+
+    def ok(self, result):
+        return web.json_response({"ok": True, "result": result})
+
+    def error(self, code, description, **extra):
+        return web.json_response({"ok": False, "error_code": code, "description": description, **extra}, status=code)
+
+    def message(self, params, **content):
+        return {"message_id": next(self.message_ids), "date": int(time.time()),
+                "chat": {"id": int(params.get("chat_id", 0)), "type": "private"}, **content}
+
+    async def api_getme(self, params):
+        return self.ok({"id": 1000001, "is_bot": True, "first_name": "Fake", "username": "fake_bot"})
+
+    async def api_sendmessage(self, params):
+        self.sent.append(("message", params.get("chat_id"), params.get("text")))
+        return self.ok(self.message(params, text=params.get("text", "")))
+
+    async def api_senddocument(self, params):
+        document = params.get("document")
+        if isinstance(document, web.FileField):
+            data = document.file.read()
+            await asyncio.sleep(len(data) / self.upload_bps)
+            self.stats["uploads"] += 1
+            self.stats["uploaded_bytes"] += len(data)
+            unique_id = blake2b(data, digest_size=8).hexdigest()
+            file_id = f"DOC{unique_id}{len(self.file_ids)}"
+            self.file_ids[file_id] = (unique_id, document.filename, len(data))
+        else:
+            if document not in self.file_ids:
+                return self.error(400, "Bad Request: wrong file identifier/http url specified")
+            self.stats["file_id_sends"] += 1
+            file_id = document
+        unique_id, filename, size = self.file_ids[file_id]
+        self.sent.append(("document", params.get("chat_id"), filename))
+        return self.ok(self.message(params, caption=params.get("caption"), document={
+            "file_id": file_id, "file_unique_id": unique_id, "file_name": filename, "file_size": size,
+        }))
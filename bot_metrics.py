@@ -0,0 +1,76 @@
+import time
+import functools
+from collections import defaultdict, deque
+
+# Latencies kept per name for the percentiles (the counters cover every call)
+SAMPLES = 1000
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+class LatencyStats:
+    """Call counts, errors and recent latencies per handler name.
+
+    Written by the timed handlers and read by /metrics (bot_web), all on the bot's
+    event loop, so nothing else touches it and it needs no lock.
+    """
+    def __init__(self, samples=SAMPLES):
+        self.samples = defaultdict(lambda: deque(maxlen=samples))
+        self.counts = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.in_flight = defaultdict(int)
+
+    def record(self, name, seconds, ok=True):
+        self.samples[name].append(seconds)
+        self.counts[name] += 1
+        if not ok:
+            self.errors[name] += 1
+
+    def reset(self):
+        self.samples.clear()
+        self.counts.clear()
+        self.errors.clear()
+        self.in_flight.clear()
+
+    def snapshot(self):
+        """{name: {count, errors, in_flight, p50_ms, p90_ms, p99_ms, max_ms}} over the recent samples"""
+        out = {}
+        for name in sorted(set(self.counts) | set(self.in_flight)):
+            values = sorted(self.samples[name])
+            out[name] = {
+                "count": self.counts[name],
+                "errors": self.errors[name],
+                "in_flight": self.in_flight[name],
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p90_ms": round(percentile(values, 90) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "max_ms": round((values[-1] if values else 0.0) * 1000, 2),
+            }
+        return out
+
+STATS = LatencyStats()
+
+def timed(name, stats=STATS):
+    """Decorator for async handlers: records each call's latency under `name`,
+    a string or a function of the handler's arguments returning one, and counts the
+    calls still running."""
+    def wrap(handler):
+        @functools.wraps(handler)
+        async def timed_handler(*args, **kwargs):
+            key = name(*args, **kwargs) if callable(name) else name
+            started = time.perf_counter()
+            ok = False
+            stats.in_flight[key] += 1
+            try:
+                result = await handler(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                stats.in_flight[key] -= 1
+                stats.record(key, time.perf_counter() - started, ok)
+        return timed_handler
+    return wrap
@@ -0,0 +1,42 @@
+import os
+import json
+import asyncio
+from functools import partial
+
+from aiohttp import web
+
+import bot_metrics
+
+# --- CONFIG ---
+PORT = int(os.environ.get("PORT", 10000))
+# A handler that takes longer is answered with 504 instead of holding its connection
+REQUEST_TIMEOUT = float(os.environ.get("WEB_REQUEST_TIMEOUT", "15"))
+# Idle keep-alive connections (Render's health checker, the website) are closed after this
+KEEPALIVE_TIMEOUT = float(os.environ.get("WEB_KEEPALIVE_TIMEOUT", "75"))
+
+@web.middleware
+async def timeout_middleware(request, handler):
+    try:
+        return await asyncio.wait_for(handler(request), REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        return web.Response(status=504, text="Timeout")
+
+def metrics_route(queue_depth):
+    """GET /metrics: JSON with queue_depth() (a dict of gauges) and the bot_metrics latencies"""
+    async def metrics(request):
+        body = {"queue": queue_depth(), "handlers": bot_metrics.STATS.snapshot()}
+        return web.json_response(body, dumps=partial(json.dumps, ensure_ascii=False))
+    return web.get("/metrics", metrics)
+
+async def start_server(routes, port=None):
+    """Serves routes on the running loop (the bot's own) and returns the runner to clean up on shutdown.
+
+    Requests are handled concurrently, so a slow client on one no longer holds up
+    the health check the way the single-threaded HTTPServer did.
+    """
+    app = web.Application(middlewares=[timeout_middleware])
+    app.add_routes(routes)
+    runner = web.AppRunner(app, keepalive_timeout=KEEPALIVE_TIMEOUT, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port or PORT).start()
+    return runner
@@ -5,71 +5,214 @@ import time
 import requests
 import traceback
 from datetime import datetime
+from queue import Queue, Empty
+from threading import Thread, Lock, BoundedSemaphore
+from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-
-# --- PDF IMPORTS ---
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib import colors
+from questions import fingerprint, answer_signature, load_known
+from question_extractor import iter_questions
+from question_store import load_aliases
+from pdf_render import render_all
 
 # --- CONFIG ---
 USERNAME = os.environ.get("KROK_USERNAME")
 PASSWORD = os.environ.get("KROK_PASSWORD")
 
-COURSE_URL = "https://test.testcentr.org.ua/course/view.php?id=4"
-LOGIN_URL = "https://test.testcentr.org.ua/login/index.php"
+# Base URL can point at a local stand-in Moodle (fixture HTML) for testing
+BASE_URL = os.environ.get("KROK_BASE_URL", "https://test.testcentr.org.ua").rstrip("/")
+COURSE_ID = os.environ.get("KROK_COURSE_ID", "4")
+COURSE_URL = f"{BASE_URL}/course/view.php?id={COURSE_ID}"
+LOGIN_URL = f"{BASE_URL}/login/index.php"
+
+# Worker pool: number of logged-in browser sessions pulling quizzes from one queue,
+# and how many quiz attempts may hit the Moodle host at the same time (0: one per worker)
+WORKERS = int(os.environ.get("KROK_WORKERS", "1"))
+MAX_CONCURRENCY = int(os.environ.get("KROK_MAX_CONCURRENCY", "0"))
+MAX_RETRIES = 3
+
+# Adaptive stopping: stop a quiz once the capture-recapture estimate says fewer than
+# this many questions are still unseen. MAX_ROUNDS is a hard cap per quiz.
+UNSEEN_THRESHOLD = float(os.environ.get("KROK_UNSEEN_THRESHOLD", "1"))
+MAX_ROUNDS = int(os.environ.get("KROK_MAX_ROUNDS", "200"))
+MAX_FAILED_ROUNDS = 4
+
+# Scraping engine: "selenium" drives headless Chrome, "http" talks to Moodle with plain requests
+ENGINE = os.environ.get("KROK_ENGINE", "selenium").lower()
 
-# Relative Font Handling (Works on Mac and GitHub Actions)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-FONT_FILE = os.path.join(BASE_DIR, "DejaVuSans.ttf") 
-FONT_NAME = 'DejaVuSans'
 
-class DailyKrokScraper:
-    def __init__(self):
+# Incremental mode: questions already in the Merged master are not collected again,
+# only the delta lands in the date folder
+MERGED_TXT_DIR = os.path.join(BASE_DIR, "Merged", "TXT")
+ALIASES_FILE = os.path.join(BASE_DIR, "Merged", "aliases.json")
+INCREMENTAL = os.environ.get("KROK_INCREMENTAL", "1") != "0"
+
+# Set to a folder to keep every review page (fixtures for benchmarks/bench_extractor.py)
+REVIEW_DUMP_DIR = os.environ.get("KROK_SAVE_REVIEW_DIR")
+
+def clean_quiz_name(name):
+    # Clean name for filesystem
+    clean_name = re.sub(r'[\\/*?:"<>|]', "", name).strip()
+    # Remove newlines if they snuck in
+    return clean_name.replace('\n', ' ').replace('\r', '').strip()
+
+def master_txt_path(name):
+    """Where merge_all.py keeps the master file for this quiz"""
+    filename = clean_quiz_name(name).replace('Quiz', '').replace('  ', ' ').strip()
+    return os.path.join(MERGED_TXT_DIR, f"{filename}.txt")
+
+def parse_review_page(html, questions_map, known=None):
+    """Adds every unseen div.que of a review page to questions_map.
+
+    known maps fingerprints to answer signatures (None for a collapsed alias, skipped
+    outright). A known question is kept only when its correct answer changed, so the
+    merge picks up the correction; it still counts as seen, not new.
+    Returns (new, questions on the page)."""
+    if REVIEW_DUMP_DIR:
+        os.makedirs(REVIEW_DUMP_DIR, exist_ok=True)
+        dump_path = os.path.join(REVIEW_DUMP_DIR, f"review-{time.time_ns()}.html")
+        with open(dump_path, "w", encoding="utf-8") as f:
+            f.write(html)
+
+    known = known or {}
+    new_count = 0
+    page_count = 0
+    def seen(q_text):
+        if q_text in questions_map: return True
+        fp = fingerprint(q_text)
+        return fp in known and known[fp] is None
+    for q_text, options, correct_ans in iter_questions(html, skip=seen):
+        page_count += 1
+        if options is None: continue
+
+        correct = [txt for _, txt in options if correct_ans and txt.strip() == correct_ans]
+        fp = fingerprint(q_text)
+        if fp not in known:
+            new_count += 1
+        elif known[fp] == answer_signature(correct):
+            continue
+
+        options_str = ""
+        for letter, txt in options:
+            pre = "*" if txt in correct else ""
+            options_str += f"{pre}{letter} {txt}\n"
+
+        questions_map[q_text] = f"{q_text}\n{options_str}"
+
+    return new_count, page_count
+
+
+class RoundStopper:
+    """Decides when a quiz bank is exhausted, capture-recapture style.
+
+    Every round is a sample from the bank: questions already in questions_map are
+    recaptures, the rest are newly marked. The Schnabel estimate of the bank size is
+    N = sum(caught * marked_before) / sum(recaptured), so N - marked is the expected
+    number of questions we have not seen yet. Questions known from the master
+    database count as marked before the first round.
+    """
+    def __init__(self, known=0, threshold=UNSEEN_THRESHOLD, max_rounds=MAX_ROUNDS, max_failed=MAX_FAILED_ROUNDS):
+        self.threshold = threshold
+        self.max_rounds = max_rounds
+        self.max_failed = max_failed
+        self.rounds = 0
+        self.failed_streak = 0
+        self.known = known
+        self.marked = known
+        self.weighted_catch = 0
+        self.recaptured = 0
+
+    def observe(self, new_count, page_count):
+        self.weighted_catch += page_count * self.marked
+        self.recaptured += page_count - new_count
+        self.marked += new_count
+        self.rounds += 1
+        self.failed_streak = 0
+
+    def fail(self):
+        self.failed_streak += 1
+
+    def estimate(self):
+        """Estimated bank size, None until the first recapture"""
+        if not self.recaptured:
+            return None
+        return max(self.marked, self.weighted_catch / self.recaptured)
+
+    def unseen(self):
+        est = self.estimate()
+        return None if est is None else est - self.marked
+
+    def should_stop(self):
+        if self.failed_streak >= self.max_failed or self.rounds >= self.max_rounds:
+            return True
+        unseen = self.unseen()
+        return self.rounds >= 2 and unseen is not None and unseen < self.threshold
+
+    def describe(self):
+        est = self.estimate()
+        if est is None:
+            return "bank size unknown yet"
+        return f"bank ≈ {est:.0f}, ~{est - self.marked:.1f} unseen"
+
+
+class QuizSession:
+    """Shared round loop. Engines implement init_driver/login/get_all_tests/play_round."""
+    # Pause between attempt rounds
+    round_pause = 1
+
+    def __init__(self, worker_id=1, throttle=None, tagged=False):
+        self.worker_id = worker_id
+        self.throttle = throttle or BoundedSemaphore(1)
+        # Tag log lines with the worker number once several sessions share the console
+        self.tag = f"[W{worker_id}] " if tagged else ""
         self.driver = None
-        # Create date-based folder structure: e.g., "10-12-2025"
-        self.date_folder = datetime.now().strftime('%d-%m-%Y')
-        self.txt_folder = os.path.join(self.date_folder, "TXT")
-        self.pdf_folder = os.path.join(self.date_folder, "PDF")
-        
-        self.ensure_folders()
-        self.setup_font()
 
-    def ensure_folders(self):
-        os.makedirs(self.txt_folder, exist_ok=True)
-        os.makedirs(self.pdf_folder, exist_ok=True)
-        print(f"📂 Folders ready: {self.date_folder}/[TXT|PDF]", flush=True)
+    def log(self, msg):
+        # Single write per line so output from parallel workers doesn't interleave
+        print(re.sub(r'^(\n*)', lambda m: m.group(1) + self.tag, msg) + "\n", end="", flush=True)
 
-    def setup_font(self):
-        # Auto-download font if missing (GitHub Actions safety)
-        if not os.path.exists(FONT_FILE):
-            print("⬇️ Font not found. Attempting download...", flush=True)
-            try:
-                FONT_URL = "https://github.com/googlefonts/dejavu-fonts/raw/master/ttf/DejaVuSans.ttf"
-                r = requests.get(FONT_URL)
-                with open(FONT_FILE, 'wb') as f:
-                    f.write(r.content)
-            except Exception as e:
-                print(f"❌ Failed to download font: {e}")
+    def is_alive(self):
+        return self.driver is not None
 
-        try:
-            pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_FILE))
-        except Exception as e:
-            print(f"❌ Font Registration Error: {e}", flush=True)
+    def close(self):
+        self.driver = None
+
+    def scrape_test_logic(self, quiz_link, known=None):
+        """The core scraping logic from your original script. Returns (new questions, successful rounds)."""
+        questions_map = {}
+        stopper = RoundStopper(len(known or ()))
+        round_num = 1
+
+        while not stopper.should_stop():
+            # Hold a concurrency slot for the whole attempt so we don't hammer the host
+            with self.throttle:
+                counts = self.play_round(quiz_link, questions_map, round_num, known)
+
+            if counts is None:
+                stopper.fail()
+                continue
+
+            stopper.observe(*counts)
+            self.log(f"   Questions collected: {len(questions_map)} (+{counts[0]}) · {stopper.describe()}")
+
+            round_num += 1
+            time.sleep(self.round_pause)
 
+        self.log(f"   🛑 Stopped after {stopper.rounds} rounds · {stopper.describe()}")
+        return questions_map, stopper.rounds
+
+
+class BrowserSession(QuizSession):
+    """One logged-in headless Chrome. The worker pool runs one of these per thread."""
     def init_driver(self):
-        if self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
-        
+        self.close()
+
         options = webdriver.ChromeOptions()
         options.add_argument("--headless")
         options.add_argument("--no-sandbox")
@@ -77,13 +220,28 @@ class DailyKrokScraper:
         options.add_argument("--window-size=1920,1080")
         self.driver = webdriver.Chrome(options=options)
 
+    def is_alive(self):
+        try:
+            self.driver.title
+            return True
+        except:
+            return False
+
+    def close(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+            except:
+                pass
+            self.driver = None
+
     def login(self):
         """Logs into the website. Returns True if successful."""
         try:
-            print(f"🔑 Logging in...", flush=True)
+            self.log("🔑 Logging in...")
             wait = WebDriverWait(self.driver, 20)
             self.driver.get(LOGIN_URL)
-            
+
             # Check if already logged in
             if "login" not in self.driver.current_url:
                 return True
@@ -92,10 +250,10 @@ class DailyKrokScraper:
             self.driver.find_element(By.ID, "password").send_keys(PASSWORD)
             self.driver.find_element(By.ID, "loginbtn").click()
             wait.until(EC.presence_of_element_located((By.ID, "page-footer")))
-            print("✅ Login successful.", flush=True)
+            self.log("✅ Login successful.")
             return True
         except Exception as e:
-            print(f"❌ Login Failed: {e}", flush=True)
+            self.log(f"❌ Login Failed: {e}")
             return False
 
     def get_all_tests(self):
@@ -107,7 +265,7 @@ class DailyKrokScraper:
                 EC.presence_of_element_located((By.CLASS_NAME, "modtype_quiz"))
             )
             quiz_elements = self.driver.find_elements(By.CSS_SELECTOR, "li.modtype_quiz .activityname a")
-            
+
             quizzes = []
             for q in quiz_elements:
                 # CLEANING LOGIC:
@@ -115,263 +273,387 @@ class DailyKrokScraper:
                 raw_text = q.text.split('\n')[0]
                 # 2. Remove the word "Quiz" if it's still there
                 name = raw_text.replace(" Quiz", "").strip()
-                
+
                 link = q.get_attribute('href')
                 if name and link and "mod/quiz/view.php" in link:
                     quizzes.append({'name': name, 'link': link})
-            
+
             # Deduplicate list
             quizzes = [dict(t) for t in {tuple(d.items()) for d in quizzes}]
-            
+
+            print(f"📋 Found {len(quizzes)} tests to scrape.", flush=True)
+            return quizzes
+        except Exception as e:
+            print(f"❌ Failed to get test list: {e}", flush=True)
+            return []
+
+    def play_round(self, quiz_link, questions_map, round_num, known=None):
+        """Runs one start → finish → submit → review cycle. Returns (new, questions on the page), None if the round failed."""
+        wait = WebDriverWait(self.driver, 10)
+        self.driver.get(quiz_link)
+
+        # 1. Start/Continue
+        started = False
+        for sel in [".quizstartbuttondiv button", "//button[contains(text(), 'Continue')]", "//button[contains(text(), 'Attempt')]"]:
+            try:
+                if "//" in sel: btn = wait.until(EC.element_to_be_clickable((By.XPATH, sel)))
+                else: btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, sel)))
+                self.driver.execute_script("arguments[0].click();", btn)
+                started = True
+                break
+            except: continue
+
+        # 2. Handle Popup
+        try:
+            popup_btn = self.driver.find_element(By.ID, "id_submitbutton")
+            if popup_btn.is_displayed(): self.driver.execute_script("arguments[0].click();", popup_btn)
+        except: pass
+
+        # 3. Finish Attempt
+        try:
+            finish_link = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".endtestlink")))
+            self.driver.execute_script("arguments[0].click();", finish_link)
+        except:
+            if round_num > 1:
+                pass
+            else:
+                self.log("   ⚠️ Could not find 'Finish attempt' link.")
+                return None
+
+        # 4. Submit
+        for _ in range(3):
+            try:
+                s_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".btn-finishattempt button")))
+                self.driver.execute_script("arguments[0].click();", s_btn)
+                m_btn = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, ".modal-footer button.btn-primary")))
+                self.driver.execute_script("arguments[0].click();", m_btn)
+                break
+            except: time.sleep(0.5)
+
+        # 5. Expand
+        try:
+            show_all = wait.until(EC.presence_of_element_located((By.XPATH, "//a[contains(@href, 'showall=1')]")))
+            self.driver.execute_script("arguments[0].click();", show_all)
+            time.sleep(2)
+        except: pass
+
+        # 6. Parse
+        try:
+            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "que")))
+            return parse_review_page(self.driver.page_source, questions_map, known)
+
+        except Exception as e:
+            self.log(f"   ⚠️ Parsing error: {e}")
+            return None
+
+
+def form_fields(form):
+    """Collects what a browser would post for a Moodle form: hidden/text inputs plus the first named submit button"""
+    data = {}
+    submit_seen = False
+    for inp in form.find_all(["input", "button"]):
+        name = inp.get("name")
+        if not name: continue
+        kind = (inp.get("type") or ("submit" if inp.name == "button" else "text")).lower()
+        if kind in ("submit", "image"):
+            if submit_seen: continue
+            submit_seen = True
+        elif kind in ("checkbox", "radio") and not inp.has_attr("checked"):
+            continue
+        data[name] = inp.get("value", "")
+    return data
+
+
+def parse_quiz_list(soup, page_url):
+    """Quiz activities of a course page, named the way the browser engine sees them"""
+    quizzes = []
+    for a in soup.select("li.modtype_quiz .activityname a"):
+        # Hidden "Quiz" labels are not part of the visible name
+        for hidden in a.select(".accesshide"): hidden.decompose()
+        name = ' '.join(a.get_text(" ", strip=True).split()).replace(" Quiz", "").strip()
+        link = urljoin(page_url, a.get("href", ""))
+        if name and "mod/quiz/view.php" in link:
+            quizzes.append({'name': name, 'link': link})
+
+    # Deduplicate list
+    return [dict(t) for t in {tuple(d.items()) for d in quizzes}]
+
+
+class HttpSession(QuizSession):
+    """Browserless engine: drives Moodle's startattempt/processattempt/review endpoints over a pooled requests.Session."""
+    round_pause = 0
+    timeout = 30
+
+    def init_driver(self):
+        self.close()
+        http = requests.Session()
+        # Transient gateway errors are retried by urllib3 instead of burning a whole round
+        retry = Retry(total=3, backoff_factor=1, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=retry)
+        http.mount("http://", adapter)
+        http.mount("https://", adapter)
+        http.headers["User-Agent"] = "Mozilla/5.0 (X11; Linux x86_64) KrokDailyScraper"
+        self.driver = http
+
+    def close(self):
+        if self.driver:
+            self.driver.close()
+        self.driver = None
+
+    def fetch(self, url, data=None, method="get"):
+        if method == "post":
+            r = self.driver.post(url, data=data, timeout=self.timeout)
+        else:
+            r = self.driver.get(url, params=data, timeout=self.timeout)
+        r.raise_for_status()
+        return r, BeautifulSoup(r.text, 'html.parser')
+
+    def submit_form(self, form, page_url, extra=None):
+        data = form_fields(form)
+        if extra: data.update(extra)
+        action = urljoin(page_url, form.get("action") or page_url)
+        return self.fetch(action, data, method=(form.get("method") or "get").lower())
+
+    def login(self):
+        """Logs in through the Moodle login form (logintoken included). Returns True if successful."""
+        try:
+            self.log("🔑 Logging in...")
+            r, soup = self.fetch(LOGIN_URL)
+
+            # Check if already logged in
+            if "login" not in r.url:
+                return True
+
+            token = soup.find("input", attrs={"name": "logintoken"})
+            form = token.find_parent("form") if token else soup.find("form", id="login")
+            r, soup = self.submit_form(form, r.url, {"username": USERNAME, "password": PASSWORD})
+            if "login/index.php" in r.url or soup.find(id="loginerrormessage"):
+                raise RuntimeError("still on the login page")
+            self.log("✅ Login successful.")
+            return True
+        except Exception as e:
+            self.log(f"❌ Login Failed: {e}")
+            return False
+
+    def get_all_tests(self):
+        """Same quiz scan as the browser engine, read from the course page HTML"""
+        print("🔎 Scanning for available tests...", flush=True)
+        try:
+            r, soup = self.fetch(COURSE_URL)
+            quizzes = parse_quiz_list(soup, r.url)
             print(f"📋 Found {len(quizzes)} tests to scrape.", flush=True)
             return quizzes
         except Exception as e:
             print(f"❌ Failed to get test list: {e}", flush=True)
             return []
 
+    def play_round(self, quiz_link, questions_map, round_num, known=None):
+        """Runs one start → finish → submit → review cycle. Returns (new, questions on the page), None if the round failed."""
+        r, soup = self.fetch(quiz_link)
+
+        # 1. Start/Continue (both buttons post to startattempt.php)
+        start_form = soup.select_one(".quizstartbuttondiv form")
+        if start_form:
+            r, soup = self.submit_form(start_form, r.url)
+
+        # 2. Handle Popup (preflight check form)
+        popup_btn = soup.find(id="id_submitbutton")
+        popup_form = popup_btn.find_parent("form") if popup_btn else None
+        if popup_form and "startattempt.php" in (popup_form.get("action") or ""):
+            r, soup = self.submit_form(popup_form, r.url)
+
+        # 3. Finish Attempt (summary page)
+        finish_link = soup.select_one(".endtestlink")
+        if finish_link and finish_link.get("href"):
+            r, soup = self.fetch(urljoin(r.url, finish_link["href"]))
+        elif round_num == 1:
+            self.log("   ⚠️ Could not find 'Finish attempt' link.")
+            return None
+
+        # 4. Submit (processattempt.php redirects to the review page)
+        finish_form = soup.select_one(".btn-finishattempt form")
+        if finish_form:
+            r, soup = self.submit_form(finish_form, r.url)
+
+        # 5. Expand
+        show_all = soup.find("a", href=re.compile(r"showall=1"))
+        if show_all:
+            r, soup = self.fetch(urljoin(r.url, show_all["href"]))
+
+        # 6. Parse
+        try:
+            if not soup.find("div", class_="que"):
+                raise RuntimeError("no questions on the review page")
+            return parse_review_page(r.text, questions_map, known)
+
+        except Exception as e:
+            self.log(f"   ⚠️ Parsing error: {e}")
+            return None
+
+
+class DailyKrokScraper:
+    def __init__(self, workers=WORKERS, max_concurrency=None, engine=ENGINE):
+        self.engine = engine
+        self.workers = max(1, workers)
+        self.max_concurrency = max(1, max_concurrency or MAX_CONCURRENCY or self.workers)
+        # Shared by every session: caps simultaneous attempts against the host
+        self.throttle = BoundedSemaphore(self.max_concurrency)
+        # TXT writing stays one-at-a-time across workers
+        self.save_lock = Lock()
+        self.failed = []
+        self.aliases = load_aliases(ALIASES_FILE) if INCREMENTAL else {}
+        # (question blocks, pdf_path) rendered together on a process pool once scraping is done
+        self.pdf_jobs = []
+        # Create date-based folder structure: e.g., "10-12-2025"
+        self.date_folder = datetime.now().strftime('%d-%m-%Y')
+        self.txt_folder = os.path.join(self.date_folder, "TXT")
+        self.pdf_folder = os.path.join(self.date_folder, "PDF")
+
+        self.ensure_folders()
+
+    def ensure_folders(self):
+        os.makedirs(self.txt_folder, exist_ok=True)
+        os.makedirs(self.pdf_folder, exist_ok=True)
+        print(f"📂 Folders ready: {self.date_folder}/[TXT|PDF]", flush=True)
+
+    def new_session(self, worker_id):
+        session_cls = HttpSession if self.engine == "http" else BrowserSession
+        return session_cls(worker_id, self.throttle, tagged=self.workers > 1)
+
     def run(self):
         # 1. Initial Setup
-        self.init_driver()
-        if not self.login():
+        main_session = self.new_session(1)
+        main_session.init_driver()
+        if not main_session.login():
             sys.exit(1)
 
         # 2. Get List of Tests
-        quizzes = self.get_all_tests()
+        quizzes = main_session.get_all_tests()
         if not quizzes:
             print("No quizzes found. Exiting.")
             sys.exit(1)
 
-        # 3. Iterate through every test
+        # 3. Fill the shared queue and start the worker pool
+        queue = Queue()
         for i, quiz in enumerate(quizzes):
-            print(f"\n[{i+1}/{len(quizzes)}] Processing: {quiz['name']}")
-            
-            # Retry logic for individual tests
-            max_retries = 3
-            success = False
-            
-            for attempt in range(max_retries):
-                try:
-                    # Check if session is still alive, if not, re-login
-                    try:
-                        self.driver.title 
-                    except:
-                        print("⚠️ Driver crashed. Restarting...", flush=True)
-                        self.init_driver()
-                        self.login()
-
-                    questions = self.scrape_test_logic(quiz['link'])
-                    
-                    if questions:
-                        self.save_results(quiz['name'], questions)
-                        success = True
-                        break # Exit retry loop
-                    else:
-                        print(f"⚠️ Warning: No questions found (Attempt {attempt+1}/{max_retries})", flush=True)
-                        if attempt < max_retries - 1:
-                            time.sleep(5)
-                            self.init_driver()
-                            self.login()
-                except Exception as e:
-                    print(f"❌ Error on attempt {attempt+1}: {e}", flush=True)
-                    self.init_driver()
-                    self.login()
-            
-            if not success:
-                print(f"💀 Failed to scrape '{quiz['name']}' after {max_retries} attempts. Skipping.", flush=True)
-
-        self.driver.quit()
-        print("\n🎉 All operations completed.")
+            queue.put((i, quiz))
 
-    def scrape_test_logic(self, quiz_link):
-        """The core scraping logic from your original script"""
-        questions_map = {}
-        wait = WebDriverWait(self.driver, 10)
-        
-        consecutive_empty_rounds = 0
-        round_num = 1
-        max_rounds = 4 
+        n_workers = min(self.workers, len(quizzes))
+        sessions = [main_session] + [self.new_session(n) for n in range(2, n_workers + 1)]
+        print(f"👷 Starting {n_workers} {self.engine} worker(s), max {self.max_concurrency} concurrent attempts.", flush=True)
 
-        while consecutive_empty_rounds < max_rounds:
-            self.driver.get(quiz_link)
+        threads = [Thread(target=self.worker_loop, args=(s, queue, len(quizzes)), daemon=True) for s in sessions]
+        for t in threads: t.start()
+        for t in threads: t.join()
 
-            # 1. Start/Continue
-            started = False
-            for sel in [".quizstartbuttondiv button", "//button[contains(text(), 'Continue')]", "//button[contains(text(), 'Attempt')]"]:
-                try:
-                    if "//" in sel: btn = wait.until(EC.element_to_be_clickable((By.XPATH, sel)))
-                    else: btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, sel)))
-                    self.driver.execute_script("arguments[0].click();", btn)
-                    started = True
-                    break
-                except: continue
-            
-            # 2. Handle Popup
+        # Anything left means every worker died before reaching it
+        while True:
             try:
-                popup_btn = self.driver.find_element(By.ID, "id_submitbutton")
-                if popup_btn.is_displayed(): self.driver.execute_script("arguments[0].click();", popup_btn)
-            except: pass
+                _, quiz = queue.get_nowait()
+            except Empty:
+                break
+            self.failed.append(quiz['name'])
+
+        self.render_pdfs()
+        if self.failed:
+            print(f"\n💀 {len(self.failed)} test(s) not scraped: {', '.join(sorted(self.failed))}", flush=True)
+        print("\n🎉 All operations completed.")
 
-            # 3. Finish Attempt
-            try:
-                finish_link = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".endtestlink")))
-                self.driver.execute_script("arguments[0].click();", finish_link)
-            except:
-                if len(questions_map) > 0 and round_num > 1:
-                    pass
-                else:
-                    print("   ⚠️ Could not find 'Finish attempt' link.", flush=True)
-                    consecutive_empty_rounds += 1
-                    continue
+    def worker_loop(self, session, queue, total):
+        """Takes quizzes off the shared queue until it is empty"""
+        try:
+            if not session.is_alive() and not self.restart(session):
+                session.log("💀 Worker could not log in. Leaving its tests to the other workers.")
+                return
 
-            # 4. Submit
-            for _ in range(3):
+            while True:
                 try:
-                    s_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".btn-finishattempt button")))
-                    self.driver.execute_script("arguments[0].click();", s_btn)
-                    m_btn = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, ".modal-footer button.btn-primary")))
-                    self.driver.execute_script("arguments[0].click();", m_btn)
+                    i, quiz = queue.get_nowait()
+                except Empty:
                     break
-                except: time.sleep(0.5)
+                session.log(f"\n[{i+1}/{total}] Processing: {quiz['name']}")
+                if not self.process_quiz(session, quiz):
+                    self.failed.append(quiz['name'])
+        finally:
+            session.close()
+
+    def known_fingerprints(self, name):
+        """{fingerprint: answer_signature} of the questions the master database already holds for this quiz"""
+        if not INCREMENTAL:
+            return {}
+        path = master_txt_path(name)
+        known = load_known(path)
+        # Collapsed near-duplicates are gone from the TXT but must not be collected again, whatever their answer
+        for fp in self.aliases.get(os.path.basename(path), {}):
+            known.setdefault(fp, None)
+        return known
+
+    def restart(self, session):
+        """Fresh driver and login for this worker. Returns False instead of raising, so a
+        failed restart costs the quiz an attempt rather than killing the worker thread."""
+        try:
+            session.init_driver()
+            return session.login()
+        except Exception as e:
+            session.log(f"❌ Could not restart the session: {e}")
+            session.close()
+            return False
 
-            # 5. Expand
-            try:
-                show_all = wait.until(EC.presence_of_element_located((By.XPATH, "//a[contains(@href, 'showall=1')]")))
-                self.driver.execute_script("arguments[0].click();", show_all)
-                time.sleep(2)
-            except: pass
+    def process_quiz(self, session, quiz):
+        """Retry logic for an individual test. Restarts and re-logins only touch this worker's session."""
+        known = self.known_fingerprints(quiz['name'])
+        if known:
+            session.log(f"📚 {len(known)} questions already in the master database.")
 
-            # 6. Parse
+        for attempt in range(MAX_RETRIES):
             try:
-                wait.until(EC.presence_of_element_located((By.CLASS_NAME, "que")))
-                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                questions = soup.find_all("div", class_="que")
-                
-                new_count = 0
-                for q in questions:
-                    q_text_div = q.find("div", class_="qtext")
-                    if not q_text_div: continue
-                    q_text = q_text_div.get_text(strip=True)
-                    
-                    if q_text in questions_map: continue
-
-                    correct_ans = ""
-                    feedback = q.find("div", class_="feedback")
-                    if feedback:
-                        ra = feedback.find("div", class_="rightanswer")
-                        if ra: correct_ans = ra.get_text(strip=True).replace("The correct answer is:", "").replace("Правильна відповідь:", "").strip()
-
-                    options_str = ""
-                    ans_div = q.find("div", class_="answer")
-                    if ans_div:
-                        opts = ans_div.find_all("div", recursive=False) or ans_div.find_all("div", class_="d-flex")
-                        for opt in opts:
-                            l_span = opt.find("span", class_="answernumber")
-                            if not l_span: continue
-                            letter = l_span.get_text(strip=True)
-                            t_div = opt.find("div", class_="flex-fill")
-                            txt = t_div.get_text(strip=True) if t_div else ""
-                            
-                            pre = "*" if correct_ans and txt.strip() == correct_ans else ""
-                            options_str += f"{pre}{letter} {txt}\n"
-
-                    questions_map[q_text] = f"{q_text}\n{options_str}"
-                    new_count += 1
-                
-                print(f"   Questions collected: {len(questions_map)} (+{new_count})", flush=True)
-
-                if new_count == 0: consecutive_empty_rounds += 1
-                else: consecutive_empty_rounds = 0
-
-                round_num += 1
-                time.sleep(1)
+                # Check if session is still alive, if not, re-login
+                if not session.is_alive():
+                    session.log("⚠️ Driver crashed. Restarting...")
+                    self.restart(session)
+
+                questions, rounds = session.scrape_test_logic(quiz['link'], known)
 
+                if rounds:
+                    if questions:
+                        with self.save_lock:
+                            self.save_results(quiz['name'], questions)
+                    else:
+                        session.log("✅ Nothing new since the last merge.")
+                    return True
+                else:
+                    session.log(f"⚠️ Warning: No questions found (Attempt {attempt+1}/{MAX_RETRIES})")
+                    if attempt < MAX_RETRIES - 1:
+                        time.sleep(5)
+                        self.restart(session)
             except Exception as e:
-                print(f"   ⚠️ Parsing error: {e}")
-                consecutive_empty_rounds += 1
-        
-        return questions_map
+                session.log(f"❌ Error on attempt {attempt+1}: {e}")
+                self.restart(session)
+
+        session.log(f"💀 Failed to scrape '{quiz['name']}' after {MAX_RETRIES} attempts. Skipping.")
+        return False
 
     def save_results(self, name, data):
-        # Clean name for filesystem
-        clean_name = re.sub(r'[\\/*?:"<>|]', "", name).strip()
-        # Remove newlines if they snuck in
-        clean_name = clean_name.replace('\n', ' ').replace('\r', '').strip()
-        
+        clean_name = clean_quiz_name(name)
+
         # 1. Save TXT
         txt_filename = f"{clean_name}.txt"
         txt_path = os.path.join(self.txt_folder, txt_filename)
-        
+
         with open(txt_path, "w", encoding="utf-8") as f:
             counter = 1
             for _, val in data.items():
                 f.write(f"{counter}. {val}\n")
                 counter += 1
-        
-        # 2. Save PDF
+
+        # 2. Queue the PDF
         pdf_filename = f"{clean_name}.pdf"
         pdf_path = os.path.join(self.pdf_folder, pdf_filename)
-        self.create_pdf(txt_path, pdf_path)
-
-    def create_pdf(self, txt_path, pdf_path):
-        c = canvas.Canvas(pdf_path, pagesize=A4)
-        width, height = A4
-        margin_left = 40
-        margin_right = 40
-        max_text_width = width - margin_left - margin_right
-        line_height = 14
-        font_size = 10
-        
-        y = height - 40 
-        c.setFont(FONT_NAME, font_size)
-
-        with open(txt_path, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    y -= 6
-                    continue
-
-                bg_color = None
-                text_color = colors.black
-
-                if re.match(r'^\d+\.', line):
-                    bg_color = colors.lightyellow
-                    text_color = colors.black
-                elif line.startswith('*'):
-                    line = line[1:].strip()
-                    bg_color = colors.lightgreen
-                    text_color = colors.darkgreen
-                else:
-                    text_color = colors.darkgrey
-
-                words = line.split(' ')
-                current_line = []
-                wrapped_lines = []
-                
-                for word in words:
-                    test_line = ' '.join(current_line + [word])
-                    if pdfmetrics.stringWidth(test_line, FONT_NAME, font_size) < max_text_width:
-                        current_line.append(word)
-                    else:
-                        wrapped_lines.append(' '.join(current_line))
-                        current_line = [word]
-                if current_line: wrapped_lines.append(' '.join(current_line))
-
-                for w_line in wrapped_lines:
-                    if y < 40:
-                        c.showPage()
-                        c.setFont(FONT_NAME, font_size)
-                        y = height - 40
-
-                    if bg_color:
-                        c.setFillColor(bg_color)
-                        c.rect(margin_left - 2, y - 4, max_text_width + 4, line_height, fill=1, stroke=0)
-
-                    c.setFillColor(text_color)
-                    c.drawString(margin_left, y, w_line)
-                    y -= line_height
+        self.pdf_jobs.append((list(data.values()), pdf_path))
 
-        c.save()
+    def render_pdfs(self):
+        render_all(self.pdf_jobs, colored_text=True)
+        self.pdf_jobs = []
 
 if __name__ == "__main__":
     DailyKrokScraper().run()
@@ -0,0 +1,142 @@
+import os
+import time
+import sqlite3
+from hashlib import blake2b
+from threading import Lock
+
+from telegram.error import BadRequest
+
+# --- CONFIG ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FILE_ID_DB = os.environ.get("FILE_ID_DB") or os.path.join(BASE_DIR, "Merged", "file_ids.db")
+
+# A file_id only works for the bot that uploaded it, so entries are per bot
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_ids (
+    bot_id INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    name TEXT,
+    bytes INTEGER,
+    sent_at REAL NOT NULL,
+    PRIMARY KEY (bot_id, digest)
+);
+-- Content hash of a local file as of its size/mtime, so a send does not re-read it
+CREATE TABLE IF NOT EXISTS paths (
+    path TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+-- Content hash of a URL with the validators it was served with, for conditional GETs
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    digest TEXT NOT NULL
+);
+"""
+
+def content_digest(data):
+    return blake2b(data, digest_size=16).hexdigest()
+
+def file_digest(path):
+    h = blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class FileIdCache:
+    """Content hash -> Telegram file_id of a document some bot already uploaded.
+
+    Sending the file_id again costs Telegram nothing to fetch and us nothing to upload.
+    Keyed on the content hash, so a replaced PDF misses and is uploaded afresh.
+    Shared by the event loop and worker threads; every call is short and serialized.
+    """
+    def __init__(self, path=FILE_ID_DB):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.lock = Lock()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- FILE IDS ---
+    def get(self, bot_id, digest):
+        with self.lock:
+            row = self.db.execute("SELECT file_id FROM file_ids WHERE bot_id = ? AND digest = ?", (bot_id, digest)).fetchone()
+        return row[0] if row else None
+
+    def put(self, bot_id, digest, file_id, name=None, size=None):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO file_ids (bot_id, digest, file_id, name, bytes, sent_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (bot_id, digest, file_id, name, size, time.time()),
+            )
+
+    def forget(self, bot_id, digest):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM file_ids WHERE bot_id = ? AND digest = ?", (bot_id, digest))
+
+    # --- CONTENT HASHES ---
+    def path_digest(self, path):
+        """Content hash of a local file; re-hashed only when its size or mtime changed (blocking)"""
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        with self.lock:
+            row = self.db.execute("SELECT bytes, mtime_ns, digest FROM paths WHERE path = ?", (key,)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        digest = file_digest(path)
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO paths (path, bytes, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                            (key, st.st_size, st.st_mtime_ns, digest))
+        return digest
+
+    def url_entry(self, url):
+        """(etag, last_modified, digest) the URL was last fetched with, or None"""
+        with self.lock:
+            return self.db.execute("SELECT etag, last_modified, digest FROM urls WHERE url = ?", (url,)).fetchone()
+
+    def put_url(self, url, etag, last_modified, digest):
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO urls (url, etag, last_modified, digest) VALUES (?, ?, ?, ?)",
+                            (url, etag, last_modified, digest))
+
+    def stats(self):
+        with self.lock:
+            files, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM file_ids").fetchone()
+        return {"file_ids": files, "bytes": size}
+
+async def send_cached(cache, bot_id, digest, send, load, name=None):
+    """Sends a document by its cached file_id, or uploads it and remembers the new one.
+
+    `send(document)` does the actual send_document/reply_document call and returns the
+    Message; `load()` is awaited for the bytes only when they have to be uploaded.
+    A file_id Telegram no longer accepts is dropped and the file uploaded again.
+    """
+    file_id = cache.get(bot_id, digest)
+    if file_id:
+        try:
+            return await send(file_id)
+        except BadRequest:
+            cache.forget(bot_id, digest)
+    data = await load()
+    message = await send(data)
+    if message is not None and message.document is not None:
+        cache.put(bot_id, digest, message.document.file_id, name, len(data))
+    return message
+
+if __name__ == "__main__":
+    # python file_id_cache.py — how many uploads later sends can skip
+    with FileIdCache() as cache:
+        s = cache.stats()
+        print(f"{s['file_ids']} cached file_id(s) covering {s['bytes'] / 1e6:.1f} MB of uploads")
@@ -4,54 +4,29 @@ import glob
 import json
 import shutil
 from datetime import datetime
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib import colors
+from question_store import QuestionStore
+from questions import iter_blocks
+from pdf_render import render_all, master_jobs, volume_ranges, write_volume_manifest
+import pdf_index
+import web_shards
+import near_dupes
 
 # --- CONFIG ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MERGED_TXT_DIR = os.path.join(BASE_DIR, "Merged", "TXT")
 MERGED_PDF_DIR = os.path.join(BASE_DIR, "Merged", "PDF")
 CONFIG_FILE = os.path.join(BASE_DIR, "config.json")
-
-# Relative Font Path
-FONT_FILE = os.path.join(BASE_DIR, "DejaVuSans.ttf") 
-FONT_NAME = 'DejaVuSans'
+# What each master looked like when its TXT/PDF were last written
+MANIFEST_FILE = os.path.join(BASE_DIR, "Merged", "manifest.json")
+# Fold near-duplicate questions of the touched masters into one (see near_dupes.py)
+COLLAPSE_DUPES = os.environ.get("KROK_COLLAPSE_DUPES") == "1"
 
 class MasterMerger:
     def __init__(self):
         os.makedirs(MERGED_TXT_DIR, exist_ok=True)
         os.makedirs(MERGED_PDF_DIR, exist_ok=True)
-        try:
-            if os.path.exists(FONT_FILE):
-                pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_FILE))
-        except:
-            print("⚠️ Font registration failed.")
-
-    def parse_file_to_dict(self, filepath):
-        """Parses a TXT file into {question_text: full_block}"""
-        questions = {}
-        if not os.path.exists(filepath):
-            return questions
-        try:
-            with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
-                content = f.read().replace('\r\n', '\n')
-            # Split by "Number." (e.g., "1. ", "15. ")
-            blocks = re.split(r'\n(?=\d+\.)', content)
-            for block in blocks:
-                block = block.strip()
-                if not block: continue
-                # Extract question text (first line minus the number)
-                clean_block = re.sub(r'^\d+\.\s*', '', block)
-                lines = clean_block.split('\n')
-                q_text = lines[0].strip()
-                if q_text:
-                    questions[q_text] = clean_block
-        except Exception as e:
-            print(f"Error parsing {filepath}: {e}")
-        return questions
+        self.store = QuestionStore()
+        self.manifest = self.load_manifest()
 
     def run(self):
         # 1. Find all date folders
@@ -60,10 +35,12 @@ class MasterMerger:
         
         if not date_folders:
             print("✅ No new scrape folders to merge.")
+            self.store.close()
             self.update_website_config()
             return
 
         print(f"🔄 Found {len(date_folders)} folders. Merging into Master Database...")
+        touched = {}
 
         for d_folder in sorted(date_folders):
             full_date_path = os.path.join(BASE_DIR, d_folder)
@@ -81,86 +58,97 @@ class MasterMerger:
                 
                 master_file_path = os.path.join(MERGED_TXT_DIR, filename)
 
-                # Load existing questions from Master
-                master_questions = self.parse_file_to_dict(master_file_path)
-                # Load new questions from Scrape
-                new_questions = self.parse_file_to_dict(txt_file)
-
-                # Merge (New questions overwrite/add to master)
-                initial_count = len(master_questions)
-                master_questions.update(new_questions)
-                added = len(master_questions) - initial_count
+                # Load the master TXT into the store if it is new or was edited/uploaded since the last export
+                self.store.import_txt(filename, master_file_path)
 
-                # Save updated Master TXT
-                with open(master_file_path, 'w', encoding='utf-8') as f:
-                    for i, block in enumerate(master_questions.values(), 1):
-                        f.write(f"{i}. {block}\n\n")
-                
-                # Generate PDF for this master file
-                pdf_out = os.path.join(MERGED_PDF_DIR, filename.replace(".txt", ".pdf"))
-                self.save_pdf(master_file_path, pdf_out)
-                print(f"   ✅ {filename}: {len(master_questions)} total (+{added} new)")
+                # Merge (New questions overwrite/add to master) as indexed upserts, streamed block by block
+                added = self.store.upsert_blocks(filename, iter_blocks(txt_file))
+                touched[filename] = touched.get(filename, 0) + added
 
             # 2. CLUTTER CONTROL: Delete the date folder after successful merge
+            # (its questions are already committed to the store)
             print(f"🗑️ Deleting processed folder: {d_folder}")
             shutil.rmtree(full_date_path)
 
-        # 3. Update config.json
+        if COLLAPSE_DUPES:
+            for filename in sorted(touched):
+                pairs = near_dupes.find_duplicates(list(self.store.iter_questions(filename)))
+                removed = near_dupes.collapse(self.store, filename, pairs)
+                if removed:
+                    print(f"   🧹 {filename}: {removed} near-duplicate(s) collapsed")
+
+        # 3. Write TXT/PDF once per master, only for the ones whose content changed
+        self.write_masters(touched)
+
+        # 4. Update config.json and the website's pre-parsed shards
+        self.store.close()
         self.update_website_config()
 
-    def save_pdf(self, txt_path, pdf_path):
-        c = canvas.Canvas(pdf_path, pagesize=A4)
-        width, height = A4
-        margin = 40
-        max_w = width - 2*margin
-        y = height - 40 
-        c.setFont(FONT_NAME, 10)
-        
-        with open(txt_path, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                line = line.strip()
-                if not line: 
-                    y-=6 
-                    continue
-                
-                bg = None
-                if re.match(r'^\d+\.', line): bg = colors.lightyellow
-                elif line.startswith('*'): 
-                    line = line[1:].strip()
-                    bg = colors.lightgreen
-                
-                # Wrap Text logic
-                words = line.split(' ')
-                current_line = []
-                wrapped_lines = []
-                
-                for word in words:
-                    test_line = ' '.join(current_line + [word])
-                    if pdfmetrics.stringWidth(test_line, FONT_NAME, 10) < max_w:
-                        current_line.append(word)
-                    else:
-                        wrapped_lines.append(' '.join(current_line))
-                        current_line = [word]
-                if current_line: wrapped_lines.append(' '.join(current_line))
-
-                for w_line in wrapped_lines:
-                    if y < 40:
-                        c.showPage()
-                        c.setFont(FONT_NAME, 10)
-                        y = height - 40
-                    
-                    if bg:
-                        c.setFillColor(bg)
-                        c.rect(margin-2, y-4, max_w+4, 14, fill=1, stroke=0)
-                    
-                    c.setFillColor(colors.black)
-                    c.drawString(margin, y, w_line)
-                    y -= 14
-        c.save()
+    def load_manifest(self):
+        try:
+            with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_manifest(self):
+        with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1, ensure_ascii=False, sort_keys=True)
+
+    def write_masters(self, touched):
+        """Exports the touched masters and renders their PDFs and volumes. Ones identical to the manifest entry are skipped."""
+        skipped = []
+        saved = 0.0
+        masters = {}
+        jobs = []
+        for filename in sorted(touched):
+            master_file_path = os.path.join(MERGED_TXT_DIR, filename)
+            pdf_out = os.path.join(MERGED_PDF_DIR, filename.replace(".txt", ".pdf"))
+            digest = self.store.digest(filename)
+            entry = self.manifest.get(filename, {})
+
+            volumes_done = entry.get("volumes") == len(volume_ranges(entry.get("questions", 0)))
+            if entry.get("digest") == digest and volumes_done and os.path.exists(master_file_path) and os.path.exists(pdf_out):
+                skipped.append(filename)
+                saved += entry.get("seconds", 0)
+                continue
+
+            # Master TXT is an export of the store
+            total = self.store.export_txt(filename, master_file_path)
+            master_pdf_jobs = master_jobs(filename, total, pdf_out)
+            masters[filename] = (pdf_out, digest, total, [job[1] for job in master_pdf_jobs])
+            jobs += master_pdf_jobs
+            print(f"   ✅ {filename}: {total} total (+{touched[filename]} new)")
+
+        # Generate the PDFs of the changed masters in parallel, straight from the store
+        results = render_all(jobs)
+        index = pdf_index.load_index()
+        for filename, (pdf_out, digest, total, pdf_paths) in masters.items():
+            if pdf_out in results:
+                pdf_index.record(index, pdf_out, total, results[pdf_out].pages)
+            if not all(path in results for path in pdf_paths):
+                continue
+            if write_volume_manifest(pdf_out, total, results):
+                print(f"   📚 {filename}: {len(pdf_paths) - 1} volumes")
+            seconds = sum(results[path].seconds for path in pdf_paths)
+            self.manifest[filename] = {
+                "digest": digest, "questions": total, "volumes": len(pdf_paths) - 1, "seconds": round(seconds, 2),
+            }
+
+        self.save_manifest()
+        # Question counts for multi_bot, without it having to open the PDFs
+        pdf_index.scan_all(index, [MERGED_PDF_DIR])
+        pdf_index.save_index(index)
+        if skipped:
+            print(f"⏭️ Skipped {len(skipped)} unchanged master(s), ~{saved:.1f}s of rendering saved:")
+            for filename in skipped:
+                print(f"   · {filename}")
 
     def update_website_config(self):
+        # Covers masters written above and ones uploaded straight into Merged/TXT
+        web_shards.sync_all()
         print("⚙️ Updating config.json...")
-        data = {"files": [], "passwords": {}, "active_folder": "Merged/TXT", "last_updated": ""}
+        data = {"files": [], "passwords": {}, "active_folder": "Merged/TXT", "shard_folder": "Merged/JSON", "last_updated": ""}
         
         if os.path.exists(CONFIG_FILE):
             try:
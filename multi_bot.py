@@ -5,12 +5,22 @@ import asyncio
 import sys
 import re
 import io
-from threading import Thread
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import time
+import html
+import base64
+from hashlib import blake2b
+from threading import Thread, Lock, local
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
 from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler, CallbackQueryHandler, MessageHandler, filters
 from PyPDF2 import PdfReader
+from pdf_index import load_index, index_key, count_questions, INDEX_FILE
+import question_search
+import file_id_cache
+import bot_metrics
+import bot_web
 
 # Force UTF-8
 sys.stdout.reconfigure(encoding='utf-8')
@@ -21,55 +31,70 @@ MY_ID = 7349230382
 CONFIG_FILE = "config.json"
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PAGE_SIZE = 15
+# How often (seconds) a callback may stat the PDF trees to see if the catalog is stale
+CATALOG_CHECK_SECONDS = int(os.environ.get("CATALOG_CHECK_SECONDS", "60"))
+# Threads for the blocking work handlers hand off (PDF parsing, file reads, SQLite)
+BOT_WORKERS = int(os.environ.get("BOT_WORKERS", "4"))
+# Updates handled at once; a slow one no longer holds up the rest of the queue
+BOT_CONCURRENT_UPDATES = int(os.environ.get("BOT_CONCURRENT_UPDATES", "64"))
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Cache for question counts to avoid re-parsing PDFs
+# Cache for question counts of PDFs missing from the index
 _question_count_cache = {}
+# Counts being parsed right now, so concurrent callbacks for one page share the work
+_question_count_pending = {}
+
+_blocking_pool = ThreadPoolExecutor(max_workers=BOT_WORKERS, thread_name_prefix="bot-blocking")
+
+async def run_blocking(fn, *args):
+    """Runs fn(*args) on the bot's thread pool so the event loop keeps serving other updates"""
+    return await asyncio.get_running_loop().run_in_executor(_blocking_pool, fn, *args)
 
 # --- RENDER HEALTH CHECK SERVER ---
-class HealthCheckHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200); self.end_headers()
-        self.wfile.write(b"Krok Master Bot is Alive")
-    def do_HEAD(self):
-        self.send_response(200); self.end_headers()
-
-def run_health_server():
-    port = int(os.environ.get("PORT", 10000))
-    httpd = HTTPServer(("0.0.0.0", port), HealthCheckHandler)
-    httpd.serve_forever()
+_web_runner = None
+
+async def handle_health(request):
+    return web.Response(text="Krok Master Bot is Alive")
+
+def queue_depth(app):
+    """Updates fetched but not yet picked up, and handlers still running"""
+    return {
+        "updates_waiting": app.update_queue.qsize(),
+        "handlers_running": sum(bot_metrics.STATS.in_flight.values()),
+    }
+
+def health_routes(app):
+    """/metrics, and the health text on every other path (Render may be set to check any of them)"""
+    return [
+        bot_web.metrics_route(lambda: queue_depth(app)),
+        web.get("/{tail:.*}", handle_health),
+    ]
+
+async def start_health_server(app):
+    """post_init: health check and /metrics on the bot's own loop"""
+    global _web_runner
+    _web_runner = await bot_web.start_server(health_routes(app))
+
+async def stop_health_server(app):
+    if _web_runner:
+        await _web_runner.cleanup()
 
 # --- QUESTION COUNTING ---
 def extract_question_count(pdf_path):
     """Extract the highest question number from a PDF file."""
+    # Question counts precomputed by merge_all.py / pdf_index.py
+    entry = get_catalog().pdf_index.get(index_key(pdf_path))
+    if entry:
+        return entry["questions"]
+
     # Check cache first
     if pdf_path in _question_count_cache:
         return _question_count_cache[pdf_path]
     
     try:
-        reader = PdfReader(pdf_path)
-        max_question = 0
-        pages_to_check = min(10, len(reader.pages))  # Check last 10 pages
-        
-        for i in range(len(reader.pages) - 1, max(0, len(reader.pages) - pages_to_check - 1), -1):
-            page = reader.pages[i]
-            text = page.extract_text()
-            
-            # Find all question numbers (e.g., "468.", "469.", "470.")
-            matches = re.findall(r'(?:^|\s)(\d+)\.', text, re.MULTILINE)
-            
-            if matches:
-                numbers = [int(m) for m in matches]
-                page_max = max(numbers)
-                if page_max > max_question:
-                    max_question = page_max
-                
-                if max_question > 0:
-                    break
-        
-        result = max_question if max_question > 0 else None
+        result = count_questions(PdfReader(pdf_path))
         _question_count_cache[pdf_path] = result
         return result
         
@@ -77,6 +102,28 @@ def extract_question_count(pdf_path):
         logger.error(f"Error extracting question count from {pdf_path}: {e}")
         return None
 
+async def question_counts(paths):
+    """{path: count} for a page of files. Indexed and cached counts come straight back;
+    the rest are parsed on the thread pool side by side."""
+    catalog = await current_catalog()
+    counts = {}
+    loop = asyncio.get_running_loop()
+    for path in paths:
+        entry = catalog.pdf_index.get(index_key(path))
+        if entry:
+            counts[path] = entry["questions"]
+        elif path in _question_count_cache:
+            counts[path] = _question_count_cache[path]
+        elif path not in _question_count_pending:
+            future = loop.run_in_executor(_blocking_pool, extract_question_count, path)
+            future.add_done_callback(lambda _, path=path: _question_count_pending.pop(path, None))
+            _question_count_pending[path] = future
+    missing = [p for p in paths if p not in counts]
+    if missing:
+        results = await asyncio.gather(*(asyncio.shield(_question_count_pending[p]) for p in missing))
+        counts.update(zip(missing, results))
+    return counts
+
 def format_question_count(count):
     """Format question count for display."""
     if count is None:
@@ -136,6 +183,159 @@ def get_master_list():
                     master_list.append({"name": clean_title(f"{level} {p[2] if et != '📘 ЄДКІ' else p[3]}"), "source": "💾 Старше ЦТ", "path": rel, "exam_type": et, "level": level})
     return master_list
 
+# --- CATALOG ---
+def short_id(key):
+    """8-char id that stays the same as long as the key does (callback_data is capped at 64 bytes)"""
+    return base64.urlsafe_b64encode(blake2b(key.encode('utf-8'), digest_size=6).digest()).decode()
+
+class Catalog:
+    """get_master_list() with the category → source → level → files indexes prebuilt.
+
+    Files and menu nodes get ids from their path/names, so callback_data resolves with
+    one dict lookup and keeps pointing at the same thing after a reload.
+    """
+    def __init__(self, items, signature):
+        self.items = items
+        self.signature = signature
+        self.pdf_index = load_index()
+        self.tree = {}
+        for i in items:
+            self.tree.setdefault(i['exam_type'], {}).setdefault(i['source'], {}).setdefault(i['level'], []).append(i)
+        self.cats = sorted(self.tree)
+        self.srcs = {cat: sorted(srcs) for cat, srcs in self.tree.items()}
+        self.lvls = {(cat, src): sorted(lvls) for cat, srcs in self.tree.items() for src, lvls in srcs.items()}
+
+        # id -> (cat,) / (cat, src) / (cat, src, lvl), and back
+        self.nodes = {}
+        self.node_ids = {}
+        for cat, srcs in self.tree.items():
+            for node in [(cat,)] + [(cat, src) for src in srcs] + [(cat, src, lvl) for src in srcs for lvl in srcs[src]]:
+                node_id = short_id('|'.join(node))
+                self.nodes[node_id] = node
+                self.node_ids[node] = node_id
+        # id -> file entry, and where it sits in its level's list (for the back button)
+        self.by_id = {}
+        self.position = {}
+        for levels in (lvls for srcs in self.tree.values() for lvls in srcs.values()):
+            for files in levels.values():
+                for pos, i in enumerate(files):
+                    i['id'] = short_id(index_key(i['path']))
+                    self.by_id[i['id']] = i
+                    self.position[i['id']] = pos
+
+    def sources(self, cat):
+        return self.srcs[cat]
+
+    def levels(self, cat, src):
+        return self.lvls[(cat, src)]
+
+    def files(self, cat, src, lvl):
+        return self.tree[cat][src][lvl]
+
+    def node_id(self, *node):
+        return self.node_ids[node]
+
+    def node(self, node_id):
+        return self.nodes.get(node_id)
+
+    def item(self, item_id):
+        return self.by_id.get(item_id)
+
+def pdf_stamp(root):
+    """(count, newest mtime, total size) of the PDFs under root: moves when one is added, removed or rewritten"""
+    count = newest = size = 0
+    for dirpath, dirs, files in os.walk(root):
+        for f in files:
+            if f.lower().endswith(".pdf"):
+                try: st = os.stat(os.path.join(dirpath, f))
+                except OSError: continue
+                count += 1
+                newest = max(newest, st.st_mtime_ns)
+                size += st.st_size
+    return count, newest, size
+
+def catalog_signature():
+    """Changes whenever a PDF in one of get_master_list()'s trees is added, removed or rewritten, or pdf_index.json is refreshed"""
+    sig = [pdf_stamp(os.path.join(BASE_DIR, root)) for root in ("Merged/PDF", "Звичайні Базі", "Старше ЦТ")]
+    try: sig.append(os.stat(INDEX_FILE).st_mtime_ns)
+    except OSError: sig.append(None)
+    return tuple(sig)
+
+_catalog = None
+_catalog_checked = 0.0
+_catalog_lock = Lock()
+
+def get_catalog():
+    """Current catalog. Rebuilt off a stat check at most every CATALOG_CHECK_SECONDS and swapped in whole."""
+    global _catalog, _catalog_checked
+    now = time.monotonic()
+    if _catalog is not None and now - _catalog_checked < CATALOG_CHECK_SECONDS:
+        return _catalog
+    with _catalog_lock:
+        _catalog_checked = now
+        sig = catalog_signature()
+        if _catalog is None or _catalog.signature != sig:
+            _catalog = Catalog(get_master_list(), sig)
+            logger.info(f"Catalog built: {len(_catalog.items)} files")
+    return _catalog
+
+async def current_catalog():
+    """get_catalog() for handlers: a due stat check or rebuild runs on the thread pool"""
+    if _catalog is not None and time.monotonic() - _catalog_checked < CATALOG_CHECK_SECONDS:
+        return _catalog
+    return await run_blocking(get_catalog)
+
+# --- QUESTION SEARCH ---
+# QuestionSearch is one per thread; searches run on the pool, so each worker opens its own
+_searchers = local()
+_search_generation = 0
+
+def get_searcher():
+    """This thread's handle on Merged/search.db, opened on first use; None while it is still being built"""
+    if getattr(_searchers, "generation", None) != _search_generation:
+        _searchers.searcher = None
+        _searchers.generation = _search_generation
+    if _searchers.searcher is None and os.path.exists(question_search.SEARCH_DB):
+        _searchers.searcher = question_search.QuestionSearch()
+    return _searchers.searcher
+
+def search_questions(text):
+    """Hits for text, or None while the index is still being built (runs on the pool)"""
+    searcher = get_searcher()
+    return None if searcher is None else searcher.search(text)
+
+def build_search_index():
+    """Runs at startup in a thread: (re)builds the index if the TXT trees changed since the last build"""
+    global _search_generation
+    if question_search.needs_build():
+        question_search.build_index()
+        # Handles opened on the old file are dropped on their thread's next search
+        _search_generation += 1
+
+def format_search_hits(hits, text):
+    msg = f"❓ Питання за запитом \"{html.escape(text)}\":\n\n"
+    for n, hit in enumerate(hits, 1):
+        question = hit.question if len(hit.question) <= 300 else hit.question[:300] + "…"
+        entry = f"<b>{n}.</b> {html.escape(question)}\n✅ <b>{html.escape(hit.answer or '—')}</b>\n<i>└ {html.escape(hit.file)}</i>\n\n"
+        # Whole hits only: cutting the HTML mid-tag would make Telegram reject the message
+        if len(msg) + len(entry) > 4000: break
+        msg += entry
+    return msg
+
+# --- SENT FILES ---
+_file_ids = None
+
+def get_file_ids():
+    """file_id cache for GPDF, opened on first use"""
+    global _file_ids
+    if _file_ids is None:
+        _file_ids = file_id_cache.FileIdCache()
+    return _file_ids
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
 def load_passwords():
     if os.path.exists(CONFIG_FILE):
         with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
@@ -144,67 +344,72 @@ def load_passwords():
 
 # --- HANDLERS ---
 
+@bot_metrics.timed("start")
 async def start(u: Update, c: ContextTypes.DEFAULT_TYPE):
     if u.effective_user.id != MY_ID: return
-    master = get_master_list()
-    cats = sorted(list(set(i['exam_type'] for i in master)))
-    kb = [[InlineKeyboardButton(cat, callback_data=f"C|{i}")] for i, cat in enumerate(cats)]
+    catalog = await current_catalog()
+    kb = [[InlineKeyboardButton(cat, callback_data=f"C|{catalog.node_id(cat)}")] for cat in catalog.cats]
     kb.append([InlineKeyboardButton("🔍 Пошук по базі", callback_data="S")])
+    kb.append([InlineKeyboardButton("❓ Пошук питання", callback_data="QS")])
     kb.append([InlineKeyboardButton("⭐ Обране", callback_data="FAV")])
     text = "👋 <b>Krok Master Bot</b>\nОберіть категорію:"
     if u.callback_query: await u.callback_query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(kb), parse_mode=ParseMode.HTML)
     else: await u.message.reply_text(text, reply_markup=InlineKeyboardMarkup(kb), parse_mode=ParseMode.HTML)
 
+@bot_metrics.timed(lambda u, c: "callback:" + u.callback_query.data.split("|")[0])
 async def handle_callback(u: Update, c: ContextTypes.DEFAULT_TYPE):
-    query = u.callback_query; await query.answer()
+    query = u.callback_query
     data = query.data.split("|"); act = data[0]
-    master = get_master_list(); cats = sorted(list(set(i['exam_type'] for i in master)))
+    catalog = await current_catalog()
+
+    # Ids survive reloads; one that is gone means the file/section itself was removed.
+    # A query can only be answered once, so the alert goes in that single answer.
+    if (act in ("C", "M", "V") and catalog.node(data[1]) is None) or (act == "F" and catalog.item(data[1]) is None):
+        await query.answer("Цей розділ більше не існує", show_alert=True)
+        await start(u, c)
+        return
+    await query.answer()
 
     if act == "root": await start(u, c)
     elif act == "C": # Sources
-        cat = cats[int(data[1])]
-        srcs = sorted(list(set(i['source'] for i in master if i['exam_type'] == cat)))
-        kb = [[InlineKeyboardButton(s, callback_data=f"M|{data[1]}|{i}")] for i, s in enumerate(srcs)]
+        (cat,) = catalog.node(data[1])
+        srcs = catalog.sources(cat)
+        kb = [[InlineKeyboardButton(s, callback_data=f"M|{catalog.node_id(cat, s)}")] for s in srcs]
         kb.append([InlineKeyboardButton("🔙 Назад", callback_data="root")])
         await query.edit_message_text(f"🌐 <b>{cat}</b>\n\nОберіть джерело:", reply_markup=InlineKeyboardMarkup(kb), parse_mode=ParseMode.HTML)
     elif act == "M": # Levels
-        cat = cats[int(data[1])]; srcs = sorted(list(set(i['source'] for i in master if i['exam_type'] == cat)))
-        src = srcs[int(data[2])]; lvls = sorted(list(set(i['level'] for i in master if i['exam_type'] == cat and i['source'] == src)))
-        kb = [[InlineKeyboardButton(lvl, callback_data=f"V|{data[1]}|{data[2]}|{i}|0")] for i, lvl in enumerate(lvls)]
-        kb.append([InlineKeyboardButton("🔙 Назад", callback_data=f"C|{data[1]}")])
+        cat, src = catalog.node(data[1]); lvls = catalog.levels(cat, src)
+        kb = [[InlineKeyboardButton(lvl, callback_data=f"V|{catalog.node_id(cat, src, lvl)}|0")] for lvl in lvls]
+        kb.append([InlineKeyboardButton("🔙 Назад", callback_data=f"C|{catalog.node_id(cat)}")])
         breadcrumb = f"🧭 {cat} → {src}"
         await query.edit_message_text(f"{breadcrumb}\n\nОберіть рівень:", reply_markup=InlineKeyboardMarkup(kb), parse_mode=ParseMode.HTML)
     elif act == "V": # Files (Paginated)
-        cat_idx, src_idx, lvl_idx, page = int(data[1]), int(data[2]), int(data[3]), int(data[4])
-        cat = cats[cat_idx]; srcs = sorted(list(set(i['source'] for i in master if i['exam_type'] == cat)))
-        src = srcs[src_idx]; lvls = sorted(list(set(i['level'] for i in master if i['exam_type'] == cat and i['source'] == src)))
-        lvl = lvls[lvl_idx]
-        files = [i for i in master if i['exam_type'] == cat and i['source'] == src and i['level'] == lvl]
+        lvl_id, page = data[1], int(data[2])
+        cat, src, lvl = catalog.node(lvl_id)
+        files = catalog.files(cat, src, lvl)
+        page = min(page, (len(files)-1)//PAGE_SIZE)
         start_idx = page * PAGE_SIZE; end_idx = start_idx + PAGE_SIZE; page_files = files[start_idx:end_idx]
         breadcrumb = f"🧭 {cat} → {src} → {lvl}"
         msg = f"{breadcrumb}\n\n📖 <b>{lvl}</b> (Сторінка {page+1} з {(len(files)-1)//PAGE_SIZE + 1})\n\n"
         kb = []; row = []
+        counts = await question_counts([f['path'] for f in page_files])
         for i, f in enumerate(page_files):
             num = start_idx + i + 1
-            q_count = extract_question_count(f['path'])
+            q_count = counts[f['path']]
             q_text = format_question_count(q_count)
             msg += f"<b>{num}.</b> {f['name']}{q_text}\n"
-            row.append(InlineKeyboardButton(str(num), callback_data=f"F|{cat_idx}|{src_idx}|{lvl_idx}|{start_idx+i}"))
+            row.append(InlineKeyboardButton(str(num), callback_data=f"F|{f['id']}"))
             if len(row) == 5: kb.append(row); row = []
         if row: kb.append(row)
         nav_row = []
-        if page > 0: nav_row.append(InlineKeyboardButton("⬅️ Попередня", callback_data=f"V|{cat_idx}|{src_idx}|{lvl_idx}|{page-1}"))
-        if end_idx < len(files): nav_row.append(InlineKeyboardButton("Наступна ➡️", callback_data=f"V|{cat_idx}|{src_idx}|{lvl_idx}|{page+1}"))
+        if page > 0: nav_row.append(InlineKeyboardButton("⬅️ Попередня", callback_data=f"V|{lvl_id}|{page-1}"))
+        if end_idx < len(files): nav_row.append(InlineKeyboardButton("Наступна ➡️", callback_data=f"V|{lvl_id}|{page+1}"))
         if nav_row: kb.append(nav_row)
-        kb.append([InlineKeyboardButton("🔙 Назад", callback_data=f"M|{cat_idx}|{src_idx}")])
+        kb.append([InlineKeyboardButton("🔙 Назад", callback_data=f"M|{catalog.node_id(cat, src)}")])
         await query.edit_message_text(msg, reply_markup=InlineKeyboardMarkup(kb), parse_mode=ParseMode.HTML)
     elif act == "F":
-        cat_idx, src_idx, lvl_idx, f_idx = int(data[1]), int(data[2]), int(data[3]), int(data[4])
-        cat = cats[cat_idx]; srcs = sorted(list(set(i['source'] for i in master if i['exam_type'] == cat)))
-        src = srcs[src_idx]; lvls = sorted(list(set(i['level'] for i in master if i['exam_type'] == cat and i['source'] == src)))
-        lvl = lvls[lvl_idx]
-        files = [i for i in master if i['exam_type'] == cat and i['source'] == src and i['level'] == lvl]
-        item = files[f_idx]; c.user_data['last_item'] = item
+        item = catalog.item(data[1]); c.user_data['last_item'] = item
+        cat, src, lvl = item['exam_type'], item['source'], item['level']
         
         # Add to recent files
         if 'recent_files' not in c.user_data: c.user_data['recent_files'] = []
@@ -220,7 +425,7 @@ async def handle_callback(u: Update, c: ContextTypes.DEFAULT_TYPE):
         fav_btn_text = "💔 Видалити з обраного" if is_fav else "⭐ Додати в обране"
         
         # Get question count
-        q_count = extract_question_count(item['path'])
+        q_count = (await question_counts([item['path']]))[item['path']]
         q_text = f"\n<i>Кількість питань:</i> {q_count}" if q_count else ""
         
         breadcrumb = f"🧭 {cat} → {src} → {lvl}"
@@ -231,16 +436,23 @@ async def handle_callback(u: Update, c: ContextTypes.DEFAULT_TYPE):
             [InlineKeyboardButton("📥 Отримати PDF", callback_data="GPDF")],
             [InlineKeyboardButton("🔑 Отримати пароль", callback_data="GPW")],
             [InlineKeyboardButton(fav_btn_text, callback_data="TOGGLEFAV")],
-            [InlineKeyboardButton("🔙 Назад", callback_data=f"V|{cat_idx}|{src_idx}|{lvl_idx}|{f_idx // PAGE_SIZE}")]
+            [InlineKeyboardButton("🔙 Назад", callback_data=f"V|{catalog.node_id(cat, src, lvl)}|{catalog.position[item['id']] // PAGE_SIZE}")]
         ]
         await query.edit_message_text(msg, reply_markup=InlineKeyboardMarkup(kb), parse_mode=ParseMode.HTML)
     elif act == "GPDF":
         item = c.user_data.get('last_item')
-        if item: await query.message.reply_document(document=open(item['path'], 'rb'), caption=f"📄 {item['name']}")
+        if item:
+            # A PDF sent before goes out by its file_id: no read, no upload
+            file_ids = get_file_ids(); filename = os.path.basename(item['path'])
+            digest = await run_blocking(file_ids.path_digest, item['path'])
+            await file_id_cache.send_cached(
+                file_ids, c.bot.id, digest,
+                lambda document: query.message.reply_document(document=document, filename=filename, caption=f"📄 {item['name']}"),
+                lambda: run_blocking(read_bytes, item['path']), filename)
     elif act == "GPW":
         item = c.user_data.get('last_item')
         if item:
-            pws = load_passwords(); raw_name = os.path.basename(item['path']).replace(".pdf", "")
+            pws = await run_blocking(load_passwords); raw_name = os.path.basename(item['path']).replace(".pdf", "")
             p = pws.get(raw_name + ".txt") or pws.get(raw_name)
             if p: await query.message.reply_text(f"🔑 Пароль для <b>{item['name']}</b>:\n\n<code>{p}</code>", parse_mode=ParseMode.HTML)
             else: await query.message.reply_text("Цей іспит не в форматі Quiz, ви можете додати його через адмін-панель.")
@@ -262,11 +474,13 @@ async def handle_callback(u: Update, c: ContextTypes.DEFAULT_TYPE):
             kb = [[InlineKeyboardButton("🔙 Головне меню", callback_data="root")]]
             await query.edit_message_text("⭐ У вас поки немає обраних файлів", reply_markup=InlineKeyboardMarkup(kb), parse_mode=ParseMode.HTML)
         else:
-            fav_items = [i for i in master if i['path'] in favs]
+            fav_set = set(favs)
+            fav_items = [i for i in catalog.items if i['path'] in fav_set]
             msg = "⭐ <b>Обране</b>\n\n"; kb = []; row = []
+            counts = await question_counts([f['path'] for f in fav_items])
             for i, f in enumerate(fav_items):
                 num = i + 1
-                q_count = extract_question_count(f['path'])
+                q_count = counts[f['path']]
                 q_text = format_question_count(q_count)
                 msg += f"<b>{num}.</b> {f['name']}{q_text} <i>[{f['source']}]</i>\n"
                 row.append(InlineKeyboardButton(str(num), callback_data=f"FAVF|{i}"))
@@ -286,7 +500,7 @@ async def handle_callback(u: Update, c: ContextTypes.DEFAULT_TYPE):
             is_fav = item['path'] in favs
             fav_btn_text = "💔 Видалити з обраного" if is_fav else "⭐ Додати в обране"
             
-            q_count = extract_question_count(item['path'])
+            q_count = (await question_counts([item['path']]))[item['path']]
             q_text = f"\n<i>Кількість питань:</i> {q_count}" if q_count else ""
             
             msg = f"📄 <b>{item['name']}</b>\n\n"
@@ -303,10 +517,14 @@ async def handle_callback(u: Update, c: ContextTypes.DEFAULT_TYPE):
         c.user_data['state'] = 'searching'
         kb = [[InlineKeyboardButton("🔙 Скасувати", callback_data="root")]]
         await query.edit_message_text("🔍 Введіть ключове слово для пошуку (наприклад, 'Анатомія'):", reply_markup=InlineKeyboardMarkup(kb))
+    elif act == "QS":
+        c.user_data['state'] = 'question_search'
+        kb = [[InlineKeyboardButton("🔙 Скасувати", callback_data="root")]]
+        await query.edit_message_text("❓ Введіть слова з питання або відповіді (наприклад, 'інфаркт міокарда'):", reply_markup=InlineKeyboardMarkup(kb))
     elif act == "SSRC":
         keyword = c.user_data.get('search_keyword', '')
         src_filter = data[1] if data[1] != "ALL" else None
-        master = get_master_list()
+        master = catalog.items
         
         if src_filter:
             res = [i for i in master if keyword in i['name'].lower() and i['source'] == src_filter]
@@ -324,9 +542,10 @@ async def handle_callback(u: Update, c: ContextTypes.DEFAULT_TYPE):
         msg += f"\n<i>Знайдено: {len(res[:50])} файлів</i>\n\n"
         
         kb = []; row = []
+        counts = await question_counts([f['path'] for f in res[:50]])
         for i, f in enumerate(res[:50]):
             num = i + 1
-            q_count = extract_question_count(f['path'])
+            q_count = counts[f['path']]
             q_text = format_question_count(q_count)
             msg += f"<b>{num}.</b> {f['name']}{q_text}\n    <i>└ {f['source']}</i>\n"
             row.append(InlineKeyboardButton(str(num), callback_data=f"SF|{i}"))
@@ -336,9 +555,31 @@ async def handle_callback(u: Update, c: ContextTypes.DEFAULT_TYPE):
         kb.append([InlineKeyboardButton("🔙 Головне меню", callback_data="root")])
         await query.edit_message_text(msg, reply_markup=InlineKeyboardMarkup(kb), parse_mode=ParseMode.HTML)
 
+@bot_metrics.timed("question_search")
+async def handle_question_search(u: Update, c: ContextTypes.DEFAULT_TYPE):
+    text = u.message.text
+    kb = InlineKeyboardMarkup([
+        [InlineKeyboardButton("🔄 Новий пошук", callback_data="QS")],
+        [InlineKeyboardButton("🔙 Головне меню", callback_data="root")],
+    ])
+    c.user_data['state'] = None
+    hits = await run_blocking(search_questions, text)
+    if hits is None:
+        await u.message.reply_text("⏳ Пошуковий індекс ще будується, спробуйте за хвилину.", reply_markup=kb)
+        return
+    if not hits:
+        await u.message.reply_text("❌ Нічого не знайдено. Спробуйте інші слова.", reply_markup=kb)
+        return
+    await u.message.reply_text(format_search_hits(hits, text), reply_markup=kb, parse_mode=ParseMode.HTML)
+
+@bot_metrics.timed("message")
 async def handle_message(u: Update, c: ContextTypes.DEFAULT_TYPE):
-    if u.effective_user.id != MY_ID or c.user_data.get('state') != 'searching': return
-    keyword = u.message.text.lower(); master = get_master_list()
+    if u.effective_user.id != MY_ID: return
+    if c.user_data.get('state') == 'question_search':
+        await handle_question_search(u, c)
+        return
+    if c.user_data.get('state') != 'searching': return
+    keyword = u.message.text.lower(); master = (await current_catalog()).items
     c.user_data['search_keyword'] = keyword
     
     res = [i for i in master if keyword in i['name'].lower()]
@@ -365,6 +606,7 @@ async def handle_message(u: Update, c: ContextTypes.DEFAULT_TYPE):
     await u.message.reply_text(msg, reply_markup=InlineKeyboardMarkup(kb), parse_mode=ParseMode.HTML)
     c.user_data['state'] = None
 
+@bot_metrics.timed("callback:SF")
 async def handle_search_click(u: Update, c: ContextTypes.DEFAULT_TYPE):
     query = u.callback_query; await query.answer()
     idx = int(query.data.split("|")[1]); item = c.user_data.get('search_results')[idx]
@@ -381,7 +623,7 @@ async def handle_search_click(u: Update, c: ContextTypes.DEFAULT_TYPE):
     is_fav = item['path'] in favs
     fav_btn_text = "💔 Видалити з обраного" if is_fav else "⭐ Додати в обране"
     
-    q_count = extract_question_count(item['path'])
+    q_count = (await question_counts([item['path']]))[item['path']]
     q_text = f"\n<i>Кількість питань:</i> {q_count}" if q_count else ""
     
     msg = f"📄 <b>{item['name']}</b>\n\n"
@@ -396,8 +638,9 @@ async def handle_search_click(u: Update, c: ContextTypes.DEFAULT_TYPE):
     await query.edit_message_text(msg, reply_markup=InlineKeyboardMarkup(kb), parse_mode=ParseMode.HTML)
 
 if __name__ == '__main__':
-    Thread(target=run_health_server, daemon=True).start()
-    app = ApplicationBuilder().token(TOKEN).build()
+    Thread(target=build_search_index, daemon=True).start()
+    app = (ApplicationBuilder().token(TOKEN).concurrent_updates(BOT_CONCURRENT_UPDATES)
+           .post_init(start_health_server).post_shutdown(stop_health_server).build())
     app.add_handler(CommandHandler('start', start))
     app.add_handler(CallbackQueryHandler(handle_search_click, pattern=r"^SF\|"))
     app.add_handler(CallbackQueryHandler(handle_callback))
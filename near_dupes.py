@@ -0,0 +1,195 @@
+import os
+import re
+import sys
+import time
+import unicodedata
+from hashlib import blake2b
+from collections import defaultdict, namedtuple
+
+from questions import parse_options
+
+# --- CONFIG ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_FILE = os.path.join(BASE_DIR, "Merged", "near_duplicates.txt")
+# Jaccard similarity of the shingle sets above which two questions are the same question
+THRESHOLD = float(os.environ.get("KROK_DUPE_THRESHOLD", 0.8))
+SHINGLE = 3
+# 64 one-permutation MinHash bins, 16 LSH bands of 4: pairs at ~0.5 Jaccard and up become candidates
+BINS = 64
+BANDS = 16
+ROWS = BINS // BANDS
+
+# Lowercase Latin letters drawn exactly like Cyrillic ones. Scraped Ukrainian text mixes
+# them ("хворий" with a Latin x), so both alphabets fold to the Cyrillic form before comparing.
+# Text is casefolded first, so only real lowercase look-alikes belong here (not t/h/b/m/k).
+HOMOGLYPHS = str.maketrans("aceiopxy", "асеіорху")
+NON_WORD = re.compile(r"[^\w\s]+")
+# Words that flip the meaning of an otherwise identical question
+NEGATIONS = {"не", "крім", "not", "except", "false", "incorrect", "неправильне", "невірне"}
+
+DuplicatePair = namedtuple("DuplicatePair", ["keep", "drop", "similarity", "safe"])
+
+def fold_text(text):
+    """Case, punctuation and apostrophes folded away; the words still in their own alphabet"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return NON_WORD.sub(" ", text.replace("ʼ", "").replace("’", "").replace("'", "").replace("`", ""))
+
+def match_text(text):
+    """Text as the duplicate finder sees it: fold_text plus homoglyphs folded to Cyrillic"""
+    return " ".join(fold_text(text).translate(HOMOGLYPHS).split())
+
+def negations(body):
+    """Negation words of a block, looked up before homoglyph folding turns "not" into "nоt" """
+    return NEGATIONS & set(fold_text(body).split())
+
+def block_key(body):
+    """Question line plus its options in sorted order, so reordered option lists still match"""
+    options = parse_options(body)
+    parts = [match_text(body.split("\n")[0])] + sorted(match_text(text) for _, text, _ in options)
+    return " | ".join(parts)
+
+def correct_key(body):
+    return frozenset(match_text(text) for _, text, correct in parse_options(body) if correct)
+
+def shingles(key):
+    """Word 3-grams. Punctuation, case and homoglyphs are already folded, so a one-word edit costs 3 of them."""
+    words = key.split()
+    return {" ".join(words[i:i + SHINGLE]) for i in range(max(1, len(words) - SHINGLE + 1))}
+
+def shingle_hash(shingle):
+    """Stable 64-bit hash (the builtin hash() of a str changes with every process)"""
+    return int.from_bytes(blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+
+def signature(shingle_set):
+    """One-permutation MinHash: each shingle hash lands in one bin, a bin keeps its smallest value.
+    Empty bins borrow the next filled one (densification) so every band is usable."""
+    # Descending order: the smallest value of a bin is written last and wins
+    smallest = {h % BINS: h // BINS for h in sorted(map(shingle_hash, shingle_set), reverse=True)}
+    bins = [smallest.get(i) for i in range(BINS)]
+    first = min(smallest)
+    borrowed = (bins[first], first + BINS)
+    for i in range(BINS - 1, -1, -1):
+        if bins[i] is None:
+            bins[i] = (borrowed[0], borrowed[1] - i)
+        else:
+            borrowed = (bins[i], i)
+    return bins
+
+def find_duplicates(questions, threshold=THRESHOLD):
+    """questions: (id, body) pairs in master order. Returns DuplicatePairs, the earlier question as keep.
+
+    A pair is safe to collapse when the correct answers and the negation words are the
+    same; otherwise it only goes into the report ("which is" vs "which is NOT").
+    """
+    keys = [block_key(body) for _, body in questions]
+    sets = [shingles(key) for key in keys]
+
+    buckets = defaultdict(list)
+    for n, hashes in enumerate(sets):
+        sig = signature(hashes)
+        for band in range(BANDS):
+            buckets[(band, tuple(sig[band * ROWS:(band + 1) * ROWS]))].append(n)
+
+    candidates = set()
+    for members in buckets.values():
+        if len(members) < 2: continue
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                candidates.add((members[i], members[j]))
+
+    pairs = []
+    for i, j in sorted(candidates):
+        a, b = sets[i], sets[j]
+        similarity = len(a & b) / len(a | b)
+        if similarity < threshold: continue
+        body_i, body_j = questions[i][1], questions[j][1]
+        safe = correct_key(body_i) == correct_key(body_j) and negations(body_i) == negations(body_j)
+        pairs.append(DuplicatePair(questions[i][0], questions[j][0], similarity, safe))
+    return pairs
+
+def clusters(pairs):
+    """Groups of question ids joined by safe pairs (union-find). The smallest id of a group leads it."""
+    parent = {}
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    for pair in pairs:
+        if not pair.safe: continue
+        a, b = find(pair.keep), find(pair.drop)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+    groups = defaultdict(list)
+    for x in parent:
+        groups[find(x)].append(x)
+    return [sorted(g) for g in groups.values()]
+
+def scan_store(store, names=None, threshold=THRESHOLD):
+    """{master: [DuplicatePair]} for the masters that have near-duplicates"""
+    found = {}
+    for name in names or store.quiz_names():
+        pairs = find_duplicates(list(store.iter_questions(name)), threshold)
+        if pairs:
+            found[name] = pairs
+    return found
+
+def collapse(store, name, pairs):
+    """Folds every safe cluster into its first question. Returns how many questions were removed."""
+    removed = 0
+    for group in clusters(pairs):
+        store.merge_questions(name, group[0], group[1:])
+        removed += len(group) - 1
+    if removed:
+        # The database is not committed; aliases.json is, and the scraper skips its fingerprints
+        store.save_aliases(name)
+    return removed
+
+def write_report(store, found, path=REPORT_FILE):
+    bodies = {}
+    for name in found:
+        bodies.update(store.iter_questions(name))
+    with open(path, "w", encoding="utf-8") as f:
+        for name, pairs in sorted(found.items()):
+            safe = sum(p.safe for p in pairs)
+            f.write(f"=== {name}: {len(pairs)} pair(s), {safe} safe to collapse ===\n\n")
+            for pair in pairs:
+                label = "COLLAPSE" if pair.safe else "REVIEW (different answer or negation)"
+                f.write(f"[{label}] similarity {pair.similarity:.2f}\n")
+                f.write(f"  keep: {bodies[pair.keep]}\n".replace("\n", "\n        ").rstrip() + "\n")
+                f.write(f"  drop: {bodies[pair.drop]}\n".replace("\n", "\n        ").rstrip() + "\n\n")
+
+if __name__ == "__main__":
+    # python near_dupes.py [report|collapse] [master.txt ...]
+    from merge_all import MasterMerger, MERGED_TXT_DIR
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "report"
+    if cmd not in ("report", "collapse"):
+        sys.exit(f"Unknown command: {cmd} (use report or collapse)")
+
+    merger = MasterMerger()
+    store = merger.store
+    names = sys.argv[2:] or [f for f in sorted(os.listdir(MERGED_TXT_DIR)) if f.endswith(".txt")]
+    for name in names:
+        store.import_txt(name, os.path.join(MERGED_TXT_DIR, name))
+
+    started = time.perf_counter()
+    found = scan_store(store, names)
+    total = sum(store.question_count(name) for name in names)
+    pairs = sum(len(p) for p in found.values())
+    print(f"🔁 {total} questions in {len(names)} master(s) scanned in {time.perf_counter() - started:.1f}s: "
+          f"{pairs} near-duplicate pair(s) in {len(found)} master(s)")
+    write_report(store, found)
+    print(f"📝 Report: {os.path.relpath(REPORT_FILE, BASE_DIR)}")
+
+    if cmd == "collapse":
+        changed = {}
+        for name, name_pairs in found.items():
+            removed = collapse(store, name, name_pairs)
+            if removed:
+                changed[name] = 0
+                print(f"   🧹 {name}: -{removed}")
+        # Re-export and re-render only the masters that shrank
+        merger.write_masters(changed)
+        merger.update_website_config()
+    store.close()
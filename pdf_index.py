@@ -0,0 +1,121 @@
+import os
+import re
+import sys
+import json
+import logging
+from hashlib import blake2b
+
+# --- CONFIG ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_FILE = os.path.join(BASE_DIR, "pdf_index.json")
+# Every tree multi_bot serves PDFs from
+PDF_ROOTS = [
+    os.path.join(BASE_DIR, "Merged", "PDF"),
+    os.path.join(BASE_DIR, "Звичайні Базі"),
+    os.path.join(BASE_DIR, "Старше ЦТ"),
+]
+# Volumes are served through their master, not listed on their own
+SKIP_DIRS = {"Volumes"}
+TAIL_PAGES = 10
+
+logger = logging.getLogger(__name__)
+
+def index_key(path):
+    """Index entries are keyed by the path relative to the repo, with / separators"""
+    return os.path.relpath(os.path.abspath(os.path.join(BASE_DIR, path)), BASE_DIR).replace(os.sep, '/')
+
+def file_hash(path):
+    h = blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def count_questions(reader):
+    """Highest question number on the last pages of a PDF, None if there is none"""
+    max_question = 0
+    pages_to_check = min(TAIL_PAGES, len(reader.pages))
+    for i in range(len(reader.pages) - 1, max(0, len(reader.pages) - pages_to_check - 1), -1):
+        text = reader.pages[i].extract_text()
+        # Find all question numbers (e.g., "468.", "469.", "470.")
+        matches = re.findall(r'(?:^|\s)(\d+)\.', text, re.MULTILINE)
+        if matches:
+            max_question = max(max_question, max(int(m) for m in matches))
+            if max_question > 0:
+                break
+    return max_question if max_question > 0 else None
+
+def load_index(path=INDEX_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_index(index, path=INDEX_FILE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def record(index, pdf_path, questions, pages):
+    """Entry for a PDF we just rendered ourselves: the counts are known, nothing is parsed"""
+    st = os.stat(pdf_path)
+    index[index_key(pdf_path)] = {
+        "questions": questions, "pages": pages, "bytes": st.st_size,
+        "mtime": int(st.st_mtime), "hash": file_hash(pdf_path),
+    }
+
+def scan_pdf(index, pdf_path):
+    """Refreshes one entry. Returns True when the PDF had to be parsed."""
+    key = index_key(pdf_path)
+    st = os.stat(pdf_path)
+    entry = index.get(key)
+    if entry and entry["bytes"] == st.st_size and entry["mtime"] == int(st.st_mtime):
+        return False
+    digest = file_hash(pdf_path)
+    if entry and entry["bytes"] == st.st_size and entry["hash"] == digest:
+        # Same file with a new mtime (fresh git checkout). The entry is left as it is
+        # so the committed index does not change on every run.
+        return False
+
+    from PyPDF2 import PdfReader
+    try:
+        reader = PdfReader(pdf_path)
+        questions, pages = count_questions(reader), len(reader.pages)
+    except Exception as e:
+        logger.error(f"Error reading {pdf_path}: {e}")
+        questions, pages = None, None
+    index[key] = {
+        "questions": questions, "pages": pages, "bytes": st.st_size,
+        "mtime": int(st.st_mtime), "hash": digest,
+    }
+    return True
+
+def scan_all(index, roots=PDF_ROOTS):
+    """Brings the index in line with the PDF trees: new/changed files are parsed, deleted ones dropped"""
+    seen = set()
+    parsed = 0
+    for root_dir in roots:
+        for root, dirs, files in os.walk(root_dir):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            for f in files:
+                if not f.lower().endswith(".pdf"): continue
+                pdf_path = os.path.join(root, f)
+                seen.add(index_key(pdf_path))
+                if scan_pdf(index, pdf_path):
+                    parsed += 1
+                    print(f"   🔍 {index_key(pdf_path)}: {index[index_key(pdf_path)]['questions']} questions", flush=True)
+    prefixes = tuple(index_key(root_dir) + '/' for root_dir in roots)
+    for key in set(index) - seen:
+        if key.startswith(prefixes):
+            del index[key]
+    return parsed
+
+if __name__ == "__main__":
+    # python pdf_index.py — refresh pdf_index.json for every PDF tree
+    print("🗂️ Scanning PDFs...")
+    index = load_index()
+    parsed = scan_all(index, [os.path.abspath(p) for p in sys.argv[1:]] or PDF_ROOTS)
+    save_index(index)
+    print(f"✅ {len(index)} PDFs indexed ({parsed} parsed).")
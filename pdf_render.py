@@ -0,0 +1,222 @@
+import os
+import re
+import json
+import time
+import shutil
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib import colors
+
+from text_wrap import wrap_line
+from question_store import StoreQuiz
+
+# --- CONFIG ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_FILE = os.path.join(BASE_DIR, "DejaVuSans.ttf")
+FONT_NAME = 'DejaVuSans'
+FONT_URL = "https://github.com/googlefonts/dejavu-fonts/raw/master/ttf/DejaVuSans.ttf"
+# Render processes (default: one per core)
+PDF_WORKERS = int(os.environ.get("KROK_PDF_WORKERS", "0")) or os.cpu_count() or 1
+# Masters longer than this also get split PDFs of this many questions (0 turns volumes off)
+VOLUME_QUESTIONS = int(os.environ.get("KROK_VOLUME_QUESTIONS", "500"))
+VOLUMES_DIR = "Volumes"
+
+# pages: page count; spans: (first page, last page) of every question
+RenderResult = namedtuple("RenderResult", ["seconds", "pages", "spans"])
+
+def setup_font():
+    """Registers the font in this process, downloading it first if it is missing"""
+    if FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return
+    if not os.path.exists(FONT_FILE):
+        print("⬇️ Font not found. Attempting download...", flush=True)
+        try:
+            import requests
+            r = requests.get(FONT_URL)
+            with open(FONT_FILE, 'wb') as f:
+                f.write(r.content)
+        except Exception as e:
+            print(f"❌ Failed to download font: {e}", flush=True)
+    try:
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_FILE))
+    except Exception as e:
+        print(f"❌ Font Registration Error: {e}", flush=True)
+
+NEWLINES = re.compile(r'\r\n|\r|\n')
+
+def block_lines(number, body):
+    """One question block body -> its numbered lines as they appear in a master TXT"""
+    lines = NEWLINES.split(body.rstrip('\r\n'))
+    yield f"{number}. {lines[0]}"
+    yield from lines[1:]
+    yield ""
+
+def render_pdf(records, pdf_path, colored_text=False, first_number=1):
+    """Question block bodies (no numbers) -> A4 PDF. Questions on yellow, correct answers on green.
+
+    records is consumed lazily, so a quiz can be streamed straight out of the store.
+    colored_text also tints the text itself (green correct answers, grey options),
+    the look of the daily scrape PDFs. Returns (page count, page span of every question).
+    reportlab's Canvas keeps every finished page in memory until save() (about 40 KB a
+    page), so a full master costs memory in proportion to its page count.
+    """
+    c = canvas.Canvas(pdf_path, pagesize=A4)
+    width, height = A4
+    margin = 40
+    max_w = width - 2*margin
+    y = height - 40
+    c.setFont(FONT_NAME, 10)
+    spans = []
+
+    for number, body in enumerate(records, first_number):
+        first_page = None
+        for line in block_lines(number, body):
+            line = line.strip()
+            if not line:
+                y -= 6
+                continue
+
+            bg = None
+            text_color = colors.black
+            if re.match(r'^\d+\.', line):
+                bg = colors.lightyellow
+            elif line.startswith('*'):
+                line = line[1:].strip()
+                bg = colors.lightgreen
+                if colored_text: text_color = colors.darkgreen
+            elif colored_text:
+                text_color = colors.darkgrey
+
+            for w_line in wrap_line(line, max_w, FONT_NAME, 10):
+                if y < 40:
+                    c.showPage()
+                    c.setFont(FONT_NAME, 10)
+                    y = height - 40
+                if bg:
+                    c.setFillColor(bg)
+                    c.rect(margin-2, y-4, max_w+4, 14, fill=1, stroke=0)
+                c.setFillColor(text_color)
+                c.drawString(margin, y, w_line)
+                y -= 14
+                if first_page is None: first_page = c.getPageNumber()
+        page = c.getPageNumber()
+        spans.append((first_page or page, page))
+
+    pages = c.getPageNumber()
+    c.save()
+    return pages, spans
+
+def render_job(records, pdf_path, first_number=1, colored_text=False):
+    """Renders into a temp file next to the target and renames it into place"""
+    setup_font()
+    started = time.perf_counter()
+    tmp_path = pdf_path + ".tmp"
+    try:
+        pages, spans = render_pdf(records, tmp_path, colored_text, first_number)
+        os.replace(tmp_path, pdf_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return RenderResult(time.perf_counter() - started, pages, spans)
+
+def render_all(jobs, workers=PDF_WORKERS, colored_text=False):
+    """Renders [(records, pdf_path[, first_number]), ...] on a process pool.
+
+    records has to be picklable: a list of block bodies, or a question_store.StoreQuiz
+    that the worker process reads from the database itself. Returns {pdf_path: RenderResult}
+    for the ones that worked.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return {}
+    workers = max(1, min(workers, len(jobs)))
+    print(f"📄 Rendering {len(jobs)} PDF(s) on {workers} process(es)...", flush=True)
+    started = time.perf_counter()
+    results = {}
+
+    def report(pdf_path, result):
+        results[pdf_path] = result
+        print(f"   📄 {result.seconds:6.1f}s  {result.pages:5d} pages  {os.path.basename(pdf_path)}", flush=True)
+
+    if workers == 1:
+        for job in jobs:
+            try:
+                report(job[1], render_job(*job, colored_text=colored_text))
+            except Exception as e:
+                print(f"   ❌ {os.path.basename(job[1])}: {e}", flush=True)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=setup_font) as pool:
+            futures = {pool.submit(render_job, *job, colored_text=colored_text): job[1] for job in jobs}
+            for future in as_completed(futures):
+                pdf_path = futures[future]
+                try:
+                    report(pdf_path, future.result())
+                except Exception as e:
+                    print(f"   ❌ {os.path.basename(pdf_path)}: {e}", flush=True)
+
+    wall = time.perf_counter() - started
+    serial = sum(r.seconds for r in results.values())
+    print(f"📄 {len(results)}/{len(jobs)} PDF(s) in {wall:.1f}s (sum of render times {serial:.1f}s).", flush=True)
+    return results
+
+# --- MASTER VOLUMES ---
+def volume_ranges(total, size=VOLUME_QUESTIONS):
+    """(first, last) question numbers of each volume; none for masters that fit in one"""
+    if size <= 0 or total <= size:
+        return []
+    return [(first, min(first + size - 1, total)) for first in range(1, total + 1, size)]
+
+def volume_dir(pdf_path):
+    base = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(os.path.dirname(pdf_path), VOLUMES_DIR, base)
+
+def volume_path(pdf_path, first, last):
+    base = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(volume_dir(pdf_path), f"{base} ({first}-{last}).pdf")
+
+def master_jobs(name, total, pdf_path):
+    """Render jobs for a master's full PDF plus its volumes, all read from the store"""
+    # Volumes of an older, differently split version are not kept around
+    shutil.rmtree(volume_dir(pdf_path), ignore_errors=True)
+    jobs = [(StoreQuiz(name), pdf_path)]
+    ranges = volume_ranges(total)
+    if ranges:
+        os.makedirs(volume_dir(pdf_path), exist_ok=True)
+    for first, last in ranges:
+        jobs.append((StoreQuiz(name, offset=first - 1, limit=last - first + 1), volume_path(pdf_path, first, last), first))
+    return jobs
+
+def write_volume_manifest(pdf_path, total, results):
+    """Volumes/<master>/volumes.json: which questions and pages of the full PDF each volume holds"""
+    ranges = volume_ranges(total)
+    full = results.get(pdf_path)
+    if not ranges or full is None:
+        return None
+    volumes = []
+    for first, last in ranges:
+        path = volume_path(pdf_path, first, last)
+        if path not in results:
+            return None
+        volumes.append({
+            "file": os.path.basename(path),
+            "questions": [first, last],
+            "pages": [full.spans[first - 1][0], full.spans[last - 1][1]],
+            "volume_pages": results[path].pages,
+            "bytes": os.path.getsize(path),
+        })
+    manifest = {
+        "master": os.path.basename(pdf_path),
+        "questions": total,
+        "pages": full.pages,
+        "bytes": os.path.getsize(pdf_path),
+        "volumes": volumes,
+    }
+    manifest_path = os.path.join(volume_dir(pdf_path), "volumes.json")
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False)
+    return manifest_path
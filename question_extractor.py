@@ -0,0 +1,180 @@
+import os
+from collections import namedtuple
+
+from bs4 import BeautifulSoup
+
+# Optional fast backends. BeautifulSoup stays as the fallback.
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# "auto" picks the fastest backend that is installed
+BACKEND = os.environ.get("KROK_PARSER", "auto").lower()
+
+RIGHT_ANSWER_PREFIXES = ("The correct answer is:", "Правильна відповідь:")
+
+# options is a list of (letter, text); both are None for questions the caller skipped
+ReviewQuestion = namedtuple("ReviewQuestion", ["q_text", "options", "correct"])
+
+def clean_right_answer(text):
+    for prefix in RIGHT_ANSWER_PREFIXES:
+        text = text.replace(prefix, "")
+    return text.strip()
+
+def available_backends():
+    found = []
+    if LexborHTMLParser is not None: found.append("selectolax")
+    if lxml is not None: found.append("lxml")
+    found.append("bs4")
+    return found
+
+def pick_backend(name=None):
+    name = (name or BACKEND).lower()
+    if name == "auto":
+        return available_backends()[0]
+    if name not in available_backends():
+        raise ValueError(f"Parser backend '{name}' is not installed (have: {', '.join(available_backends())})")
+    return name
+
+def iter_questions(html, skip=None, backend=None):
+    """Yields a ReviewQuestion for every div.que with a question text on a Moodle review page.
+
+    skip(q_text) -> True leaves options unparsed for questions the caller already has.
+    Every backend returns exactly what the BeautifulSoup get_text(strip=True) parser did.
+    """
+    backend = pick_backend(backend)
+    if backend == "selectolax":
+        return _iter_selectolax(html, skip)
+    if backend == "lxml":
+        return _iter_lxml(html, skip)
+    return _iter_bs4(html, skip)
+
+def extract_questions(html, backend=None):
+    return list(iter_questions(html, backend=backend))
+
+# --- BeautifulSoup (reference) ---
+def _iter_bs4(html, skip):
+    soup = BeautifulSoup(html, 'html.parser')
+    for q in soup.find_all("div", class_="que"):
+        q_text_div = q.find("div", class_="qtext")
+        if not q_text_div: continue
+        q_text = q_text_div.get_text(strip=True)
+        if skip and skip(q_text):
+            yield ReviewQuestion(q_text, None, None)
+            continue
+
+        correct_ans = ""
+        feedback = q.find("div", class_="feedback")
+        if feedback:
+            ra = feedback.find("div", class_="rightanswer")
+            if ra: correct_ans = clean_right_answer(ra.get_text(strip=True))
+
+        options = []
+        ans_div = q.find("div", class_="answer")
+        if ans_div:
+            opts = ans_div.find_all("div", recursive=False) or ans_div.find_all("div", class_="d-flex")
+            for opt in opts:
+                l_span = opt.find("span", class_="answernumber")
+                if not l_span: continue
+                t_div = opt.find("div", class_="flex-fill")
+                options.append((l_span.get_text(strip=True), t_div.get_text(strip=True) if t_div else ""))
+
+        yield ReviewQuestion(q_text, options, correct_ans)
+
+# --- selectolax (lexbor, CSS selectors) ---
+def _sx_text(node):
+    return node.text(deep=True, separator='', strip=True)
+
+def _iter_selectolax(html, skip):
+    tree = LexborHTMLParser(html)
+    # get_text() in BeautifulSoup never includes script/style contents
+    tree.strip_tags(["script", "style"])
+    for q in tree.css("div.que"):
+        q_text_div = q.css_first("div.qtext")
+        if q_text_div is None: continue
+        q_text = _sx_text(q_text_div)
+        if skip and skip(q_text):
+            yield ReviewQuestion(q_text, None, None)
+            continue
+
+        correct_ans = ""
+        feedback = q.css_first("div.feedback")
+        if feedback is not None:
+            ra = feedback.css_first("div.rightanswer")
+            if ra is not None: correct_ans = clean_right_answer(_sx_text(ra))
+
+        options = []
+        ans_div = q.css_first("div.answer")
+        if ans_div is not None:
+            opts = [c for c in ans_div.iter() if c.tag == "div"] or ans_div.css("div.d-flex")
+            for opt in opts:
+                l_span = opt.css_first("span.answernumber")
+                if l_span is None: continue
+                t_div = opt.css_first("div.flex-fill")
+                options.append((_sx_text(l_span), _sx_text(t_div) if t_div is not None else ""))
+
+        yield ReviewQuestion(q_text, options, correct_ans)
+
+# --- lxml (XPath, no cssselect dependency) ---
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+XP_QUE = f"//div[{_has_class('que')}]"
+XP_QTEXT = f".//div[{_has_class('qtext')}]"
+XP_FEEDBACK = f".//div[{_has_class('feedback')}]"
+XP_RIGHT = f".//div[{_has_class('rightanswer')}]"
+XP_ANSWER = f".//div[{_has_class('answer')}]"
+XP_DFLEX = f".//div[{_has_class('d-flex')}]"
+XP_NUMBER = f".//span[{_has_class('answernumber')}]"
+XP_FILL = f".//div[{_has_class('flex-fill')}]"
+
+def _lx_text(el):
+    # Every text node stripped on its own, like get_text(strip=True): "What <!-- x --> is"
+    # is "What" + "is". itertext() already leaves comments out.
+    return ''.join(t.strip() for t in el.itertext() if t.strip())
+
+def _lx_first(el, path):
+    found = el.xpath(path)
+    return found[0] if found else None
+
+def _iter_lxml(html, skip):
+    try:
+        doc = lxml.html.document_fromstring(html)
+    except ValueError:
+        # Strings with an XML encoding declaration have to go in as bytes
+        doc = lxml.html.document_fromstring(html.encode('utf-8'))
+    # Empty script/style instead of removing them: strip_elements() would glue the text
+    # before and after them into one node ("What  is" where get_text gives "Whatis")
+    for el in doc.iter("script", "style"):
+        el.text = None
+    for q in doc.xpath(XP_QUE):
+        q_text_div = _lx_first(q, XP_QTEXT)
+        if q_text_div is None: continue
+        q_text = _lx_text(q_text_div)
+        if skip and skip(q_text):
+            yield ReviewQuestion(q_text, None, None)
+            continue
+
+        correct_ans = ""
+        feedback = _lx_first(q, XP_FEEDBACK)
+        if feedback is not None:
+            ra = _lx_first(feedback, XP_RIGHT)
+            if ra is not None: correct_ans = clean_right_answer(_lx_text(ra))
+
+        options = []
+        ans_div = _lx_first(q, XP_ANSWER)
+        if ans_div is not None:
+            opts = [c for c in ans_div if c.tag == "div"] or ans_div.xpath(XP_DFLEX)
+            for opt in opts:
+                l_span = _lx_first(opt, XP_NUMBER)
+                if l_span is None: continue
+                t_div = _lx_first(opt, XP_FILL)
+                options.append((_lx_text(l_span), _lx_text(t_div) if t_div is not None else ""))
+
+        yield ReviewQuestion(q_text, options, correct_ans)
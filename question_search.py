@@ -0,0 +1,135 @@
+import os
+import re
+import sys
+import time
+import sqlite3
+from collections import namedtuple
+from hashlib import blake2b
+
+from questions import fingerprint, iter_blocks, parse_options
+
+# --- CONFIG ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SEARCH_DB = os.path.join(BASE_DIR, "Merged", "search.db")
+# Masters first: a question found there is credited to its master, not a legacy copy
+TXT_ROOTS = [
+    os.path.join(BASE_DIR, "Merged", "TXT"),
+    os.path.join(BASE_DIR, "Звичайні Базі"),
+    os.path.join(BASE_DIR, "Старше ЦТ"),
+]
+MAX_RESULTS = 10
+
+# unicode61 folds case for Cyrillic as well as Latin ("АНАТОМІЯ" finds "анатомія")
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS questions USING fts5(
+    question, answer, file UNINDEXED, number UNINDEXED, copies UNINDEXED,
+    tokenize = 'unicode61'
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+SearchHit = namedtuple("SearchHit", ["question", "answer", "file", "number", "copies"])
+
+WORD = re.compile(r'\w+')
+# Ukrainian texts mix ʼ, ’ and ' inside words. All become ', which both the tokenizer
+# and the query splitter treat as a word break, so "об'єкт" finds "обʼєкт".
+APOSTROPHES = str.maketrans({'\u02bc': "'", '\u2019': "'", '`': "'"})
+
+def iter_txt_files(roots=TXT_ROOTS):
+    for root_dir in roots:
+        for root, dirs, files in os.walk(root_dir):
+            dirs.sort()
+            for f in sorted(files):
+                if f.lower().endswith(".txt"):
+                    yield os.path.join(root, f)
+
+def sources_signature(roots=TXT_ROOTS):
+    """Changes when any TXT file is added, removed or changes size"""
+    h = blake2b(digest_size=16)
+    for path in iter_txt_files(roots):
+        h.update(f"{os.path.relpath(path, BASE_DIR)}\0{os.path.getsize(path)}\n".encode('utf-8'))
+    return h.hexdigest()
+
+def correct_answer(body):
+    return "; ".join(text for _, text, correct in parse_options(body) if correct)
+
+def build_index(path=SEARCH_DB, roots=TXT_ROOTS):
+    """Rebuilds the search database from scratch into a temp file and swaps it in. Returns the question count."""
+    started = time.perf_counter()
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    db = sqlite3.connect(tmp_path)
+    db.executescript(SCHEMA)
+
+    # The same question sits in many legacy files: index it once, count the copies
+    seen = {}
+    rows = []
+    for txt_path in iter_txt_files(roots):
+        rel = os.path.relpath(txt_path, BASE_DIR).replace(os.sep, '/')
+        for number, body in enumerate(iter_blocks(txt_path), 1):
+            q_text = body.split('\n')[0].strip()
+            if not q_text: continue
+            fp = fingerprint(q_text)
+            if fp in seen:
+                rows[seen[fp]][4] += 1
+                continue
+            seen[fp] = len(rows)
+            rows.append([q_text.translate(APOSTROPHES), correct_answer(body).translate(APOSTROPHES), rel, number, 1])
+
+    with db:
+        db.executemany("INSERT INTO questions (question, answer, file, number, copies) VALUES (?, ?, ?, ?, ?)", rows)
+        db.execute("INSERT INTO questions (questions) VALUES ('optimize')")
+        db.execute("INSERT OR REPLACE INTO meta VALUES ('signature', ?)", (sources_signature(roots),))
+    db.close()
+    os.replace(tmp_path, path)
+    print(f"🔎 Search index: {len(rows)} questions in {time.perf_counter() - started:.1f}s", flush=True)
+    return len(rows)
+
+def needs_build(path=SEARCH_DB, roots=TXT_ROOTS):
+    if not os.path.exists(path):
+        return True
+    try:
+        db = sqlite3.connect(path)
+        row = db.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        db.close()
+    except sqlite3.Error:
+        return True
+    return row is None or row[0] != sources_signature(roots)
+
+def to_match_query(text):
+    """User input -> FTS5 query: every word must appear, as a word or a word prefix"""
+    words = WORD.findall(text.translate(APOSTROPHES))
+    return " ".join(f'"{w}"*' for w in words)
+
+class QuestionSearch:
+    """Read-only handle on the search database. Open one per thread."""
+    def __init__(self, path=SEARCH_DB):
+        self.db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self):
+        self.db.close()
+
+    def search(self, text, limit=MAX_RESULTS):
+        query = to_match_query(text)
+        if not query:
+            return []
+        rows = self.db.execute(
+            "SELECT question, answer, file, number, copies FROM questions WHERE questions MATCH ? ORDER BY rank LIMIT ?",
+            (query, limit),
+        )
+        return [SearchHit(*r) for r in rows]
+
+if __name__ == "__main__":
+    # python question_search.py build | python question_search.py <words...>
+    if sys.argv[1:2] == ["build"]:
+        build_index()
+    elif len(sys.argv) > 1:
+        searcher = QuestionSearch()
+        started = time.perf_counter()
+        hits = searcher.search(" ".join(sys.argv[1:]))
+        for hit in hits:
+            print(f"• {hit.question[:200]}\n  ✅ {hit.answer}\n  └ {hit.file} #{hit.number} ({hit.copies} copies)")
+        print(f"{len(hits)} hits in {(time.perf_counter() - started) * 1000:.1f} ms")
+    else:
+        sys.exit("Usage: python question_search.py build | <words...>")
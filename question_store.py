@@ -0,0 +1,374 @@
+import os
+import sys
+import json
+import sqlite3
+from hashlib import blake2b
+from datetime import date
+
+from questions import fingerprint, iter_blocks, parse_options
+
+# --- CONFIG ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MERGED_TXT_DIR = os.path.join(BASE_DIR, "Merged", "TXT")
+DB_FILE = os.path.join(BASE_DIR, "Merged", "questions.db")
+# Collapsed near-duplicates, committed next to the masters so they outlive the database:
+# {master: {alias fingerprint: fingerprint of the question it was folded into}}
+ALIASES_FILE = os.path.join(BASE_DIR, "Merged", "aliases.json")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quizzes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    quiz_id INTEGER NOT NULL REFERENCES quizzes(id) ON DELETE CASCADE,
+    fingerprint INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    body TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    UNIQUE (quiz_id, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS idx_questions_fingerprint ON questions(fingerprint);
+CREATE TABLE IF NOT EXISTS options (
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    letter TEXT NOT NULL,
+    text TEXT NOT NULL,
+    is_correct INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (question_id, position)
+);
+-- Fingerprints of near-duplicates folded into another question (near_dupes.py collapse)
+CREATE TABLE IF NOT EXISTS aliases (
+    quiz_id INTEGER NOT NULL REFERENCES quizzes(id) ON DELETE CASCADE,
+    fingerprint INTEGER NOT NULL,
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    PRIMARY KEY (quiz_id, fingerprint)
+);
+-- Hash of the master TXT as last imported or exported, to notice edits made outside the store
+CREATE TABLE IF NOT EXISTS sources (
+    quiz_id INTEGER PRIMARY KEY REFERENCES quizzes(id) ON DELETE CASCADE,
+    digest TEXT NOT NULL
+);
+"""
+
+def file_digest(path):
+    """blake2b of a file's bytes, None if it does not exist"""
+    h = blake2b(digest_size=16)
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                h.update(chunk)
+    except FileNotFoundError:
+        return None
+    return h.hexdigest()
+
+def load_aliases(path=ALIASES_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return {name: {int(alias): kept for alias, kept in pairs.items()} for name, pairs in data.items()}
+
+def save_aliases(aliases, path=ALIASES_FILE):
+    data = {name: {str(alias): kept for alias, kept in sorted(pairs.items())}
+            for name, pairs in sorted(aliases.items()) if pairs}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1, ensure_ascii=False)
+
+class QuestionStore:
+    """Question database behind the master TXT/PDF files, which are exported from it.
+
+    The master TXT files stay the source of truth: an edited TXT replaces its quiz
+    (import_txt), and a lost database is rebuilt from them, losing only first/last
+    seen dates. The workflows carry Merged/questions.db between runs in an actions cache.
+    Aliases of collapsed near-duplicates are also kept in aliases.json next to the
+    database, which is committed, and come back when a quiz is imported.
+
+    One quiz per master file name ("Крок 1 Медицина (UA).txt"). A question is keyed
+    by the fingerprint of its first line inside that quiz; its body is the block as
+    it appears in the TXT minus the number.
+    """
+    def __init__(self, path=DB_FILE, aliases_path=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.aliases_path = aliases_path or os.path.join(os.path.dirname(path), "aliases.json")
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- QUIZZES ---
+    def quiz_id(self, name, create=True):
+        row = self.db.execute("SELECT id FROM quizzes WHERE name = ?", (name,)).fetchone()
+        if row:
+            return row[0]
+        if not create:
+            return None
+        with self.db:
+            return self.db.execute("INSERT INTO quizzes (name) VALUES (?)", (name,)).lastrowid
+
+    def has_quiz(self, name):
+        return self.quiz_id(name, create=False) is not None
+
+    def quiz_names(self):
+        return [r[0] for r in self.db.execute("SELECT name FROM quizzes ORDER BY name")]
+
+    def drop_quiz(self, name):
+        with self.db:
+            self.db.execute("DELETE FROM quizzes WHERE name = ?", (name,))
+
+    def question_count(self, name):
+        qid = self.quiz_id(name, create=False)
+        if qid is None:
+            return 0
+        return self.db.execute("SELECT COUNT(*) FROM questions WHERE quiz_id = ?", (qid,)).fetchone()[0]
+
+    # --- QUESTIONS ---
+    def upsert_blocks(self, name, bodies, seen=None):
+        """Inserts new questions at the end, refreshes the body of known ones. Returns how many were new."""
+        seen = seen or date.today().isoformat()
+        qid = self.quiz_id(name)
+        added = 0
+        with self.db:
+            next_pos = self.db.execute(
+                "SELECT COALESCE(MAX(position), 0) FROM questions WHERE quiz_id = ?", (qid,)
+            ).fetchone()[0]
+            for body in bodies:
+                q_text = body.split('\n')[0].strip()
+                if not q_text: continue
+                fp = fingerprint(q_text)
+                row = self.db.execute(
+                    "SELECT id, body FROM questions WHERE quiz_id = ? AND fingerprint = ?", (qid, fp)
+                ).fetchone()
+                if not row:
+                    alias = self.db.execute(
+                        "SELECT question_id FROM aliases WHERE quiz_id = ? AND fingerprint = ?", (qid, fp)
+                    ).fetchone()
+                    if alias:
+                        # A collapsed near-duplicate came back: it counts as a sighting of the question it was folded into
+                        self.db.execute("UPDATE questions SET last_seen = ? WHERE id = ?", (seen, alias[0]))
+                        continue
+                if row:
+                    question_id, old_body = row
+                    self.db.execute("UPDATE questions SET last_seen = ? WHERE id = ?", (seen, question_id))
+                    if old_body == body:
+                        continue
+                    # Same question, newer wording of the block wins (like dict.update in the old merge)
+                    self.db.execute("UPDATE questions SET text = ?, body = ? WHERE id = ?", (q_text, body, question_id))
+                    self.db.execute("DELETE FROM options WHERE question_id = ?", (question_id,))
+                else:
+                    next_pos += 1
+                    question_id = self.db.execute(
+                        "INSERT INTO questions (quiz_id, fingerprint, position, text, body, first_seen, last_seen) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (qid, fp, next_pos, q_text, body, seen, seen),
+                    ).lastrowid
+                    added += 1
+                self.db.executemany(
+                    "INSERT INTO options (question_id, position, letter, text, is_correct) VALUES (?, ?, ?, ?, ?)",
+                    [(question_id, i, letter, text, int(correct)) for i, (letter, text, correct) in enumerate(parse_options(body))],
+                )
+        return added
+
+    def replace_blocks(self, name, bodies, seen=None):
+        """Makes the quiz hold exactly these questions, in this order. Returns how many were new.
+
+        Known questions keep their first/last seen dates and aliases; ones missing from
+        bodies are deleted. A repeated question keeps its first place and its last body.
+        """
+        seen = seen or date.today().isoformat()
+        qid = self.quiz_id(name)
+        added = 0
+        kept = set()
+        with self.db:
+            for body in bodies:
+                q_text = body.split('\n')[0].strip()
+                if not q_text: continue
+                fp = fingerprint(q_text)
+                row = self.db.execute(
+                    "SELECT id, body FROM questions WHERE quiz_id = ? AND fingerprint = ?", (qid, fp)
+                ).fetchone()
+                if row:
+                    question_id, old_body = row
+                    if question_id not in kept:
+                        kept.add(question_id)
+                        self.db.execute("UPDATE questions SET position = ? WHERE id = ?", (len(kept), question_id))
+                    if old_body == body:
+                        continue
+                    self.db.execute("UPDATE questions SET text = ?, body = ? WHERE id = ?", (q_text, body, question_id))
+                    self.db.execute("DELETE FROM options WHERE question_id = ?", (question_id,))
+                else:
+                    question_id = self.db.execute(
+                        "INSERT INTO questions (quiz_id, fingerprint, position, text, body, first_seen, last_seen) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (qid, fp, len(kept) + 1, q_text, body, seen, seen),
+                    ).lastrowid
+                    kept.add(question_id)
+                    added += 1
+                self.db.executemany(
+                    "INSERT INTO options (question_id, position, letter, text, is_correct) VALUES (?, ?, ?, ?, ?)",
+                    [(question_id, i, letter, text, int(correct)) for i, (letter, text, correct) in enumerate(parse_options(body))],
+                )
+            stale = [r[0] for r in self.db.execute("SELECT id FROM questions WHERE quiz_id = ?", (qid,)) if r[0] not in kept]
+            self.db.executemany("DELETE FROM questions WHERE id = ?", [(i,) for i in stale])
+        return added
+
+    def import_txt(self, name, txt_path):
+        """Makes the quiz match its master TXT, unless the file is unchanged since it was last imported or exported.
+
+        The TXT wins: hand edits and admin.html uploads to Merged/TXT replace what the
+        store held. Returns how many questions were new to the store.
+        """
+        digest = file_digest(txt_path)
+        if digest is None or digest == self.source_digest(name):
+            return 0
+        added = self.replace_blocks(name, iter_blocks(txt_path))
+        self.restore_aliases(name, load_aliases(self.aliases_path).get(name, {}))
+        self.set_source_digest(name, digest)
+        return added
+
+    def source_digest(self, name):
+        row = self.db.execute(
+            "SELECT digest FROM sources JOIN quizzes ON quizzes.id = sources.quiz_id WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_source_digest(self, name, digest):
+        qid = self.quiz_id(name)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO sources (quiz_id, digest) VALUES (?, ?)", (qid, digest))
+
+    def iter_bodies(self, name, offset=0, limit=-1):
+        qid = self.quiz_id(name, create=False)
+        if qid is None:
+            return
+        for (body,) in self.db.execute(
+            "SELECT body FROM questions WHERE quiz_id = ? ORDER BY position LIMIT ? OFFSET ?", (qid, limit, offset)
+        ):
+            yield body
+
+    def iter_questions(self, name):
+        """(question id, body) in master order"""
+        qid = self.quiz_id(name, create=False)
+        if qid is None:
+            return
+        yield from self.db.execute("SELECT id, body FROM questions WHERE quiz_id = ? ORDER BY position", (qid,))
+
+    def merge_questions(self, name, keep_id, drop_ids):
+        """Deletes near-duplicates of keep_id and remembers their fingerprints as its aliases"""
+        qid = self.quiz_id(name, create=False)
+        with self.db:
+            for drop_id in drop_ids:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO aliases (quiz_id, fingerprint, question_id) "
+                    "SELECT quiz_id, fingerprint, ? FROM questions WHERE id = ? AND quiz_id = ?",
+                    (keep_id, drop_id, qid),
+                )
+                self.db.execute("UPDATE aliases SET question_id = ? WHERE question_id = ?", (keep_id, drop_id))
+                self.db.execute("DELETE FROM questions WHERE id = ? AND quiz_id = ?", (drop_id, qid))
+
+    def aliases(self, name):
+        """{alias fingerprint: fingerprint of the question it was folded into}"""
+        qid = self.quiz_id(name, create=False)
+        if qid is None:
+            return {}
+        return dict(self.db.execute(
+            "SELECT aliases.fingerprint, questions.fingerprint FROM aliases "
+            "JOIN questions ON questions.id = aliases.question_id WHERE aliases.quiz_id = ?", (qid,)
+        ))
+
+    def restore_aliases(self, name, aliases):
+        """Re-creates aliases from aliases.json whose question is in the quiz (after a rebuild from the TXT)"""
+        qid = self.quiz_id(name, create=False)
+        if qid is None or not aliases:
+            return
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO aliases (quiz_id, fingerprint, question_id) "
+                "SELECT quiz_id, ?, id FROM questions WHERE quiz_id = ? AND fingerprint = ?",
+                [(alias, qid, kept) for alias, kept in aliases.items()],
+            )
+
+    def save_aliases(self, name):
+        """Writes this quiz's aliases into aliases.json"""
+        aliases = load_aliases(self.aliases_path)
+        aliases[name] = self.aliases(name)
+        save_aliases(aliases, self.aliases_path)
+
+    def export_txt(self, name, txt_path):
+        """Writes the numbered master TXT the website and PDF renderer read. Returns the question count."""
+        count = 0
+        with open(txt_path, 'w', encoding='utf-8') as f:
+            for count, body in enumerate(self.iter_bodies(name), 1):
+                f.write(f"{count}. {body}\n\n")
+        self.set_source_digest(name, file_digest(txt_path))
+        return count
+
+    def digest(self, name):
+        """Hash of what export_txt would write, to tell whether a master changed"""
+        h = blake2b(digest_size=16)
+        for count, body in enumerate(self.iter_bodies(name), 1):
+            h.update(f"{count}. {body}\n\n".encode('utf-8'))
+        return h.hexdigest()
+
+    def known_fingerprints(self, name):
+        qid = self.quiz_id(name, create=False)
+        if qid is None:
+            return set()
+        return {r[0] for r in self.db.execute(
+            "SELECT fingerprint FROM questions WHERE quiz_id = ? UNION SELECT fingerprint FROM aliases WHERE quiz_id = ?", (qid, qid)
+        )}
+
+class StoreQuiz:
+    """Picklable handle on one quiz's bodies, for readers in another process (PDF workers).
+
+    offset/limit select a slice in master order (PDF volumes).
+    """
+    def __init__(self, name, path=DB_FILE, offset=0, limit=-1):
+        self.name = name
+        self.path = path
+        self.offset = offset
+        self.limit = limit
+
+    def __iter__(self):
+        store = QuestionStore(self.path)
+        try:
+            yield from store.iter_bodies(self.name, self.offset, self.limit)
+        finally:
+            store.close()
+
+
+def import_all(store, txt_dir=MERGED_TXT_DIR):
+    for filename in sorted(os.listdir(txt_dir)):
+        if not filename.endswith(".txt"): continue
+        added = store.import_txt(filename, os.path.join(txt_dir, filename))
+        print(f"   📥 {filename}: {store.question_count(filename)} questions (+{added})")
+
+def export_all(store, txt_dir=MERGED_TXT_DIR):
+    for name in store.quiz_names():
+        count = store.export_txt(name, os.path.join(txt_dir, name))
+        print(f"   📤 {name}: {count} questions")
+
+if __name__ == "__main__":
+    # python question_store.py import|export
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "import"
+    with QuestionStore() as store:
+        if cmd == "import":
+            print("🗄️ Importing Merged/TXT into the question store...")
+            import_all(store)
+        elif cmd == "export":
+            print("🗄️ Exporting master TXT files from the question store...")
+            export_all(store)
+        else:
+            sys.exit(f"Unknown command: {cmd} (use import or export)")
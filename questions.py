@@ -0,0 +1,83 @@
+import re
+from hashlib import blake2b
+
+# A new question block starts at any line beginning with "<number>." — same rule as
+# the re.split(r'\n(?=\d+\.)') used by the mergers
+BLOCK_START = re.compile(r'^\d+\.')
+NUMBER_PREFIX = re.compile(r'^\d+\.\s*')
+# "a. text", "*c. text" — the star marks the correct answer
+OPTION_LINE = re.compile(r'^(\*?)([A-Za-z])\.\s*(.*)$')
+
+def normalize_question(text):
+    """Collapses whitespace so the same question scraped twice compares equal"""
+    return ' '.join(text.split())
+
+def fingerprint(text):
+    """64-bit fingerprint of a question's text (first line of its block). Signed so it fits SQLite INTEGER."""
+    digest = blake2b(normalize_question(text).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+def parse_options(body):
+    """(letter, text, is_correct) for every option line of a block body"""
+    options = []
+    for line in body.split('\n')[1:]:
+        m = OPTION_LINE.match(line.strip())
+        if m:
+            options.append((m.group(2), m.group(3).strip(), bool(m.group(1))))
+    return options
+
+def answer_signature(correct):
+    """Fingerprint of a question's correct option texts: tells a changed answer from the same one seen again"""
+    return fingerprint('\n'.join(sorted(normalize_question(text) for text in correct)))
+
+def load_known(txt_path):
+    """{fingerprint: answer_signature} of every question in a numbered TXT file"""
+    known = {}
+    try:
+        for body in iter_blocks(txt_path):
+            q_text = body.split('\n')[0].strip()
+            if q_text:
+                known[fingerprint(q_text)] = answer_signature(text for _, text, correct in parse_options(body) if correct)
+    except FileNotFoundError:
+        pass
+    return known
+
+def iter_lines(path, newline=None):
+    """Lines of a TXT file without their line break, one at a time.
+
+    newline=None reads like the mergers' open() always did (\r, \n and \r\n all end a
+    line). newline='\n' splits on \n only and drops the \r of \r\n, like the browser's
+    txt.replace(/\r\n/g, '\n').split('\n').
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace', newline=newline) as f:
+        for line in f:
+            if line.endswith('\r\n'): yield line[:-2]
+            elif line.endswith('\n'): yield line[:-1]
+            else: yield line
+
+def iter_raw_blocks(lines, start=BLOCK_START):
+    """Groups lines into blocks: every line after the first that matches `start` opens a new one"""
+    block = None
+    for line in lines:
+        if block is not None and start.match(line):
+            yield '\n'.join(block)
+            block = None
+        if block is None:
+            block = []
+        block.append(line)
+    if block is not None:
+        yield '\n'.join(block)
+
+def _bodies(raw_blocks):
+    for block in raw_blocks:
+        block = block.strip()
+        if not block: continue
+        yield NUMBER_PREFIX.sub('', block)
+
+def iter_blocks(path):
+    """Block bodies of a numbered TXT file, streamed line by line (split_blocks for a file)"""
+    return _bodies(iter_raw_blocks(iter_lines(path)))
+
+def split_blocks(content):
+    """Numbered TXT content -> block bodies without their numbers (the mergers' split rule)"""
+    return list(_bodies(iter_raw_blocks(content.replace('\r\n', '\n').split('\n'))))
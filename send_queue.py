@@ -0,0 +1,166 @@
+import os
+import time
+import asyncio
+import logging
+import itertools
+from collections import Counter
+from datetime import timedelta
+
+from telegram.error import RetryAfter
+
+import bot_metrics
+
+# --- CONFIG ---
+SEND_QUEUE_SIZE = int(os.environ.get("SEND_QUEUE_SIZE", "100"))
+SEND_WORKERS = int(os.environ.get("SEND_WORKERS", "4"))
+# Telegram asks for about one message a second per chat (short bursts are tolerated)
+# and at most 30 a second for the whole bot
+PER_CHAT_INTERVAL = float(os.environ.get("SEND_PER_CHAT_INTERVAL", "1.0"))
+PER_CHAT_BURST = int(os.environ.get("SEND_PER_CHAT_BURST", "3"))
+GLOBAL_RATE = float(os.environ.get("SEND_GLOBAL_RATE", "30"))
+GLOBAL_BURST = int(os.environ.get("SEND_GLOBAL_BURST", "5"))
+MAX_RETRIES = 5
+
+# Lower goes first
+HIGH, NORMAL = 0, 1
+
+logger = logging.getLogger(__name__)
+
+class QueueFull(Exception):
+    """The send queue already holds its maximum; the caller should answer "busy" """
+
+def retry_seconds(error):
+    r = error.retry_after
+    return r.total_seconds() if isinstance(r, timedelta) else float(r)
+
+class _Schedule:
+    """One rate (interval between sends) with room for `burst` sends back to back.
+
+    GCRA: `tat` is when the next send would be due at the steady rate.
+    """
+    def __init__(self, interval, burst):
+        self.interval = interval
+        self.slack = (burst - 1) * interval
+        self.tat = 0.0
+
+    def earliest(self, now):
+        return max(now, self.tat - self.slack)
+
+    def take(self, at):
+        self.tat = max(self.tat, at) + self.interval
+
+class RateLimiter:
+    """Spaces Bot API sends to fit both a per-chat and a global rate.
+
+    acquire() reserves the first slot both allow and sleeps until then, so callers go
+    out in the order they asked. Runs on one event loop; there is nothing to lock.
+    """
+    def __init__(self, per_chat_interval=PER_CHAT_INTERVAL, per_chat_burst=PER_CHAT_BURST,
+                 global_rate=GLOBAL_RATE, global_burst=GLOBAL_BURST):
+        self.per_chat_interval = per_chat_interval
+        self.per_chat_burst = per_chat_burst
+        self.overall = _Schedule(1.0 / global_rate, global_burst)
+        self.chats = {}
+
+    async def acquire(self, chat_id):
+        now = time.monotonic()
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            if len(self.chats) > 1000:
+                # Chats idle long enough to be back at a full burst need no entry
+                self.chats = {k: v for k, v in self.chats.items() if v.tat > now}
+            chat = self.chats[chat_id] = _Schedule(self.per_chat_interval, self.per_chat_burst)
+        at = max(chat.earliest(now), self.overall.earliest(now))
+        chat.take(at)
+        self.overall.take(at)
+        if at > now:
+            await asyncio.sleep(at - now)
+
+    def pause(self, seconds):
+        """After a RetryAfter: nothing goes out for `seconds`"""
+        until = time.monotonic() + seconds
+        self.overall.tat = max(self.overall.tat, until + self.overall.slack)
+
+class SendQueue:
+    """Bounded priority queue of sends, worked off by SEND_WORKERS tasks.
+
+    submit() takes a key and a job, a coroutine function that does one send and waits
+    on the limiter before each Bot API call. A key that is already queued or being
+    sent is not queued again. A job failing with RetryAfter pauses the limiter and
+    goes back to its old place in the queue, up to MAX_RETRIES times; any other
+    failure is logged and counted. metrics() feeds /metrics.
+    """
+    def __init__(self, maxsize=SEND_QUEUE_SIZE, workers=SEND_WORKERS, limiter=None):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.limiter = limiter or RateLimiter()
+        self.queue = asyncio.PriorityQueue()
+        self.pending = set()
+        self.running = 0
+        self.counts = Counter()
+        self.order = itertools.count()
+        self.tasks = []
+
+    def start(self):
+        self.tasks = [asyncio.ensure_future(self.work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def join(self):
+        """Waits until everything submitted so far has been sent or has failed"""
+        await self.queue.join()
+
+    def submit(self, key, job, priority=NORMAL):
+        """Queues job unless key is already pending. Returns False for a duplicate, raises QueueFull."""
+        if key in self.pending:
+            self.counts["deduped"] += 1
+            return False
+        if self.queue.qsize() >= self.maxsize:
+            self.counts["rejected"] += 1
+            raise QueueFull()
+        self.pending.add(key)
+        self.counts["submitted"] += 1
+        self.queue.put_nowait((priority, next(self.order), key, job, time.perf_counter(), 0))
+        return True
+
+    async def work(self):
+        while True:
+            entry = await self.queue.get()
+            try:
+                await self.run(entry)
+            finally:
+                self.queue.task_done()
+
+    async def run(self, entry):
+        priority, order, key, job, submitted, attempt = entry
+        if attempt == 0:
+            bot_metrics.STATS.record("send_wait", time.perf_counter() - submitted)
+        self.running += 1
+        try:
+            await job()
+        except RetryAfter as e:
+            if attempt < MAX_RETRIES:
+                self.counts["retried"] += 1
+                self.limiter.pause(retry_seconds(e))
+                self.queue.put_nowait((priority, order, key, job, submitted, attempt + 1))
+                return
+            self.counts["failed"] += 1
+            logger.error(f"Send {key} gave up after {attempt + 1} flood waits")
+        except Exception as e:
+            self.counts["failed"] += 1
+            logger.error(f"Send {key} failed: {e}")
+        else:
+            self.counts["sent"] += 1
+        finally:
+            self.running -= 1
+        self.pending.discard(key)
+
+    def metrics(self):
+        return {
+            "queued": self.queue.qsize(), "running": self.running, "capacity": self.maxsize,
+            **{k: self.counts[k] for k in ("submitted", "sent", "failed", "retried", "deduped", "rejected")},
+        }
@@ -0,0 +1,67 @@
+import os
+import uuid
+from hashlib import blake2b
+
+# --- CONFIG ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SEND_CACHE_DIR = os.environ.get("SEND_CACHE_DIR") or os.path.join(BASE_DIR, ".send_cache")
+SEND_CACHE_MB = int(os.environ.get("SEND_CACHE_MB", "200"))
+
+class SentFileCache:
+    """Recently sent documents on disk, one <content hash>.pdf each, least recently used evicted first.
+
+    A file's mtime is its last use. Stays under max_bytes, except that the file just
+    stored is never evicted, however big it is.
+    """
+    def __init__(self, path=SEND_CACHE_DIR, max_bytes=SEND_CACHE_MB * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+    def file_path(self, digest):
+        return os.path.join(self.path, f"{digest}.pdf")
+
+    def get(self, digest):
+        """Path of the cached copy, marked as just used; None if it is not (or no longer) cached"""
+        path = self.file_path(digest)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    async def store(self, chunks):
+        """Writes an async iterable of byte chunks (a streamed response body) into the cache.
+        Returns (content hash, path); the body is never held in memory whole."""
+        h = blake2b(digest_size=16)
+        tmp_path = os.path.join(self.path, f".{uuid.uuid4().hex}.tmp")
+        try:
+            # Page-cache writes of one network chunk are short enough to do on the loop
+            with open(tmp_path, "wb") as f:
+                async for chunk in chunks:
+                    h.update(chunk)
+                    f.write(chunk)
+            digest = h.hexdigest()
+            os.replace(tmp_path, self.file_path(digest))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict(keep=digest)
+        return digest, self.file_path(digest)
+
+    def evict(self, keep=None):
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".pdf") and entry.name != f"{keep}.pdf":
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        if keep and os.path.exists(self.file_path(keep)):
+            total += os.path.getsize(self.file_path(keep))
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes: break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -2,16 +2,19 @@ import os
 import logging
 import urllib.parse
 import asyncio
-import requests
-import io
+import aiohttp
 import sys
-from threading import Thread
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from aiohttp import web
 
 # Telegram Imports
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
 from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler, CallbackQueryHandler
+from file_id_cache import FileIdCache, send_cached
+from sent_files import SentFileCache
+from send_queue import SendQueue, RateLimiter, QueueFull, HIGH, NORMAL
+import bot_metrics
+import bot_web
 
 # Force UTF-8 encoding for Render logs and strings
 sys.stdout.reconfigure(encoding='utf-8')
@@ -19,74 +22,132 @@ sys.stdout.reconfigure(encoding='utf-8')
 # --- CONFIG ---
 TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
 ALLOWED_USER_ID = int(os.environ.get("ALLOWED_USER_ID", 7349230382))
-MERGED_PDF_DIR = os.path.join("Merged", "PDF")
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MERGED_PDF_DIR = os.path.join(BASE_DIR, "Merged", "PDF")
+FETCH_TIMEOUT = aiohttp.ClientTimeout(total=120, sock_connect=10, sock_read=30)
+FETCH_CHUNK = 64 * 1024
 
-# Global variables for cross-thread communication
+# Set up in __main__ and post_init
 application = None
 loop = None
+file_ids = None
+sent_files = None
+http_session = None
+web_runner = None
+send_queue = None
+# Every send_document call waits its turn here (Telegram's per-chat and global limits)
+rate_limiter = RateLimiter()
 
 logging.basicConfig(level=logging.INFO)
 
 # --- WEB SERVER / API ENDPOINT ---
-class HealthCheckHandler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-
-    def do_GET(self):
-        if self.path == "/":
-            self.send_response(200)
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(b"Krok Bot API Active")
-            return
-
-        if self.path.startswith("/send"):
-            query = urllib.parse.urlparse(self.path).query
-            params = urllib.parse.parse_qs(query)
-            uid = params.get('user_id', [None])[0]
-            file_url = params.get('url', [None])[0]
-            file_name = params.get('name', [None])[0]
-
-            if uid and file_url and int(uid) == ALLOWED_USER_ID:
-                if loop and application:
-                    asyncio.run_coroutine_threadsafe(
-                        self.download_and_send(int(uid), file_url, file_name),
-                        loop
-                    )
-                    self.send_response(200)
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(b"OK")
-                    return
-
-            self.send_response(400)
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(b"Error")
-
-    async def download_and_send(self, chat_id, url, name):
+CORS_HEADERS = {'Access-Control-Allow-Origin': '*'}
+PREFLIGHT_HEADERS = {
+    **CORS_HEADERS,
+    'Access-Control-Allow-Methods': 'GET, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type',
+}
+async def handle_root(request):
+    return web.Response(text="Krok Bot API Active", headers=CORS_HEADERS)
+
+async def handle_preflight(request):
+    return web.Response(headers=PREFLIGHT_HEADERS)
+
+async def handle_send(request):
+    uid = request.query.get('user_id')
+    file_url = request.query.get('url')
+    file_name = request.query.get('name')
+
+    if uid and uid.isdigit() and file_url and int(uid) == ALLOWED_USER_ID and send_queue:
+        # Answered right away; the send waits its turn in the queue. Asking again for
+        # a file that is still queued is answered OK without queueing it twice.
+        chat_id = int(uid)
         try:
-            r = requests.get(url, timeout=20)
-            if r.status_code == 200:
-                pdf_file = io.BytesIO(r.content)
-                display_name = name if name.lower().endswith(".pdf") else f"{name}.pdf"
-                pdf_file.name = display_name
-                await application.bot.send_document(
-                    chat_id=chat_id, 
-                    document=pdf_file, 
-                    caption=f"📄 {display_name}"
-                )
-        except Exception as e:
-            logging.error(f"Download/Send failed: {e}")
-
-def run_server():
-    port = int(os.environ.get("PORT", 10000))
-    server = HTTPServer(("0.0.0.0", port), HealthCheckHandler)
-    server.serve_forever()
+            send_queue.submit((chat_id, file_url), lambda: download_and_send(chat_id, file_url, file_name),
+                              send_priority(file_url))
+        except QueueFull:
+            return web.Response(status=503, text="Busy", headers=CORS_HEADERS)
+        return web.Response(text="OK", headers=CORS_HEADERS)
+
+    return web.Response(status=400, text="Error", headers=CORS_HEADERS)
+
+def send_priority(url):
+    """Files already uploaded go out by file_id in one cheap call, so they skip ahead of uploads"""
+    known = file_ids.url_entry(url)
+    return HIGH if known and file_ids.get(application.bot.id, known[2]) else NORMAL
+
+def queue_depth():
+    return send_queue.metrics() if send_queue else {}
+
+WEB_ROUTES = [
+    web.get("/", handle_root),
+    web.get("/send", handle_send),
+    # Preflight is answered on any path, as the old handler did
+    web.options("/{tail:.*}", handle_preflight),
+    bot_web.metrics_route(queue_depth),
+]
+
+def local_pdf(url):
+    """The Merged/PDF file a URL of this repo's site (or raw GitHub copy) points at, None otherwise"""
+    path = urllib.parse.unquote(urllib.parse.urlparse(url).path)
+    folder, _, name = path.rpartition("/")
+    if not folder.endswith("/Merged/PDF") or not name.lower().endswith(".pdf"):
+        return None
+    local = os.path.join(MERGED_PDF_DIR, name)
+    return local if os.path.isfile(local) else None
+
+async def fetch_pdf(url, revalidate=True):
+    """(content hash, local path) of a PDF URL, streamed to disk, never buffered whole.
+
+    Our own Merged/PDF files are used in place. Otherwise the body lands in the sent-file
+    cache; revalidating against the last fetch, a 304 costs no download, and the path is
+    None if that copy has since been evicted.
+    """
+    local = local_pdf(url)
+    if local:
+        digest = await loop.run_in_executor(None, file_ids.path_digest, local)
+        file_ids.put_url(url, None, None, digest)
+        return digest, local
+    known = file_ids.url_entry(url) if revalidate else None
+    headers = {}
+    if known and known[0]: headers['If-None-Match'] = known[0]
+    if known and known[1]: headers['If-Modified-Since'] = known[1]
+    async with http_session.get(url, headers=headers) as r:
+        if r.status == 304 and known:
+            return known[2], sent_files.get(known[2])
+        r.raise_for_status()
+        digest, path = await sent_files.store(r.content.iter_chunked(FETCH_CHUNK))
+        file_ids.put_url(url, r.headers.get('ETag'), r.headers.get('Last-Modified'), digest)
+    return digest, path
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+@bot_metrics.timed("send")
+async def download_and_send(chat_id, url, name):
+    """A send_queue job: failures (RetryAfter included) propagate to the queue, which retries or logs them"""
+    display_name = name if name.lower().endswith(".pdf") else f"{name}.pdf"
+    digest, path = await fetch_pdf(url)
+
+    async def load():
+        nonlocal path
+        if path is None:
+            # 304, but the copy was evicted and the file_id had to be re-uploaded
+            _, path = await fetch_pdf(url, revalidate=False)
+        return await loop.run_in_executor(None, read_bytes, path)
+
+    async def send(document):
+        await rate_limiter.acquire(chat_id)
+        return await application.bot.send_document(
+            chat_id=chat_id,
+            document=document,
+            filename=display_name,
+            caption=f"📄 {display_name}"
+        )
+
+    # Sent before: goes out by file_id, nothing is uploaded
+    await send_cached(file_ids, application.bot.id, digest, send, load, display_name)
 
 async def start_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id == ALLOWED_USER_ID:
@@ -95,16 +156,30 @@ async def start_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("⛔ Доступ заборонено.")
 
 async def post_init(app):
-    global loop
+    global loop, http_session, web_runner, send_queue
     loop = asyncio.get_running_loop()
-    print("📍 Event loop captured.")
+    # One session for every download: connections to the site are kept alive and reused
+    http_session = aiohttp.ClientSession(timeout=FETCH_TIMEOUT)
+    send_queue = SendQueue(limiter=rate_limiter)
+    send_queue.start()
+    # The API shares the bot's loop: /send queues its send right here
+    web_runner = await bot_web.start_server(WEB_ROUTES)
+    print("📍 Event loop captured, API listening.")
+
+async def post_shutdown(app):
+    if web_runner:
+        await web_runner.cleanup()
+    if send_queue:
+        await send_queue.stop()
+    if http_session:
+        await http_session.close()
 
 if __name__ == '__main__':
-    # Start Web Server thread
-    Thread(target=run_server, daemon=True).start()
+    file_ids = FileIdCache()
+    sent_files = SentFileCache()
 
     # Initialize Application
-    application = ApplicationBuilder().token(TOKEN).post_init(post_init).build()
+    application = ApplicationBuilder().token(TOKEN).post_init(post_init).post_shutdown(post_shutdown).build()
     application.add_handler(CommandHandler('start', start_cmd))
 
     print("🚀 Starting Bot Polling...")
@@ -0,0 +1,122 @@
+"""A local stand-in Moodle for daily_scraper's HttpSession, served from tests/fixtures/moodle.
+
+Covers the pages one scrape walks through: login (logintoken + session cookie),
+course page, quiz view → startattempt → attempt → summary → processattempt → review
+(paged, then showall=1). The first attempt at a quiz reviews review-1.html, every
+later one review-2.html.
+
+    site = FakeMoodle().start()
+    daily_scraper.LOGIN_URL = site.url("/login/index.php")
+"""
+import os
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "moodle")
+USERNAME = "student"
+PASSWORD = "secret"
+COOKIE = "MoodleSession=fixture"
+
+def page(name, **fields):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        text = f.read()
+    # Plain replace: the pages have JSON braces of their own
+    for key, value in fields.items():
+        text = text.replace("{" + key + "}", str(value))
+    return text
+
+class FakeMoodle:
+    def __init__(self):
+        self.attempts = Counter()
+        self.attempt_cmid = {}
+        self.requests = Counter()
+        self.server = None
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    def start(self):
+        site = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.handle(self, "GET")
+            def do_POST(self):
+                site.handle(self, "POST")
+            def log_message(self, *args):
+                pass
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # --- ROUTES ---
+    def handle(self, request, method):
+        parts = urlsplit(request.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        form = {}
+        if method == "POST":
+            length = int(request.headers.get("Content-Length") or 0)
+            form = {k: v[0] for k, v in parse_qs(request.rfile.read(length).decode("utf-8")).items()}
+        self.requests[parts.path] += 1
+        logged_in = COOKIE in (request.headers.get("Cookie") or "")
+
+        if parts.path == "/login/index.php":
+            if method == "GET":
+                if logged_in:
+                    return self.redirect(request, "/my/")
+                return self.html(request, page("login.html", error=""))
+            if (form.get("logintoken"), form.get("username"), form.get("password")) == ("fixture-login-token", USERNAME, PASSWORD):
+                return self.redirect(request, "/my/", cookie=COOKIE)
+            error = '<div class="alert alert-danger" id="loginerrormessage">Invalid login, please try again</div>'
+            return self.html(request, page("login.html", error=error))
+        if not logged_in:
+            return self.redirect(request, "/login/index.php")
+
+        if parts.path == "/my/":
+            return self.html(request, "<html><body><div id=\"page-footer\"></div></body></html>")
+        if parts.path == "/course/view.php":
+            return self.html(request, page("course.html"))
+        if parts.path == "/mod/quiz/view.php":
+            return self.html(request, page("view.html", cmid=query["id"]))
+        if parts.path == "/mod/quiz/startattempt.php" and form.get("sesskey") == "fixture-sesskey":
+            cmid = form["cmid"]
+            self.attempts[cmid] += 1
+            attempt = len(self.attempt_cmid) + 1
+            self.attempt_cmid[attempt] = (cmid, self.attempts[cmid])
+            return self.redirect(request, f"/mod/quiz/attempt.php?attempt={attempt}&cmid={cmid}")
+        if parts.path == "/mod/quiz/attempt.php":
+            return self.html(request, page("attempt.html", **query))
+        if parts.path == "/mod/quiz/summary.php":
+            return self.html(request, page("summary.html", **query))
+        if parts.path == "/mod/quiz/processattempt.php" and form.get("finishattempt") == "1":
+            return self.redirect(request, f"/mod/quiz/review.php?attempt={form['attempt']}&cmid={form['cmid']}")
+        if parts.path == "/mod/quiz/review.php":
+            if query.get("showall") != "1":
+                return self.html(request, page("review-paged.html", **query))
+            _, round_num = self.attempt_cmid[int(query["attempt"])]
+            return self.html(request, page("review-1.html" if round_num == 1 else "review-2.html"))
+        self.send(request, 404, "text/plain", "Not found")
+
+    def html(self, request, text):
+        self.send(request, 200, "text/html; charset=utf-8", text)
+
+    def redirect(self, request, path, cookie=None):
+        headers = {"Location": path}
+        if cookie:
+            headers["Set-Cookie"] = cookie + "; Path=/"
+        self.send(request, 303, "text/plain", "", headers)
+
+    def send(self, request, status, content_type, text, headers=None):
+        body = text.encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            request.send_header(key, value)
+        request.end_headers()
+        request.wfile.write(body)
@@ -0,0 +1,139 @@
+import os
+from queue import Queue
+
+import pytest
+
+import daily_scraper
+from daily_scraper import DailyKrokScraper, HttpSession
+from questions import fingerprint
+from question_store import save_aliases
+from fake_moodle import FakeMoodle, USERNAME, PASSWORD
+
+QUIZZES = [
+    {"name": "Крок 1 Фармація", "link": "/mod/quiz/view.php?id=7"},
+    {"name": "Крок 2 Медицина", "link": "/mod/quiz/view.php?id=8"},
+]
+
+@pytest.fixture
+def moodle(tmp_path, monkeypatch):
+    site = FakeMoodle().start()
+    monkeypatch.setattr(daily_scraper, "LOGIN_URL", site.url("/login/index.php"))
+    monkeypatch.setattr(daily_scraper, "COURSE_URL", site.url("/course/view.php?id=4"))
+    monkeypatch.setattr(daily_scraper, "USERNAME", USERNAME)
+    monkeypatch.setattr(daily_scraper, "PASSWORD", PASSWORD)
+    monkeypatch.setattr(daily_scraper, "MERGED_TXT_DIR", str(tmp_path / "Merged" / "TXT"))
+    monkeypatch.setattr(daily_scraper, "ALIASES_FILE", str(tmp_path / "Merged" / "aliases.json"))
+    monkeypatch.setattr(daily_scraper, "REVIEW_DUMP_DIR", None)
+    # The date folders are created in the working directory
+    monkeypatch.chdir(tmp_path)
+    yield site
+    site.stop()
+
+def quiz(site, n):
+    return {"name": QUIZZES[n]["name"], "link": site.url(QUIZZES[n]["link"])}
+
+def logged_in_session():
+    session = HttpSession()
+    session.init_driver()
+    assert session.login()
+    return session
+
+def test_login_and_quiz_list(moodle):
+    session = logged_in_session()
+    assert sorted(session.get_all_tests(), key=lambda q: q["name"]) == [quiz(moodle, 0), quiz(moodle, 1)]
+    session.close()
+
+def test_login_with_a_wrong_password_fails(moodle, monkeypatch):
+    monkeypatch.setattr(daily_scraper, "PASSWORD", "wrong")
+    session = HttpSession()
+    session.init_driver()
+    assert not session.login()
+    session.close()
+
+def test_process_quiz_saves_every_question_once(moodle):
+    scraper = DailyKrokScraper(engine="http")
+    session = logged_in_session()
+    assert scraper.process_quiz(session, quiz(moodle, 0))
+    session.close()
+
+    # Round 2 brings one new question and recaptures two, so the estimate says the bank is done
+    assert moodle.attempts["7"] == 2
+    with open(os.path.join(scraper.txt_folder, "Крок 1 Фармація.txt"), encoding="utf-8") as f:
+        saved = f.read()
+    assert saved == (
+        "1. Який препарат єантидотомпри отруєнні морфіном?\n*a. Налоксон\nb. Атропін\nc. Унітіол\n\n"
+        "2. Whatis the mainbuffersystem of blood?\n*a. Bicarbonate\nb. Phosphate\nc. Protein\n\n"
+        "3. Вкажіть фермент, що розщеплює крохмаль у ротовій порожнині:\na. Ліпаза\n*b. Амілаза\nc. Пепсин\n\n"
+        "4. Which vitamin deficiency causesscorbutus?\na. Vitamin A\nb. Vitamin D\n*c. Vitamin C\n\n"
+    )
+    assert [path for _, path in scraper.pdf_jobs] == [os.path.join(scraper.pdf_folder, "Крок 1 Фармація.pdf")]
+
+def test_questions_in_the_master_are_not_collected_again(moodle, tmp_path):
+    master = tmp_path / "Merged" / "TXT" / "Крок 1 Фармація.txt"
+    master.parent.mkdir(parents=True)
+    master.write_text("1. Вкажіть фермент, що розщеплює крохмаль у ротовій порожнині:\na. Ліпаза\n*b. Амілаза\n\n",
+                      encoding="utf-8")
+    scraper = DailyKrokScraper(engine="http")
+    session = logged_in_session()
+    assert scraper.process_quiz(session, quiz(moodle, 0))
+    session.close()
+    with open(os.path.join(scraper.txt_folder, "Крок 1 Фармація.txt"), encoding="utf-8") as f:
+        saved = f.read()
+    assert "крохмаль" not in saved
+    assert saved.count("\n\n") == 3
+
+def test_a_corrected_answer_is_collected_again(moodle, tmp_path):
+    master = tmp_path / "Merged" / "TXT" / "Крок 1 Фармація.txt"
+    master.parent.mkdir(parents=True)
+    master.write_text("1. Вкажіть фермент, що розщеплює крохмаль у ротовій порожнині:\n*a. Ліпаза\nb. Амілаза\n\n",
+                      encoding="utf-8")
+    scraper = DailyKrokScraper(engine="http")
+    session = logged_in_session()
+    assert scraper.process_quiz(session, quiz(moodle, 0))
+    session.close()
+    with open(os.path.join(scraper.txt_folder, "Крок 1 Фармація.txt"), encoding="utf-8") as f:
+        saved = f.read()
+    # Sent on to the merge with Moodle's answer, which replaces the master's block
+    assert "крохмаль у ротовій порожнині:\na. Ліпаза\n*b. Амілаза\nc. Пепсин\n\n" in saved
+    assert saved.count("\n\n") == 4
+
+def test_collapsed_variants_are_not_collected_again(moodle, tmp_path):
+    master = tmp_path / "Merged" / "TXT" / "Крок 1 Фармація.txt"
+    master.parent.mkdir(parents=True)
+    master.write_text("1. Вкажіть фермент, що розщеплює крохмаль:\na. Ліпаза\n*b. Амілаза\n\n", encoding="utf-8")
+    variant = fingerprint("Вкажіть фермент, що розщеплює крохмаль у ротовій порожнині:")
+    save_aliases({"Крок 1 Фармація.txt": {variant: fingerprint("Вкажіть фермент, що розщеплює крохмаль:")}},
+                 str(tmp_path / "Merged" / "aliases.json"))
+    scraper = DailyKrokScraper(engine="http")
+    assert variant in scraper.known_fingerprints("Крок 1 Фармація")
+
+def test_concurrency_follows_the_worker_count(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(daily_scraper, "MAX_CONCURRENCY", 0)
+    assert DailyKrokScraper(workers=4).max_concurrency == 4
+    assert DailyKrokScraper(workers=4, max_concurrency=2).max_concurrency == 2
+    monkeypatch.setattr(daily_scraper, "MAX_CONCURRENCY", 3)
+    assert DailyKrokScraper(workers=4).max_concurrency == 3
+
+class CrashingSession(HttpSession):
+    """Every round fails and the driver cannot be started again (Chrome gone for good)"""
+    def play_round(self, *args):
+        raise RuntimeError("chrome not reachable")
+
+    def init_driver(self):
+        raise RuntimeError("session not created")
+
+def test_worker_keeps_going_when_a_restart_fails(moodle, monkeypatch):
+    monkeypatch.setattr(daily_scraper.time, "sleep", lambda seconds: None)
+    scraper = DailyKrokScraper(engine="http")
+    session = CrashingSession()
+    HttpSession.init_driver(session)
+    assert session.login()
+
+    queue = Queue()
+    for i in range(2):
+        queue.put((i, quiz(moodle, i)))
+    scraper.worker_loop(session, queue, 2)
+
+    assert queue.empty()
+    assert scraper.failed == [QUIZZES[0]["name"], QUIZZES[1]["name"]]
@@ -0,0 +1,73 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from telegram.error import BadRequest
+
+import multi_bot
+
+class FakeQuery:
+    """A callback query the way Telegram treats it: it can be answered only once"""
+    def __init__(self, data):
+        self.data = data
+        self.answers = []
+        self.edited = None
+
+    async def answer(self, text=None, show_alert=False):
+        if self.answers:
+            raise BadRequest("Query is too old and response timeout expired or query id is invalid")
+        self.answers.append((text, show_alert))
+
+    async def edit_message_text(self, text, reply_markup=None, parse_mode=None):
+        self.edited = text
+
+class FakeUpdate:
+    def __init__(self, data):
+        self.callback_query = FakeQuery(data)
+        self.message = None
+        self.effective_user = type("User", (), {"id": multi_bot.MY_ID})
+
+class FakeContext:
+    user_data = {}
+
+def click(data):
+    update = FakeUpdate(data)
+    asyncio.run(multi_bot.handle_callback(update, FakeContext()))
+    return update.callback_query
+
+def test_stale_id_alerts_once_and_returns_to_the_menu():
+    for data in ("C|gone", "M|gone|0", "F|gone"):
+        query = click(data)
+        assert query.answers == [("Цей розділ більше не існує", True)]
+        assert "Оберіть категорію" in query.edited
+
+def test_known_id_is_answered_once():
+    query = click("root")
+    assert query.answers == [(None, False)]
+    assert "Оберіть категорію" in query.edited
+
+def test_catalog_signature_sees_a_legacy_pdf_rewritten_in_place(tmp_path, monkeypatch):
+    monkeypatch.setattr(multi_bot, "BASE_DIR", str(tmp_path))
+    merged = tmp_path / "Старше ЦТ" / "Крок 1" / "PDF"
+    merged.mkdir(parents=True)
+    pdf = merged / "2019.pdf"
+    pdf.write_bytes(b"%PDF-1")
+    before = multi_bot.catalog_signature()
+    # Same name, so the directory's own mtime stays put
+    pdf.write_bytes(b"%PDF-1 with more pages")
+    assert multi_bot.catalog_signature() != before
+
+def test_health_is_answered_on_any_path():
+    class FakeApp:
+        update_queue = asyncio.Queue()
+    async def test():
+        app = web.Application()
+        app.add_routes(multi_bot.health_routes(FakeApp()))
+        async with TestClient(TestServer(app)) as client:
+            for path in ("/", "/healthz", "/some/deep/path"):
+                response = await client.get(path)
+                assert (response.status, await response.text()) == (200, "Krok Master Bot is Alive")
+            assert (await client.head("/healthz")).status == 200
+            response = await client.get("/metrics")
+            assert (await response.json())["queue"]["updates_waiting"] == 0
+    asyncio.run(test())
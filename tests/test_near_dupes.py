@@ -0,0 +1,35 @@
+import os
+import sys
+import subprocess
+
+import near_dupes
+
+BASE = ("Which of the following drugs is {}used to treat hypertension in pregnant women "
+        "with severe preeclampsia and headache\n*a. Methyldopa\nb. Captopril\nc. Losartan")
+
+def test_english_negation_is_not_safe():
+    pairs = near_dupes.find_duplicates([(1, BASE.format("")), (2, BASE.format("not "))], threshold=0.5)
+    assert len(pairs) == 1
+    assert not pairs[0].safe
+
+def test_latin_homoglyphs_fold_to_cyrillic():
+    cyrillic = "Хворий скаржиться на біль у грудях після фізичного навантаження протягом тижня\n*a. Стенокардія\nb. Інфаркт"
+    mixed = cyrillic.replace("Х", "X").replace("о", "o", 2)
+    pairs = near_dupes.find_duplicates([(1, cyrillic), (2, mixed)])
+    assert [(p.keep, p.drop, p.similarity, p.safe) for p in pairs] == [(1, 2, 1.0, True)]
+
+def test_only_real_lowercase_lookalikes_fold():
+    assert near_dupes.match_text("the MK") == "thе mk"  # only the e is a look-alike
+    assert near_dupes.match_text("Xoca") == "хоса"
+
+def test_negations_read_before_homoglyph_folding():
+    assert near_dupes.negations("Which is NOT correct?") == {"not"}
+    assert near_dupes.negations("Що з переліченого не є причиною") == {"не"}
+
+def test_signature_is_the_same_in_every_process():
+    code = ("import near_dupes; print(near_dupes.signature(near_dupes.shingles("
+            "near_dupes.block_key('Which drug is used to treat hypertension'))))")
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(near_dupes.__file__))
+    runs = {subprocess.run([sys.executable, "-c", code], env=dict(env, PYTHONHASHSEED=seed),
+                           capture_output=True, text=True, check=True).stdout for seed in ("1", "2")}
+    assert len(runs) == 1
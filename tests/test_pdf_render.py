@@ -0,0 +1,68 @@
+"""Golden PDFs: render_pdf output compared byte for byte.
+
+reportlab's invariant mode leaves out the creation date and random document id, so the
+same input always gives the same bytes. The goldens are tied to the reportlab version
+they were made with; after an upgrade (or a deliberate change to the layout), check a
+few pages by eye and rewrite them with
+
+    KROK_UPDATE_GOLDEN=1 python -m pytest tests/test_pdf_render.py
+"""
+import os
+
+import pytest
+import reportlab
+from reportlab import rl_config
+
+import pdf_render
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pdf")
+GOLDEN_REPORTLAB = "5.0.1"
+UPDATE = os.environ.get("KROK_UPDATE_GOLDEN") == "1"
+
+QUESTIONS = [
+    "Який препарат є антидотом при отруєнні морфіном?\n*a. Налоксон\nb. Атропін\nc. Унітіол",
+    "What is the main buffer system of blood?\na. Phosphate\n*b. Bicarbonate\nc. Protein\nd. Hemoglobin",
+    ("Хворий 45 років скаржиться на біль за грудниною, що виникає під час фізичного навантаження і "
+     "минає у спокої через 3-5 хвилин після прийому нітрогліцерину. Який найбільш імовірний діагноз?\n"
+     "a. Інфаркт міокарда\n*b. Стабільна стенокардія напруги\nc. Міокардит\nd. Перикардит\ne. ТЕЛА"),
+]
+# Enough questions for page breaks, including a question split across two pages
+MANY = [f"Питання номер {n} про фармакологію та біохімію?\n*a. Відповідь {n}\nb. Інша\nc. Ще одна"
+        for n in range(1, 61)]
+
+CASES = {
+    "plain": (QUESTIONS, {}),
+    "colored": (QUESTIONS, {"colored_text": True}),
+    "pages": (MANY, {"first_number": 501}),
+}
+
+@pytest.fixture(autouse=True)
+def invariant(monkeypatch):
+    if reportlab.Version != GOLDEN_REPORTLAB and not UPDATE:
+        pytest.skip(f"goldens were rendered with reportlab {GOLDEN_REPORTLAB}, this is {reportlab.Version}")
+    monkeypatch.setattr(rl_config, "invariant", 1)
+    pdf_render.setup_font()
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_render_matches_golden(case, tmp_path):
+    records, options = CASES[case]
+    out = tmp_path / f"{case}.pdf"
+    pages, spans = pdf_render.render_pdf(iter(records), str(out), **options)
+    golden = os.path.join(GOLDEN_DIR, f"{case}.pdf")
+    if UPDATE:
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        with open(golden, "wb") as f:
+            f.write(out.read_bytes())
+    with open(golden, "rb") as f:
+        assert out.read_bytes() == f.read(), f"{case}.pdf differs from tests/fixtures/pdf/{case}.pdf"
+    assert len(spans) == len(records)
+    assert spans[-1][1] == pages
+
+def test_page_spans():
+    records, options = CASES["pages"]
+    pages, spans = pdf_render.render_pdf(iter(records), os.devnull, **options)
+    assert pages > 1
+    assert spans[0] == (1, 1)
+    assert all(first <= last and last - first <= 1 for first, last in spans)
+    assert any(first < last for first, last in spans)
+    assert [first for first, _ in spans] == sorted(first for first, _ in spans)
@@ -0,0 +1,32 @@
+import os
+import glob
+
+import pytest
+
+from question_extractor import available_backends, extract_questions, iter_questions
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PAGES = sorted(glob.glob(os.path.join(FIXTURES, "*.html")) + glob.glob(os.path.join(FIXTURES, "moodle", "review-*.html")))
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("page", PAGES, ids=os.path.basename)
+def test_backends_match_beautifulsoup(backend, page):
+    html = read(page)
+    assert extract_questions(html, backend) == extract_questions(html, "bs4")
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_skip_matches_beautifulsoup(backend):
+    html = read(os.path.join(FIXTURES, "review-markup.html"))
+    skip = lambda q_text: q_text.startswith("What")
+    assert list(iter_questions(html, skip, backend)) == list(iter_questions(html, skip, "bs4"))
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_comments_and_scripts_split_text_nodes(backend):
+    first = extract_questions(read(os.path.join(FIXTURES, "review-markup.html")), backend)[0]
+    assert first.q_text == "Whatis themainbuffer of blood?"
+    assert first.options[0] == ("a.", "BicarbonateHCO3")
+    assert first.correct == "BicarbonateHCO3"
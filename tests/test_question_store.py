@@ -0,0 +1,72 @@
+from question_store import QuestionStore, load_aliases
+
+MASTER = "Крок 1.txt"
+
+def block(n, question, correct="a"):
+    options = "\n".join(("*" if letter == correct else "") + f"{letter}. {question} {letter}" for letter in "abc")
+    return f"{n}. {question}\n{options}"
+
+def write_txt(path, *questions):
+    path.write_text("\n\n".join(block(n, q) for n, q in enumerate(questions, 1)) + "\n\n", encoding="utf-8")
+
+def texts(store, name=MASTER):
+    return [body.split("\n")[0] for body in store.iter_bodies(name)]
+
+def test_export_then_unchanged_txt_is_not_reimported(tmp_path):
+    txt = tmp_path / MASTER
+    with QuestionStore(str(tmp_path / "q.db")) as store:
+        store.upsert_blocks(MASTER, [block(1, "Q1")[3:], block(2, "Q2")[3:]])
+        store.export_txt(MASTER, str(txt))
+        store.upsert_blocks(MASTER, [block(3, "Q3")[3:]])
+        assert store.import_txt(MASTER, str(txt)) == 0
+        assert texts(store) == ["Q1", "Q2", "Q3"]
+
+def test_edited_txt_replaces_the_quiz(tmp_path):
+    txt = tmp_path / MASTER
+    with QuestionStore(str(tmp_path / "q.db")) as store:
+        store.upsert_blocks(MASTER, [block(1, "Q1")[3:], block(2, "Q2")[3:]], seen="2024-01-01")
+        store.export_txt(MASTER, str(txt))
+        # A hand edit: Q1 deleted, Q3 added in front, Q2 reworded
+        txt.write_text(block(1, "Q3") + "\n\n2. Q2\n*a. new wording\nb. other\n\n", encoding="utf-8")
+        assert store.import_txt(MASTER, str(txt)) == 1
+        assert texts(store) == ["Q3", "Q2"]
+        assert "new wording" in list(store.iter_bodies(MASTER))[1]
+        # The exported TXT is what was uploaded, question for question
+        store.export_txt(MASTER, str(tmp_path / "out.txt"))
+        assert (tmp_path / "out.txt").read_text(encoding="utf-8") == txt.read_text(encoding="utf-8")
+        first_seen = store.db.execute("SELECT first_seen FROM questions WHERE text = 'Q2'").fetchone()[0]
+        assert first_seen == "2024-01-01"
+
+def test_missing_txt_keeps_the_store(tmp_path):
+    with QuestionStore(str(tmp_path / "q.db")) as store:
+        store.upsert_blocks(MASTER, [block(1, "Q1")[3:]])
+        assert store.import_txt(MASTER, str(tmp_path / "missing.txt")) == 0
+        assert texts(store) == ["Q1"]
+
+def test_replace_blocks_keeps_first_place_and_last_body(tmp_path):
+    with QuestionStore(str(tmp_path / "q.db")) as store:
+        store.upsert_blocks(MASTER, [block(1, "Old")[3:]])
+        added = store.replace_blocks(MASTER, ["A\n*a. one", "B\n*a. two", "A\n*b. three"])
+        assert added == 2
+        assert list(store.iter_bodies(MASTER)) == ["A\n*b. three", "B\n*a. two"]
+        assert store.question_count(MASTER) == 2
+
+def test_aliases_survive_a_rebuilt_database(tmp_path):
+    import near_dupes
+    txt = tmp_path / MASTER
+    variant = "Which drug is the antidote of morphine?\n*a. Naloxone\nb. Atropine"
+    original = "Which drug is the antidote of morphine ?\n*a. Naloxone\nb. Atropine"
+    with QuestionStore(str(tmp_path / "q.db")) as store:
+        store.upsert_blocks(MASTER, [original, variant, block(3, "Other")[3:]])
+        pairs = near_dupes.find_duplicates(list(store.iter_questions(MASTER)))
+        assert near_dupes.collapse(store, MASTER, pairs) == 1
+        store.export_txt(MASTER, str(txt))
+    aliases = load_aliases(str(tmp_path / "aliases.json"))
+    assert list(aliases) == [MASTER] and len(aliases[MASTER]) == 1
+
+    # A fresh database (a CI run without the cache) gets the alias back from aliases.json
+    with QuestionStore(str(tmp_path / "fresh.db")) as store:
+        store.import_txt(MASTER, str(txt))
+        assert store.aliases(MASTER) == aliases[MASTER]
+        assert store.upsert_blocks(MASTER, [variant]) == 0
+        assert texts(store) == ["Which drug is the antidote of morphine ?", "Other"]
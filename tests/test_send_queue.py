@@ -0,0 +1,138 @@
+import time
+import asyncio
+
+import pytest
+from telegram import Bot
+
+import send_queue
+from fake_bot_api import FakeBotApi
+from send_queue import SendQueue, RateLimiter, QueueFull
+
+def run(coro):
+    return asyncio.run(coro)
+
+async def with_bot(test, **api_options):
+    api = await FakeBotApi(latency=0, **api_options).start()
+    try:
+        async with Bot("123:fake", base_url=api.base_url, base_file_url=api.base_file_url) as bot:
+            return await test(api, bot)
+    finally:
+        await api.stop()
+
+def open_limiter():
+    return RateLimiter(per_chat_burst=10 ** 6, global_burst=10 ** 6)
+
+def sender(bot, limiter, chat_id, text):
+    async def send():
+        await limiter.acquire(chat_id)
+        await bot.send_message(chat_id, text)
+    return send
+
+def test_duplicate_key_is_queued_once():
+    async def test(api, bot):
+        limiter = open_limiter()
+        queue = SendQueue(workers=1, limiter=limiter)
+        assert queue.submit((1, "a.pdf"), sender(bot, limiter, 1, "a"))
+        assert not queue.submit((1, "a.pdf"), sender(bot, limiter, 1, "a again"))
+        assert queue.submit((2, "a.pdf"), sender(bot, limiter, 2, "a"))
+        queue.start()
+        await queue.join()
+        # Once sent, the same key may be queued again
+        assert queue.submit((1, "a.pdf"), sender(bot, limiter, 1, "a later"))
+        await queue.join()
+        await queue.stop()
+        assert [text for _, _, text in api.sent] == ["a", "a", "a later"]
+        m = queue.metrics()
+        assert (m["submitted"], m["sent"], m["deduped"]) == (3, 3, 1)
+    run(with_bot(test))
+
+def test_retry_after_keeps_the_place_and_pauses_the_limiter():
+    async def test(api, bot):
+        limiter = open_limiter()
+        queue = SendQueue(workers=1, limiter=limiter)
+        for n in range(3):
+            queue.submit(n, sender(bot, limiter, 100 + n, f"job {n}"))
+        api.flood_next(1, retry_after=1)
+        started = time.monotonic()
+        queue.start()
+        await queue.join()
+        elapsed = time.monotonic() - started
+        await queue.stop()
+        # Job 0 got the 429 and still went out first, after the pause
+        assert [text for _, _, text in api.sent] == ["job 0", "job 1", "job 2"]
+        assert api.stats["429"] == 1
+        assert elapsed >= 1
+        m = queue.metrics()
+        assert (m["sent"], m["retried"], m["failed"]) == (3, 1, 0)
+    run(with_bot(test))
+
+def test_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(send_queue, "MAX_RETRIES", 2)
+    async def test(api, bot):
+        limiter = open_limiter()
+        queue = SendQueue(workers=1, limiter=limiter)
+        queue.submit("flooded", sender(bot, limiter, 1, "never"))
+        api.flood_next(3, retry_after=1)
+        queue.start()
+        await queue.join()
+        m = queue.metrics()
+        assert (m["sent"], m["retried"], m["failed"]) == (0, 2, 1)
+        assert api.stats["429"] == 3 and api.sent == []
+        # Given up means no longer pending: the key can be submitted again
+        assert queue.submit("flooded", sender(bot, limiter, 1, "now"))
+        await queue.join()
+        await queue.stop()
+        assert [text for _, _, text in api.sent] == ["now"]
+    run(with_bot(test))
+
+def test_queue_full_at_maxsize():
+    async def test():
+        queue = SendQueue(maxsize=3, limiter=open_limiter())
+        for n in range(3):
+            queue.submit(n, asyncio.sleep)
+        with pytest.raises(QueueFull):
+            queue.submit(3, asyncio.sleep)
+        # A duplicate is answered before the bound is checked
+        assert not queue.submit(0, asyncio.sleep)
+        m = queue.metrics()
+        assert (m["queued"], m["capacity"], m["rejected"], m["deduped"]) == (3, 3, 1, 1)
+    run(test())
+
+def test_limiter_spaces_one_chat():
+    async def test():
+        limiter = RateLimiter(per_chat_interval=0.1, per_chat_burst=2, global_rate=1000, global_burst=1000)
+        started = time.monotonic()
+        times = []
+        for _ in range(5):
+            await limiter.acquire(1)
+            times.append(time.monotonic() - started)
+        # A burst of 2, then one every 0.1s
+        for got, want in zip(times, [0, 0, 0.1, 0.2, 0.3]):
+            assert want - 0.005 <= got <= want + 0.05
+    run(test())
+
+def test_limiter_spaces_all_chats():
+    async def test():
+        limiter = RateLimiter(per_chat_interval=10, per_chat_burst=1, global_rate=20, global_burst=2)
+        started = time.monotonic()
+        times = []
+        for chat_id in range(5):
+            await limiter.acquire(chat_id)
+            times.append(time.monotonic() - started)
+        for got, want in zip(times, [0, 0, 0.05, 0.1, 0.15]):
+            assert want - 0.005 <= got <= want + 0.05
+    run(test())
+
+def test_queue_stays_under_telegram_limits():
+    # The fake answers 429 past these limits; the limiter is set a little tighter
+    async def test(api, bot):
+        limiter = RateLimiter(per_chat_interval=0.2, per_chat_burst=2, global_rate=20, global_burst=3)
+        queue = SendQueue(limiter=limiter)
+        queue.start()
+        for n in range(12):
+            queue.submit(n, sender(bot, limiter, n % 3, f"job {n}"))
+        await queue.join()
+        await queue.stop()
+        assert api.stats["429"] == 0
+        assert len(api.sent) == 12
+    run(with_bot(test, chat_interval=0.18, chat_burst=2, global_rate=25, global_burst=3))
@@ -0,0 +1,41 @@
+import json
+
+import web_shards
+
+def write_master(path, count, tag=""):
+    path.write_text("".join(f"{n}. Питання {n}{tag}?\n*a. Так\nb. Ні\n\n" for n in range(1, count + 1)), encoding="utf-8")
+
+def index(shards_dir, name):
+    with open(shards_dir / name[:-4] / "index.json", encoding="utf-8") as f:
+        return json.load(f)
+
+def shard(shards_dir, name, n):
+    with open(shards_dir / name[:-4] / f"{n}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+def test_sync_follows_the_txt(tmp_path):
+    txt_dir, shards_dir = tmp_path / "TXT", tmp_path / "JSON"
+    txt_dir.mkdir()
+    write_master(txt_dir / "A.txt", web_shards.SHARD_SIZE + 1)
+    write_master(txt_dir / "B.txt", 3)
+    assert web_shards.sync_all(str(txt_dir), str(shards_dir)) == 2
+    assert index(shards_dir, "A.txt")["shards"] == 2
+    assert shard(shards_dir, "B.txt", 0) == {"q": ["Питання 1?", "Питання 2?", "Питання 3?"],
+                                             "o": [["Так", "Ні"]] * 3, "c": [0, 0, 0]}
+
+    # Unchanged masters are skipped
+    assert web_shards.sync_all(str(txt_dir), str(shards_dir)) == 0
+
+    # An upload replaced B.txt and dropped its index (admin.html), A.txt was edited in place
+    write_master(txt_dir / "B.txt", 2, " (new)")
+    (shards_dir / "B" / "index.json").unlink()
+    write_master(txt_dir / "A.txt", 1, " (edited)")
+    assert web_shards.sync_all(str(txt_dir), str(shards_dir)) == 2
+    assert index(shards_dir, "B.txt")["source"] == web_shards.file_hash(str(txt_dir / "B.txt"))
+    assert shard(shards_dir, "B.txt", 0)["q"] == ["Питання 1 (new)?", "Питання 2 (new)?"]
+    assert sorted(p.name for p in (shards_dir / "A").iterdir()) == ["0.json", "index.json"]
+
+    # A master removed from Merged/TXT loses its shards
+    (txt_dir / "A.txt").unlink()
+    web_shards.sync_all(str(txt_dir), str(shards_dir))
+    assert sorted(p.name for p in shards_dir.iterdir()) == ["B"]
@@ -0,0 +1,35 @@
+from functools import lru_cache
+
+from reportlab.pdfbase import pdfmetrics
+
+# Distinct words across all masters fit comfortably; the cache is per process
+WIDTH_CACHE_SIZE = 1 << 17
+
+@lru_cache(maxsize=WIDTH_CACHE_SIZE)
+def word_width(word, font_name, font_size):
+    return pdfmetrics.stringWidth(word, font_name, font_size)
+
+def wrap_line(line, max_width, font_name, font_size):
+    """Splits a line on spaces into pieces narrower than max_width.
+
+    Same result as re-measuring ' '.join(current_line + [word]) for every word,
+    but each word is measured once (cached) and the line width is a running sum.
+    A first word wider than the line still produces an empty piece before it, as
+    the old loop did.
+    """
+    space = word_width(' ', font_name, font_size)
+    wrapped_lines = []
+    current_line = []
+    current_w = 0.0
+    for word in line.split(' '):
+        w = word_width(word, font_name, font_size)
+        test_w = current_w + space + w if current_line else w
+        if test_w < max_width:
+            current_line.append(word)
+            current_w = test_w
+        else:
+            wrapped_lines.append(' '.join(current_line))
+            current_line = [word]
+            current_w = w
+    if current_line: wrapped_lines.append(' '.join(current_line))
+    return wrapped_lines
@@ -0,0 +1,140 @@
+import os
+import re
+import sys
+import json
+import shutil
+import time
+from hashlib import blake2b
+from itertools import islice
+
+from questions import iter_lines, iter_raw_blocks
+
+# --- CONFIG ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MERGED_TXT_DIR = os.path.join(BASE_DIR, "Merged", "TXT")
+SHARDS_DIR = os.path.join(BASE_DIR, "Merged", "JSON")
+# One shard per "Частина" of the website, so opening a part fetches exactly one file
+SHARD_SIZE = 50
+
+# The website used to run parseTXT in the browser; this is the same parser, so JS
+# semantics are spelled out: \s and trim() are JS whitespace, \d is ASCII only.
+JS_SPACE = ("\t\n\v\f\r \xa0\u1680" + "".join(chr(c) for c in range(0x2000, 0x200b))
+            + "\u2028\u2029\u202f\u205f\u3000\ufeff")
+SPACE = f"[{re.escape(JS_SPACE)}]"
+BLOCK_START = re.compile(r"^[0-9]+\.")
+NUMBER_PREFIX = re.compile(rf"^[0-9]+\.{SPACE}*")
+OPTION = re.compile(r"^\*?[a-eA-E]\.")
+OPTION_PREFIX = re.compile(rf"^\*?[a-eA-E]\.{SPACE}*")
+
+def js_trim(text):
+    return text.strip(JS_SPACE)
+
+def parse_blocks(raw_blocks):
+    """Yields (question, options, correct index) per block, exactly what the viewer's parseTXT returned"""
+    for block in raw_blocks:
+        block = js_trim(block)
+        if not block: continue
+        lines = block.split("\n")
+        q = js_trim(NUMBER_PREFIX.sub("", lines[0], count=1))
+        opt_start = 1
+        for i in range(1, len(lines)):
+            if OPTION.match(js_trim(lines[i])):
+                opt_start = i
+                break
+            q += " " + js_trim(lines[i])
+        opts = []
+        correct = -1
+        for line in lines[opt_start:]:
+            line = js_trim(line)
+            if OPTION.match(line):
+                if line.startswith("*"): correct = len(opts)
+                opts.append(js_trim(OPTION_PREFIX.sub("", line, count=1)))
+        if q and opts and correct != -1:
+            yield q, opts, correct
+
+def parse_txt(txt):
+    """Master TXT content -> [(question, options, correct index)]"""
+    return list(parse_blocks(iter_raw_blocks(txt.replace("\r\n", "\n").split("\n"), BLOCK_START)))
+
+def shard_dir(name, shards_dir=SHARDS_DIR):
+    """Merged/JSON/<master without .txt>/"""
+    return os.path.join(shards_dir, name[:-len(".txt")] if name.endswith(".txt") else name)
+
+def file_hash(path):
+    h = blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def dump(data, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+def write_shards(name, txt_path, shards_dir=SHARDS_DIR, source=None):
+    """Parses one master and writes <dir>/index.json plus <dir>/<n>.json shards of SHARD_SIZE questions.
+
+    A shard is columnar: {"q": [question], "o": [[option]], "c": [correct index]}.
+    The folder is built next to the old one and swapped in. Returns the question count.
+    """
+    # Streamed a shard at a time; newline="\n" splits lines the way the browser did
+    questions = parse_blocks(iter_raw_blocks(iter_lines(txt_path, newline="\n"), BLOCK_START))
+    out_dir = shard_dir(name, shards_dir)
+    tmp_dir = out_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    shards = total = 0
+    while True:
+        chunk = list(islice(questions, SHARD_SIZE))
+        if not chunk: break
+        dump({"q": [q for q, _, _ in chunk], "o": [o for _, o, _ in chunk], "c": [c for _, _, c in chunk]},
+             os.path.join(tmp_dir, f"{shards}.json"))
+        shards += 1
+        total += len(chunk)
+    dump({
+        "total": total, "shard_size": SHARD_SIZE, "shards": shards,
+        "source": source or file_hash(txt_path),
+    }, os.path.join(tmp_dir, "index.json"))
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return total
+
+def read_source(name, shards_dir=SHARDS_DIR):
+    try:
+        with open(os.path.join(shard_dir(name, shards_dir), "index.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("source")
+    except (FileNotFoundError, ValueError):
+        return None
+
+def sync_all(txt_dir=MERGED_TXT_DIR, shards_dir=SHARDS_DIR):
+    """Brings Merged/JSON in line with Merged/TXT: changed masters are re-sharded, removed ones dropped.
+
+    Keyed on the TXT content hash, so masters uploaded straight into Merged/TXT
+    (admin page) are picked up as well. Returns how many masters were re-sharded.
+    """
+    os.makedirs(shards_dir, exist_ok=True)
+    started = time.perf_counter()
+    names = sorted(f for f in os.listdir(txt_dir) if f.endswith(".txt"))
+    written = 0
+    for name in names:
+        txt_path = os.path.join(txt_dir, name)
+        source = file_hash(txt_path)
+        if read_source(name, shards_dir) == source: continue
+        total = write_shards(name, txt_path, shards_dir, source)
+        written += 1
+        print(f"   🧩 {name}: {total} questions, {-(-total // SHARD_SIZE)} shard(s)")
+
+    wanted = {os.path.basename(shard_dir(name, shards_dir)) for name in names}
+    for entry in os.listdir(shards_dir):
+        if entry not in wanted and os.path.isdir(os.path.join(shards_dir, entry)):
+            shutil.rmtree(os.path.join(shards_dir, entry))
+    print(f"🧩 Web shards: {written} of {len(names)} master(s) rebuilt in {time.perf_counter() - started:.1f}s")
+    return written
+
+if __name__ == "__main__":
+    # python web_shards.py [--force] — rebuild the website's JSON shards from Merged/TXT
+    if "--force" in sys.argv[1:]:
+        shutil.rmtree(SHARDS_DIR, ignore_errors=True)
+    sync_all()
@@ -1,51 +1,50 @@
 import os
 import re
+import sys
+import json
+import time
+import codecs
+from hashlib import blake2b
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# The specific directories defined in your request
-TARGET_DIRECTORIES = [
-    "/Users/mehdinih/Downloads/BazaAll-main/English/Krok M/Nursing",
-    "/Users/mehdinih/Downloads/BazaAll-main/English/Krok B/Nursing",
-    "/Users/mehdinih/Downloads/BazaAll-main/English/Krok 2/Pharmacy",
-    "/Users/mehdinih/Downloads/BazaAll-main/English/Krok 2/Medicine",
-    "/Users/mehdinih/Downloads/BazaAll-main/English/Krok 2/Dentistry",
-    "/Users/mehdinih/Downloads/BazaAll-main/English/Krok 1/Pharmacy",
-    "/Users/mehdinih/Downloads/BazaAll-main/English/Krok 1/Medicine",
-    "/Users/mehdinih/Downloads/BazaAll-main/English/Krok 1/Dentistry",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 1/Лечебное дело",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 1/Стоматология",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 1/Фармация",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 2/Клиническая фармация",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 2/Косметология",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 2/Лабораторная диагностика",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 2/Лечебное дело",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 2/Медицинская психология",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 2/Стоматология",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 2/Фармация",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 3/Лабораторная диагностика",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 3/Лечебное дело",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 3/Стоматология",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок 3/Фармация",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок M/Акушерство",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок M/Лечебное дело",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок M/Медпрофилактика",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок M/Сестринское дело",
-    "/Users/mehdinih/Downloads/BazaAll-main/Московська/Крок Б/Лабораторная диагностика"
-]
-
-def read_file_safe(filepath):
+# --- CONFIG ---
+# Everything is relative to this folder: python "Звичайні Базі/merger.py" [--force] [folder ...]
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LANGUAGES = ["English", "Московська", "Українська"]
+CACHE_FILE = os.path.join(BASE_DIR, ".merger_cache.json")
+MERGE_WORKERS = int(os.environ.get("KROK_MERGE_WORKERS", "0")) or os.cpu_count() or 1
+
+# Tried in this order; the first one that decodes the whole file wins (latin1 always does)
+ENCODINGS = ['utf-8', 'cp1251', 'cp1252', 'latin1']
+SAMPLE_BYTES = 64 * 1024
+
+def detect_encoding(sample):
+    """First encoding that can decode a byte sample (a character cut at its end is fine)"""
+    for enc in ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return ENCODINGS[-1]
+
+def read_file_safe(filepath, encoding=None):
     """
-    Tries to read a file with UTF-8, then falls back to CP1251 (Windows Cyrillic), 
-    then CP1252 (Western European).
+    Reads a file once and decodes it with UTF-8, then CP1251 (Windows Cyrillic),
+    then CP1252 (Western European), then Latin-1. The guess comes from the first
+    bytes (or the cache); the whole file still has to decode, else the next
+    encoding is tried. Returns (text, encoding) with newlines as open() gives them.
     """
-    encodings = ['utf-8', 'cp1251', 'windows-1251', 'cp1252', 'latin1']
-    for enc in encodings:
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    guess = encoding or detect_encoding(data[:SAMPLE_BYTES])
+    for enc in ENCODINGS[ENCODINGS.index(guess):]:
         try:
-            with open(filepath, 'r', encoding=enc) as f:
-                return f.read()
+            text = data.decode(enc)
+            break
         except UnicodeDecodeError:
             continue
-    print(f"Error: Could not decode {filepath}")
-    return ""
+    return text.replace('\r\n', '\n').replace('\r', '\n'), enc
 
 def parse_questions_from_text(text):
     """
@@ -54,7 +53,7 @@ def parse_questions_from_text(text):
     # Pattern looks for a number, a dot, and a space at the start of a line
     # or preceded by a newline.
     pattern = re.compile(r'(?:^|\n)\s*(\d+\..*?)(?=(?:^|\n)\s*\d+\.|$)', re.DOTALL)
-    
+
     matches = pattern.findall(text)
     cleaned_questions = [m.strip() for m in matches if m.strip()]
     return cleaned_questions
@@ -77,7 +76,7 @@ def get_smart_group_name(filepath):
     path_parts = filepath.split(os.sep)
     filename = os.path.basename(filepath)
     name_no_ext = os.path.splitext(filename)[0]
-    
+
     # Convert path parts to lowercase for case-insensitive checking
     lower_parts = [p.lower() for p in path_parts]
 
@@ -94,23 +93,50 @@ def get_smart_group_name(filepath):
     # e.g., "Surgery, 1" -> "Surgery"
     # e.g., "Терапия, 2" -> "Терапия"
     normalized_name = re.sub(r'[, ]+\d+$', '', name_no_ext)
-    
+
     # Also strip accidental trailing whitespace
     normalized_name = normalized_name.strip()
-    
+
     return normalized_name + ".txt"
 
-def process_directory(base_dir):
-    if not os.path.exists(base_dir):
-        print(f"Skipping (not found): {base_dir}")
-        return
+def discover_directories(base_dir=BASE_DIR):
+    """
+    Every specialty folder (<language>/<level>/<specialty>) of the tree. Levels that
+    keep a hand-made "Merged <level>" folder (Українська/Крок 1-3) are left alone.
+    """
+    found = []
+    for language in LANGUAGES:
+        lang_dir = os.path.join(base_dir, language)
+        if not os.path.isdir(lang_dir): continue
+        for level in sorted(os.listdir(lang_dir)):
+            level_dir = os.path.join(lang_dir, level)
+            if not os.path.isdir(level_dir) or level.startswith("PDF Merged"): continue
+            if any(d.startswith("Merged") for d in os.listdir(level_dir)): continue
+            for specialty in sorted(os.listdir(level_dir)):
+                if os.path.isdir(os.path.join(level_dir, specialty)):
+                    found.append(os.path.join(level_dir, specialty))
+    return found
 
-    print(f"Processing Directory: {base_dir}")
-    
+def file_stat(path):
+    st = os.stat(path)
+    return st.st_size, int(st.st_mtime)
+
+def process_directory(base_dir, cache, force=False):
+    """
+    Merges one specialty folder into <folder>/Merged. `cache` is this folder's slice of
+    the merger cache: {"files": {path: entry}, "groups": {output: signature}}. A group
+    whose source files all hash the same as last time, with its output still there,
+    is not rebuilt. Returns (cache, log lines, groups written, groups skipped).
+    """
+    log = [f"Processing Directory: {os.path.relpath(base_dir, BASE_DIR)}"]
     merged_dir = os.path.join(base_dir, "Merged")
     if not os.path.exists(merged_dir):
         os.makedirs(merged_dir)
 
+    files_cache = cache.get("files", {})
+    groups_cache = cache.get("groups", {})
+    new_cache = {"files": {}, "groups": {}}
+
     # Dictionary to map { "NormalizedName.txt": [path1, path2, path3] }
     files_by_group = {}
 
@@ -123,25 +149,50 @@ def process_directory(base_dir):
             if file.lower().endswith('.txt'):
                 full_path = os.path.join(root, file)
                 group_name = get_smart_group_name(full_path)
-                
+
                 if group_name not in files_by_group:
                     files_by_group[group_name] = []
                 files_by_group[group_name].append(full_path)
 
+    written = skipped = 0
     # Process each group
     for output_filename, file_paths in files_by_group.items():
-        unique_questions = []
-        seen_fingerprints = set()
-        
-        # print(f"  -> Merging into '{output_filename}' ({len(file_paths)} source files)")
-
         # Sort paths for consistency
         file_paths.sort()
+        output_path = os.path.join(merged_dir, output_filename)
+        out_key = os.path.relpath(output_path, BASE_DIR)
 
+        # Per-source fingerprint: size and mtime, then the content hash when those moved
+        signature = blake2b(digest_size=16)
         for file_path in file_paths:
-            content = read_file_safe(file_path)
+            key = os.path.relpath(file_path, BASE_DIR)
+            size, mtime = file_stat(file_path)
+            entry = files_cache.get(key)
+            if not entry or entry["bytes"] != size or entry["mtime"] != mtime:
+                with open(file_path, 'rb') as f:
+                    digest = blake2b(f.read(), digest_size=16).hexdigest()
+                if not entry or entry["hash"] != digest:
+                    entry = {"bytes": size, "mtime": mtime, "hash": digest}
+                else:
+                    # Same content with a new mtime (fresh checkout): remember it, so it is not hashed again
+                    entry = dict(entry, mtime=mtime)
+            new_cache["files"][key] = entry
+            signature.update(f"{key}\0{entry['hash']}\n".encode('utf-8'))
+        signature = signature.hexdigest()
+        new_cache["groups"][out_key] = signature
+
+        if not force and groups_cache.get(out_key) == signature and os.path.exists(output_path):
+            skipped += 1
+            continue
+
+        unique_questions = []
+        seen_fingerprints = set()
+        for file_path in file_paths:
+            entry = new_cache["files"][os.path.relpath(file_path, BASE_DIR)]
+            content, entry["encoding"] = read_file_safe(file_path, entry.get("encoding"))
             questions = parse_questions_from_text(content)
-            
+            entry["questions"] = len(questions)
+
             for q in questions:
                 fingerprint = get_question_fingerprint(q)
                 if fingerprint not in seen_fingerprints:
@@ -150,21 +201,72 @@ def process_directory(base_dir):
 
         # Write the merged file
         if unique_questions:
-            output_path = os.path.join(merged_dir, output_filename)
-            
             with open(output_path, 'w', encoding='utf-8') as out_f:
                 for index, q_text in enumerate(unique_questions, 1):
                     # Strip original number
                     text_content = re.sub(r'^\d+\.\s*', '', q_text)
                     # Write with new sequential number
                     out_f.write(f"{index}. {text_content}\n\n")
-            
-            print(f"     [Created] {output_filename} ({len(unique_questions)} questions) from {len(file_paths)} files.")
 
-def main():
-    for directory in TARGET_DIRECTORIES:
-        process_directory(directory)
-    print("\nAll operations completed.")
+            log.append(f"     [Created] {output_filename} ({len(unique_questions)} questions) from {len(file_paths)} files.")
+            written += 1
+        else:
+            # Nothing to write; don't remember the group so it is looked at again next time
+            del new_cache["groups"][out_key]
+
+    return new_cache, log, written, skipped
+
+def load_cache():
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_cache(cache):
+    tmp_path = CACHE_FILE + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=1, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, CACHE_FILE)
+
+def main(args=None, workers=MERGE_WORKERS):
+    args = sys.argv[1:] if args is None else args
+    force = "--force" in args
+    wanted = [os.path.abspath(a) for a in args if a != "--force"]
+    directories = [d for d in discover_directories()
+                   if not wanted or any(d == w or d.startswith(w + os.sep) for w in wanted)]
+    if not directories:
+        print("No specialty folders found.")
+        return
+
+    cache = load_cache()
+    workers = max(1, min(workers, len(directories)))
+    print(f"🔀 Merging {len(directories)} folder(s) on {workers} process(es)...", flush=True)
+    started = time.perf_counter()
+    written = skipped = 0
+
+    def report(directory, result):
+        nonlocal written, skipped
+        cache[os.path.relpath(directory, BASE_DIR)] = result[0]
+        print("\n".join(result[1]), flush=True)
+        written += result[2]
+        skipped += result[3]
+
+    jobs = [(d, cache.get(os.path.relpath(d, BASE_DIR), {}), force) for d in directories]
+    if workers == 1:
+        for job in jobs:
+            report(job[0], process_directory(*job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(process_directory, *job): job[0] for job in jobs}
+            for future in as_completed(futures):
+                report(futures[future], future.result())
+
+    # Folders that no longer exist drop out of the cache
+    kept = {os.path.relpath(d, BASE_DIR) for d in discover_directories()}
+    save_cache({k: v for k, v in cache.items() if k in kept})
+    print(f"\nAll operations completed: {written} file(s) written, {skipped} unchanged, "
+          f"{time.perf_counter() - started:.1f}s.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()